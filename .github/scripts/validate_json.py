@@ -1,48 +1,36 @@
-import os
 import json
 import sys
 import importlib.util
 
-VALIDATOR_ROOT = ".github/scripts/validators"
+# The schemas and validator live with the bot's !verify command so both check the same rules
+VERIFIER_PATH = "Muninn/cogs/rpg/verify_data.py"
 TARGET_ROOT = "Muninn/data"
+REPORT_PATH = "validation-report.json"
+CACHE_PATH = ".verify_cache.json"
 
-def load_validator(folder_name):
-    try:
-        path = os.path.join(VALIDATOR_ROOT, f"{folder_name}.py")
-        if not os.path.isfile(path):
-            return None
-        spec = importlib.util.spec_from_file_location(f"validators.{folder_name}", path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return module.validate
-    except Exception as e:
-        print(f"[ERROR] Loading validator for '{folder_name}': {e}")
-        return None
-
-def validate_json_file(filepath, validator_fn):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return validator_fn(data, filepath)
-    except Exception as e:
-        print(f"[ERROR] Failed to parse {filepath}: {e}")
-        return False
+def load_verifier():
+    spec = importlib.util.spec_from_file_location("verify_data", VERIFIER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can unpickle functions from the module
+    sys.modules["verify_data"] = module
+    spec.loader.exec_module(module)
+    return module
 
 def walk_and_validate():
-    all_valid = True
-    for root, dirs, files in os.walk(TARGET_ROOT):
-        folder_name = os.path.basename(root)
-        validator_fn = load_validator(folder_name)
-        if validator_fn is None:
-            continue  # Skip folders without validators
+    verifier = load_verifier()
+    report = verifier.run_verification(TARGET_ROOT, cache_path=CACHE_PATH)
+
+    for file in report["files"]:
+        for error in file["errors"]:
+            print(f"[{file['path']}] {error}")
+
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
 
-        print(f"🔍 Validating files in: {root}")
-        for file in files:
-            if file.endswith(".json"):
-                filepath = os.path.join(root, file)
-                if not validate_json_file(filepath, validator_fn):
-                    all_valid = False
-    return all_valid
+    summary = report["summary"]
+    print(f"🔍 Validated {summary['files']} files ({summary['checked']} checked, {summary['cached']} unchanged) "
+          f"in {report['timings_ms']['total']:.0f} ms: {summary['errors']} problem(s). Report written to {REPORT_PATH}")
+    return report["ok"]
 
 if __name__ == "__main__":
     success = walk_and_validate()
@@ -7,19 +7,96 @@ import yaml
 from discord.ext import commands
 
 class AtResponse(commands.Cog):
+    """Replies to mentions with a random line from ``data/at_responses.yaml``.
+
+    The file is parsed once and only re-read when its mtime changes (checked
+    at most every ``RELOAD_CHECK_INTERVAL`` seconds), so ordinary messages
+    cost no I/O. New responses go into the in-memory pool straight away and
+    are written back in one atomic write per burst.
+    """
+
+    RESPONSES_PATH = os.path.join(os.path.dirname(__file__), '../data/at_responses.yaml')
+    ROLE_MENTION = "<@&1301425229213470762>"
+    RELOAD_CHECK_INTERVAL = 5.0
+    WRITE_DELAY = 2.0  # seconds to gather added responses into one write
+
     def __init__(self, bot):
         self.bot = bot
+        self._responses = []
+        self._mtime = None
+        self._last_check = 0.0
+        self._pending_write = None
+        self.reload()
+
+    def cog_unload(self):
+        if self._pending_write and not self._pending_write.done():
+            self._pending_write.cancel()
+            self._write_responses()
+
+    def reload(self):
+        """Re-read the responses file now (call after writing to it)."""
+        try:
+            mtime = os.path.getmtime(self.RESPONSES_PATH)
+            with open(self.RESPONSES_PATH, 'r', encoding='utf-8') as f:
+                responses = yaml.safe_load(f)["responses"]
+        except (OSError, yaml.YAMLError, KeyError, TypeError) as e:
+            print(f"Could not load @ responses, keeping {len(self._responses)} cached: {e}")
+            return
+        self._responses = [str(response) for response in responses or []]
+        self._mtime = mtime
+        self._last_check = time.monotonic()
+
+    @property
+    def responses(self):
+        now = time.monotonic()
+        writing = self._pending_write is not None and not self._pending_write.done()
+        # Don't let a reload drop responses that haven't been written yet
+        if not writing and now - self._last_check >= self.RELOAD_CHECK_INTERVAL:
+            self._last_check = now
+            try:
+                if os.path.getmtime(self.RESPONSES_PATH) != self._mtime:
+                    self.reload()
+            except OSError:
+                pass
+        return self._responses
+
+    def add_response(self, response):
+        """Add a response to the pool. Returns False if it was already there."""
+        if response in self.responses:
+            return False
+        self._responses.append(response)
+        if self._pending_write is None or self._pending_write.done():
+            self._pending_write = asyncio.create_task(self._write_later())
+        return True
+
+    async def _write_later(self):
+        await asyncio.sleep(self.WRITE_DELAY)
+        self._write_responses()
+
+    def _write_responses(self):
+        # Write to a temp file and swap it in, so a crash can't leave a truncated file
+        temp_path = f"{self.RESPONSES_PATH}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                yaml.dump({"responses": self._responses}, f, default_flow_style=False, allow_unicode=True)
+            os.replace(temp_path, self.RESPONSES_PATH)
+            self._mtime = os.path.getmtime(self.RESPONSES_PATH)
+        except OSError as e:
+            print(f"Could not write @ responses: {e}")
+
+    def is_mentioned(self, message):
+        # Both checks only look at the already-parsed message; @everyone doesn't count
+        if message.mention_everyone:
+            return self.ROLE_MENTION in message.content
+        return self.bot.user in message.mentions or self.ROLE_MENTION in message.content
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        with open(os.path.join(os.path.dirname(__file__), '../data/at_responses.yaml'), 'r', encoding='utf-8') as f:
-            responses = yaml.safe_load(f)["responses"]
-        
-        print(message.content)
-        
-        # Check if bot is mentioned but ignore @everyone mentions
-        is_mentioned = (self.bot.user.mentioned_in(message) and not message.mention_everyone) or "<@&1301425229213470762>" in message.content
-        if is_mentioned:
+        if message.author == self.bot.user or not self.is_mentioned(message):
+            return
+
+        responses = self.responses
+        if responses:
             await message.channel.send(str.format(random.choice(responses), user=message.author.display_name))
 
 async def setup(bot):
@@ -0,0 +1,190 @@
+import discord # type: ignore
+from discord.ext import commands # type: ignore
+import aiohttp
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional, Tuple
+from PIL import Image, ImageStat
+
+class Fetcher(commands.Cog):
+    """Bot-wide HTTP client with a pooled aiohttp session and an image cache.
+
+    Images are cached in memory (LRU) and on disk, keyed by the avatar hash
+    where one is available, with the average colour stored next to each image
+    so it is only ever computed once per image.
+    """
+
+    CACHE_DIR = "data/image_cache"
+    MEMORY_CACHE_SIZE = 256
+    MAX_CONNECTIONS = 20
+    TIMEOUT = 15
+
+    def __init__(self, bot, cache_dir: str = None):
+        self.bot = bot
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._images: "OrderedDict[str, Tuple[Image.Image, Tuple[int, int, int]]]" = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "errors": 0}
+
+    async def cog_unload(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+        return self.session
+
+    async def fetch_bytes(self, url: str) -> Optional[bytes]:
+        """Download a URL and return its body, or None on any non-200 response."""
+        session = await self.get_session()
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return None
+                return await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[Fetcher] Error fetching {url}: {e}")
+            return None
+
+    @staticmethod
+    def average_color(image: Image.Image) -> Tuple[int, int, int]:
+        """Average RGB colour of an image."""
+        return tuple(int(c) for c in ImageStat.Stat(image.convert("RGB")).mean[:3])
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        safe_key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, safe_key)
+        return f"{base}.png", f"{base}.json"
+
+    def _remember(self, key: str, entry):
+        self._images[key] = entry
+        self._images.move_to_end(key)
+        while len(self._images) > self.MEMORY_CACHE_SIZE:
+            self._images.popitem(last=False)
+
+    def _load_from_disk(self, key: str):
+        image_path, meta_path = self._paths(key)
+        if not (os.path.exists(image_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                color = tuple(json.load(f)["color"])
+            image = Image.open(image_path).convert("RGB")
+            image.load()
+            return image, color
+        except Exception as e:
+            print(f"[Fetcher] Discarding unreadable cache entry for {key}: {e}")
+            return None
+
+    def _decode_and_store(self, key: str, data: bytes):
+        image = Image.open(BytesIO(data)).convert("RGB")
+        color = self.average_color(image)
+        image_path, meta_path = self._paths(key)
+        tmp_path = f"{image_path}.tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, image_path)
+        with open(meta_path, "w") as f:
+            json.dump({"key": key, "color": list(color)}, f)
+        return image, color
+
+    async def get_image(self, url: str, key: str = None):
+        """Return ``(image, average_color)`` for a URL, or None if it cannot be fetched.
+
+        ``key`` identifies the image content (e.g. an avatar hash); it defaults
+        to the URL itself.
+        """
+        return await self._get_cached(key or url, lambda: self.fetch_bytes(url))
+
+    async def get_file_image(self, path: str):
+        """Return ``(image, average_color)`` for a local image file.
+
+        The cache key includes the file's mtime, so replacing the file
+        invalidates the cached entry.
+        """
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        def read():
+            with open(path, "rb") as f:
+                return f.read()
+
+        async def load():
+            return await asyncio.to_thread(read)
+
+        return await self._get_cached(f"file:{path}:{mtime}", load)
+
+    async def _get_cached(self, key: str, load_bytes):
+        entry = self._images.get(key)
+        if entry is not None:
+            self._images.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return entry
+
+        # Collapse concurrent requests for the same image into one load
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await asyncio.to_thread(self._load_from_disk, key)
+            if entry is not None:
+                self.stats["disk_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                data = await load_bytes()
+                if data is not None:
+                    entry = await asyncio.to_thread(self._decode_and_store, key, data)
+                else:
+                    self.stats["errors"] += 1
+            if entry is not None:
+                self._remember(key, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            print(f"[Fetcher] Error processing image {key}: {e}")
+            self.stats["errors"] += 1
+            return None
+        finally:
+            if not future.done():
+                future.set_result(None)
+            self._inflight.pop(key, None)
+
+    async def get_avatar(self, user, size: int = 128):
+        """Return ``(image, average_color)`` for a user's current avatar."""
+        avatar = user.display_avatar
+        return await self.get_image(str(avatar.with_size(size).url), key=f"avatar:{avatar.key}:{size}")
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    @commands.command(name="fetch_stats")
+    @commands.is_owner()
+    async def fetch_stats(self, ctx):
+        """Show image cache hit/miss counters."""
+        embed = discord.Embed(title="Image Cache", color=discord.Color.blue())
+        embed.add_field(name="Memory hits", value=self.stats["memory_hits"], inline=True)
+        embed.add_field(name="Disk hits", value=self.stats["disk_hits"], inline=True)
+        embed.add_field(name="Misses", value=self.stats["misses"], inline=True)
+        embed.add_field(name="Errors", value=self.stats["errors"], inline=True)
+        embed.add_field(name="Hit rate", value=f"{self.hit_rate():.1%}", inline=True)
+        embed.add_field(name="In memory", value=f"{len(self._images)}/{self.MEMORY_CACHE_SIZE}", inline=True)
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Fetcher(bot))
@@ -3,19 +3,53 @@ from discord.ext import commands # type: ignore
 import json
 import asyncio
 import datetime
+import random
+import struct
+import time
+import uuid
+from collections import deque
 from typing import Dict, Any, Optional
-import yaml
 import os
 
 class InterBotCommunication(commands.Cog):
-    """Handles communication between Muninn and Huginn bots via DMs."""
+    """Handles communication between Muninn and Huginn bots.
+
+    Both bots run on the same host, so messages go over a Unix domain socket
+    as length-prefixed JSON frames (Muninn listens, Huginn connects and
+    reconnects with backoff). Discord DMs are only used when the socket is
+    down.
+
+    The bots run in separate containers, so the socket has to live on a
+    volume both of them mount (see the README). Set ``RAVENS_IPC_SOCKET`` to
+    use another path.
+    """
+
+    SOCKET_PATH = os.environ.get("RAVENS_IPC_SOCKET", "/usr/src/ravens/muninn-huginn.sock")
+    IS_SERVER = False  # Muninn owns the socket
+    FRAME_HEADER = struct.Struct("!I")  # 4-byte big-endian body length
+    MAX_FRAME = 4 * 1024 * 1024
+    REQUEST_TIMEOUT = 5.0
+    CONFIG_SYNC_DELAY = 0.5  # seconds to gather bursty server_config_sync messages
+    RECONNECT_MIN, RECONNECT_MAX = 1.0, 60.0
     
     def __init__(self, bot):
         self.bot = bot
         self.bot_name = "Huginn"  # This bot is Huginn
         self.other_bot_id = None  # Will be set to Muninn's bot ID
         self.message_queue = []
-        self.pending_responses = {}
+        self.pending_responses = {}  # message id -> Future for the reply
+
+        # Local transport state
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._write_lock = asyncio.Lock()
+        self._server = None
+        self._startup_task = None
+        self._transport_task = None
+        self._frame_tasks = set()  # Held so running handlers aren't garbage collected
+        self._pending_config_syncs = {}  # guild id -> latest config, flushed as one batch
+        self._config_flush = None
+        self.rtts = deque(maxlen=50)  # Recent local round-trip times in ms
+        self.transport_stats = {"local_sent": 0, "local_received": 0, "dm_sent": 0, "batches": 0, "reconnects": 0}
         self.received_configs = {}  # Store configs received from Muninn
         
         # Define bot IDs and owner ID
@@ -24,15 +58,204 @@ class InterBotCommunication(commands.Cog):
         self.BOT_OWNER_ID = 867261583871836161
         
     async def cog_load(self):
-        """Initialize bot-specific settings when cog loads."""
-        await self.bot.wait_until_ready()
-        
-        # This is Huginn, so we need to find Muninn's ID
-        # For now, we'll set it manually - you can update this later
-        self.other_bot_id = None  # Replace with Muninn's bot ID when known
-            
+        """Start the setup task; cogs load before the bot connects, so nothing here can wait for ready."""
+        self._startup_task = asyncio.create_task(self._start())
+
+    async def _start(self):
+        """Once the bot is ready, work out which bot this is, then start the local transport."""
+        try:
+            await self.bot.wait_until_ready()
+
+            # This is Huginn, so we need to find Muninn's ID
+            # For now, we'll set it manually - you can update this later
+            self.other_bot_id = None  # Replace with Muninn's bot ID when known
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Inter-bot communication setup failed, transport not started: {e}")
+            return
+
+        self._transport_task = asyncio.create_task(self._run_server() if self.IS_SERVER else self._run_client())
         print(f"{self.bot_name} inter-bot communication system initialized")
 
+    async def cog_unload(self):
+        if self._startup_task:
+            self._startup_task.cancel()
+        if self._transport_task:
+            self._transport_task.cancel()
+        for task in self._frame_tasks:
+            task.cancel()
+        if self._server:
+            self._server.close()
+        if self._writer:
+            self._writer.close()
+        for future in self.pending_responses.values():
+            if not future.done():
+                future.cancel()
+
+    # ----- Local transport -----
+
+    @property
+    def local_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _run_server(self):
+        """Listen on the shared socket; the latest connection from the other bot wins."""
+        try:
+            if not os.path.isdir(os.path.dirname(self.SOCKET_PATH)):
+                print(f"{self.bot_name} IPC socket folder {os.path.dirname(self.SOCKET_PATH)} is missing, is the shared volume mounted? Falling back to DMs")
+                return
+            if os.path.exists(self.SOCKET_PATH):
+                os.unlink(self.SOCKET_PATH)  # Left over from a previous run
+            self._server = await asyncio.start_unix_server(self._serve_connection, path=self.SOCKET_PATH)
+            print(f"{self.bot_name} IPC listening on {self.SOCKET_PATH}")
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"{self.bot_name} IPC server stopped, falling back to DMs: {e}")
+
+    async def _serve_connection(self, reader, writer):
+        if self.local_connected:
+            self._writer.close()
+        self._writer = writer
+        print(f"{self.bot_name} IPC peer connected")
+        await self._read_frames(reader, writer)
+
+    async def _run_client(self):
+        """Keep a connection to the other bot's socket, backing off between failed attempts."""
+        if not os.path.isdir(os.path.dirname(self.SOCKET_PATH)):
+            print(f"{self.bot_name} IPC socket folder {os.path.dirname(self.SOCKET_PATH)} is missing, is the shared volume mounted? Falling back to DMs")
+            return
+        delay = self.RECONNECT_MIN
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.SOCKET_PATH)
+            except (OSError, ConnectionError):
+                # Jitter so both bots restarting together don't retry in lockstep
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, self.RECONNECT_MAX)
+                continue
+
+            delay = self.RECONNECT_MIN
+            self._writer = writer
+            self.transport_stats["reconnects"] += 1
+            print(f"{self.bot_name} IPC connected to {self.SOCKET_PATH}")
+            await self._read_frames(reader, writer)
+
+    async def _read_frames(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(self.FRAME_HEADER.size)
+                (length,) = self.FRAME_HEADER.unpack(header)
+                if length > self.MAX_FRAME:
+                    raise ValueError(f"frame of {length} bytes is too large")
+                frame = json.loads(await reader.readexactly(length))
+                self.transport_stats["local_received"] += 1
+                # Handle off the read loop so a slow handler can't stall replies
+                task = asyncio.create_task(self._handle_frame(frame))
+                self._frame_tasks.add(task)
+                task.add_done_callback(self._frame_tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"{self.bot_name} IPC read error: {e}")
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            print(f"{self.bot_name} IPC peer disconnected")
+
+    async def _write_frame(self, frame: Dict[str, Any]) -> bool:
+        if not self.local_connected:
+            return False
+        body = json.dumps(frame, separators=(",", ":")).encode("utf-8")
+        try:
+            async with self._write_lock:
+                self._writer.write(self.FRAME_HEADER.pack(len(body)) + body)
+                await self._writer.drain()
+        except (ConnectionError, OSError) as e:
+            print(f"{self.bot_name} IPC write failed: {e}")
+            return False
+        self.transport_stats["local_sent"] += 1
+        return True
+
+    def _make_message(self, message_type: str, data: Dict[str, Any], guild_id: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4().hex,
+            "type": message_type,
+            "from": self.bot_name,
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "guild_id": guild_id,
+            "data": data
+        }
+
+    async def _handle_frame(self, frame: Dict[str, Any]):
+        if frame.get("type") == "batch":
+            for message in frame.get("data", []):
+                await self._handle_frame(message)
+            return
+
+        # A reply to one of our requests
+        if frame.get("reply_to"):
+            future = self.pending_responses.pop(frame["reply_to"], None)
+            if future and not future.done():
+                future.set_result(frame.get("data"))
+            return
+
+        try:
+            result = await self.handle_inter_bot_command(frame)
+        except Exception as e:
+            print(f"Error handling inter-bot {frame.get('type')}: {e}")
+            result = {"error": str(e)}
+        if frame.get("expects_reply"):
+            reply = self._make_message("response", result if isinstance(result, dict) else {}, frame.get("guild_id"))
+            reply["reply_to"] = frame["id"]
+            await self._write_frame(reply)
+
+    async def request(self, message_type: str, data: Dict[str, Any], guild_id: Optional[int] = None,
+                      timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Send a message over the local socket and wait for the other bot's reply (None on failure)."""
+        message = self._make_message(message_type, data, guild_id)
+        message["expects_reply"] = True
+        future = asyncio.get_running_loop().create_future()
+        self.pending_responses[message["id"]] = future
+        try:
+            if not await self._write_frame(message):
+                return None
+            return await asyncio.wait_for(future, timeout or self.REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending_responses.pop(message["id"], None)
+
+    async def measure_rtt(self) -> Optional[float]:
+        """Ping the other bot over the local socket; returns the round trip in ms."""
+        start = time.perf_counter()
+        reply = await self.request("ping", {"message": "Ping from " + self.bot_name})
+        if reply is None:
+            return None
+        rtt = (time.perf_counter() - start) * 1000
+        self.rtts.append(rtt)
+        return rtt
+
+    def _queue_config_sync(self, data: Dict[str, Any], guild_id: Optional[int]):
+        # Only the newest config per guild matters, so a burst collapses into one frame
+        self._pending_config_syncs[guild_id] = data
+        if self._config_flush is None or self._config_flush.done():
+            self._config_flush = asyncio.create_task(self._flush_config_syncs())
+
+    async def _flush_config_syncs(self):
+        await asyncio.sleep(self.CONFIG_SYNC_DELAY)
+        pending, self._pending_config_syncs = self._pending_config_syncs, {}
+        messages = [self._make_message("server_config_sync", data, guild_id) for guild_id, data in pending.items()]
+        if await self._write_frame(self._make_message("batch", messages)):
+            self.transport_stats["batches"] += 1
+            return
+        for message in messages:
+            await self._send_via_dm(message)
+
     async def get_bot_owner(self):
         """Get the bot owner user object."""
         try:
@@ -42,32 +265,35 @@ class InterBotCommunication(commands.Cog):
 
     async def send_to_other_bot(self, message_type: str, data: Dict[str, Any], 
                                guild_id: Optional[int] = None) -> bool:
-        """Send a message to the other bot via DM."""
+        """Send a message to the other bot, over the local socket if it is up."""
+        if message_type == "server_config_sync" and self.local_connected:
+            self._queue_config_sync(data, guild_id)
+            return True
+
+        message_data = self._make_message(message_type, data, guild_id)
+        if await self._write_frame(message_data):
+            return True
+        return await self._send_via_dm(message_data)
+
+    async def _send_via_dm(self, message_data: Dict[str, Any]) -> bool:
+        """Fallback transport: DM the message as a JSON code block."""
         if not self.other_bot_id:
             print(f"Other bot ID not set, cannot send message")
             return False
             
         try:
-            other_bot = await self.bot.fetch_user(self.other_bot_id)
+            other_bot = self.bot.get_user(self.other_bot_id) or await self.bot.fetch_user(self.other_bot_id)
             if not other_bot:
                 print(f"Could not find other bot with ID {self.other_bot_id}")
                 return False
             
-            # Create structured message
-            message_data = {
-                "type": message_type,
-                "from": self.bot_name,
-                "timestamp": datetime.datetime.utcnow().isoformat(),
-                "guild_id": guild_id,
-                "data": data
-            }
-            
             # Send as JSON
             message_content = f"```json\n{json.dumps(message_data, indent=2)}\n```"
             await other_bot.send(message_content)
+            self.transport_stats["dm_sent"] += 1
             
             # Also notify bot owner
-            await self.notify_owner(f"📤 {self.bot_name} sent {message_type} to other bot", message_data)
+            await self.notify_owner(f"📤 {self.bot_name} sent {message_data['type']} to other bot", message_data)
             
             return True
             
@@ -140,7 +366,7 @@ class InterBotCommunication(commands.Cog):
         elif command_type == "at_response_update":
             await self.handle_at_response_update(data, guild_id)
         elif command_type == "ping":
-            await self.handle_ping(data)
+            return await self.handle_ping(data, reply=message_data.get("expects_reply", False))
         elif command_type == "pong":
             await self.handle_pong(data)
         else:
@@ -193,38 +419,29 @@ class InterBotCommunication(commands.Cog):
             await self.add_at_response(new_response, guild_id)
 
     async def add_at_response(self, response: str, guild_id: int):
-        """Add a new @ response to Huginn's response file."""
-        try:
-            response_file = "data/at_responses.yaml"
-            
-            # Load current responses
-            with open(response_file, 'r', encoding='utf-8') as f:
-                responses_data = yaml.safe_load(f)
-            
-            # Add new response if it doesn't already exist
-            if response not in responses_data["responses"]:
-                responses_data["responses"].append(response)
-                
-                # Save updated responses
-                with open(response_file, 'w', encoding='utf-8') as f:
-                    yaml.dump(responses_data, f, default_flow_style=False, allow_unicode=True)
-                
-                print(f"Added new @ response to Huginn: {response}")
-                
-                # Notify owner
-                await self.notify_owner(
-                    f"✅ New @ Response Added to {self.bot_name}",
-                    {"response": response, "guild_id": guild_id}
-                )
-            else:
-                print(f"@ response already exists in Huginn: {response}")
-                
-        except Exception as e:
-            print(f"Error adding @ response to Huginn: {e}")
+        """Add a new @ response to this bot's AtResponse pool (written back to its file in batches)."""
+        at_response = self.bot.get_cog('AtResponse')
+        if at_response is None:
+            print(f"AtResponse cog not loaded, could not add @ response: {response}")
+            return False
+
+        if not at_response.add_response(response):
+            print(f"@ response already exists: {response}")
+            return False
+
+        print(f"Added new @ response to {self.bot_name}: {response}")
+        await self.notify_owner(
+            f"✅ New @ Response Added to {self.bot_name}",
+            {"response": response, "guild_id": guild_id}
+        )
+        return True
 
-    async def handle_ping(self, data: Dict[str, Any]):
-        """Handle ping messages."""
-        await self.send_to_other_bot("pong", {"message": "Hello from " + self.bot_name})
+    async def handle_ping(self, data: Dict[str, Any], reply: bool = False):
+        """Handle ping messages; local requests get the pong as their reply."""
+        pong = {"message": "Hello from " + self.bot_name}
+        if reply:
+            return pong
+        await self.send_to_other_bot("pong", pong)
 
     async def handle_pong(self, data: Dict[str, Any]):
         """Handle pong messages."""
@@ -235,6 +452,10 @@ class InterBotCommunication(commands.Cog):
     @commands.is_owner()
     async def ping_other_bot(self, ctx):
         """Ping the other bot (owner only)."""
+        rtt = await self.measure_rtt()
+        if rtt is not None:
+            await ctx.send(f"✅ Pong over local socket in {rtt:.2f} ms")
+            return
         success = await self.send_to_other_bot("ping", {"message": "Ping from " + self.bot_name})
         if success:
             await ctx.send("✅ Ping sent to other bot")
@@ -277,9 +498,29 @@ class InterBotCommunication(commands.Cog):
             inline=True
         )
         
+        rtt = await self.measure_rtt()
         embed.add_field(
             name="Other Bot",
-            value=f"**Target ID:** {self.other_bot_id or 'Not Set'}\n**Connected:** {'✅' if self.other_bot_id else '❌'}",
+            value=f"**Target ID:** {self.other_bot_id or 'Not Set'}\n**DM Fallback:** {'✅' if self.other_bot_id else '❌'}",
+            inline=True
+        )
+
+        recent = list(self.rtts)
+        latency = f"**Now:** {rtt:.2f} ms" if rtt is not None else "**Now:** no reply"
+        if recent:
+            latency += f"\n**Avg:** {sum(recent) / len(recent):.2f} ms over {len(recent)}\n**Max:** {max(recent):.2f} ms"
+        embed.add_field(
+            name="Local Socket",
+            value=f"**Path:** `{self.SOCKET_PATH}`\n**Connected:** {'✅' if self.local_connected else '❌'}\n{latency}",
+            inline=False
+        )
+
+        stats = self.transport_stats
+        embed.add_field(
+            name="Traffic",
+            value=(f"**Local:** {stats['local_sent']} sent / {stats['local_received']} received\n"
+                   f"**Config batches:** {stats['batches']}\n**DM fallback sends:** {stats['dm_sent']}\n"
+                   f"**Reconnects:** {stats['reconnects']}"),
             inline=True
         )
         
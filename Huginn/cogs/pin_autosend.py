@@ -7,9 +7,6 @@ import sqlite3
 from discord.ext import commands, tasks # type: ignore
 from discord import app_commands # type: ignore
 from discord.utils import get # type: ignore
-from PIL import Image # type: ignore
-import requests # type: ignore
-from io import BytesIO
 import pytz
 import datetime
 
@@ -147,11 +144,8 @@ class AutoPins(commands.Cog):
         avatar_url = str(message.author.display_avatar.url)
         
         try:
-            response = requests.get(avatar_url)
-            avatar_image = Image.open(BytesIO(response.content)).convert("RGB")
-            pixels = list(avatar_image.getdata())
-            avg_color = tuple(sum(c) // len(c) for c in zip(*pixels))
-            embed_color = discord.Color.from_rgb(*avg_color)
+            entry = await self.bot.get_cog("Fetcher").get_avatar(message.author)
+            embed_color = discord.Color.from_rgb(*entry[1]) if entry else discord.Color.blue()
         except Exception:
             embed_color = discord.Color.blue()
 
@@ -5,6 +5,9 @@ from discord.ui import View, Button
 import asyncio
 import sqlite3
 import datetime
+import pathlib
+import yaml
+from .utils import atomic_write
 
 class ContributionApprovalView(View):
     def __init__(self, contribution_id, bot_owner_id):
@@ -18,44 +21,17 @@ class ContributionApprovalView(View):
             await interaction.response.send_message("Only the bot owner can approve.", ephemeral=True)
             return
         
-        # Mark approved in DB and apply the contribution to its destination
-        submitter_id = None
-        guild_id = None
-        content = None
-        contribution_type = None
-        now_iso = datetime.datetime.utcnow().isoformat()
-
-        with sqlite3.connect("discord.db") as conn:
-            c = conn.cursor()
-            c.execute("SELECT submitter_id, guild_id, content, contribution_type FROM contributions WHERE id = ?", (self.contribution_id,))
-            row = c.fetchone()
-            if row:
-                submitter_id, guild_id, content, contribution_type = row
-
-            c.execute("UPDATE contributions SET approved = 1, approved_at = ? WHERE id = ?", (now_iso, self.contribution_id))
-            conn.commit()
-
-        # Try to apply the contribution to the appropriate storage by delegating to the Contribution cog
+        # Approve, star the submitter and apply the contribution to its destination
         cog = interaction.client.get_cog('Contribution')
-        if cog:
-            applied_ok, note = await cog._apply_contribution(content, contribution_type, guild_id)
-        else:
-            applied_ok, note = False, "Contribution cog not loaded; manual action required."
-
-        # Award a star to the submitter
-        if submitter_id and guild_id:
-            with sqlite3.connect("discord.db") as conn:
-                c = conn.cursor()
-                c.execute('SELECT stars FROM stars WHERE guild_id = ? AND user_id = ?', (guild_id, submitter_id))
-                result = c.fetchone()
-                if result:
-                    new_stars = result[0] + 1
-                    c.execute('UPDATE stars SET stars = ? WHERE guild_id = ? AND user_id = ?', 
-                             (new_stars, guild_id, submitter_id))
-                else:
-                    c.execute('INSERT INTO stars (guild_id, user_id, stars) VALUES (?, ?, ?)', 
-                             (guild_id, submitter_id, 1))
-                conn.commit()
+        if cog is None:
+            await interaction.response.send_message("Contribution cog not loaded; manual action required.", ephemeral=True)
+            return
+
+        row, applied_ok, note = await cog.approve_and_apply(self.contribution_id)
+        if row is None:
+            await interaction.response.send_message("This contribution was already handled.", ephemeral=True)
+            await interaction.message.edit(view=None)
+            return
 
         await interaction.response.send_message(f"Contribution approved! Applied: {applied_ok}. {note}", ephemeral=True)
         await interaction.message.edit(view=None)
@@ -75,11 +51,155 @@ class ContributionApprovalView(View):
         await interaction.response.send_message("Contribution rejected.", ephemeral=True)
         await interaction.message.edit(view=None)
 
+DATA_DIR = pathlib.Path(__file__).resolve().parent.parent
+RESPONSES_FILE = DATA_DIR / 'responses.yaml'
+CONTRIBUTIONS_FILE = DATA_DIR / 'contributions.json'
+
+AT_RESPONSE_TYPES = ("Muninn @ Response", "Huginn @ Response", "Mention Response")
+POOL_TYPES = ("Random Insults", "Random Prompts", "GIF Ban Response")  # Exported to contributions.json
+
 class Contribution(commands.Cog):
+    """Contribution submissions and approvals.
+
+    The contributions table is the source of truth for approved content.
+    Approvals update the in-memory pools right away (AtResponse, the bot's
+    message reward table) and the YAML/JSON files are exported from them by
+    a debounced writer, once per burst of approvals.
+    """
+
+    EXPORT_DELAY = 5.0  # seconds to gather approvals into one file write
+
     def __init__(self, bot):
         self.bot = bot
         self.db_file = "discord.db"
         self.create_tables()
+        self._dirty_exports = set()
+        self._export_task = None
+
+    async def cog_load(self):
+        asyncio.create_task(self._reconcile())
+
+    def cog_unload(self):
+        if self._export_task and not self._export_task.done():
+            self._export_task.cancel()
+            self._write_exports()
+
+    def approve(self, contribution_id):
+        """Mark a pending contribution approved and star its submitter in one transaction.
+
+        Returns (submitter_id, guild_id, content, contribution_type), or None if
+        the contribution doesn't exist or was already handled.
+        """
+        conn = sqlite3.connect(self.db_file, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """UPDATE contributions SET approved = 1, approved_at = ? WHERE id = ? AND approved = 0
+                   RETURNING submitter_id, guild_id, content, contribution_type""",
+                (datetime.datetime.utcnow().isoformat(), contribution_id)
+            ).fetchone()
+            if row and row[0] is not None:
+                conn.execute(
+                    """INSERT INTO stars (guild_id, user_id, stars) VALUES (?, ?, 1)
+                       ON CONFLICT(guild_id, user_id) DO UPDATE SET stars = stars + 1""",
+                    (row[1], row[0])
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return row
+
+    async def approve_and_apply(self, contribution_id):
+        """Approve a contribution and apply it. Returns (row, applied_ok, note); row is None if it wasn't pending."""
+        row = self.approve(contribution_id)
+        if row is None:
+            return None, False, "Not pending."
+        submitter_id, guild_id, content, contribution_type = row
+        self.bot.dispatch("contribution_approved", contribution_type, guild_id)
+        applied_ok, note = await self._apply_contribution(content, contribution_type, guild_id)
+        return row, applied_ok, note
+
+    ## ----- Exports -----
+
+    def add_message_reward(self, content):
+        """Add a reward at the next milestone (highest + 100). Returns the milestone, or None if it already exists."""
+        rewards = getattr(self.bot, 'message_rewards', None)
+        if rewards is None:
+            return None
+        if content in rewards.values():
+            return None
+        next_key = (max(rewards) if rewards else 100) + 100
+        rewards[next_key] = content
+        self._schedule_export('rewards')
+        return next_key
+
+    def _schedule_export(self, target):
+        self._dirty_exports.add(target)
+        if self._export_task is None or self._export_task.done():
+            self._export_task = asyncio.create_task(self._export_later())
+
+    async def _export_later(self):
+        await asyncio.sleep(self.EXPORT_DELAY)
+        self._write_exports()
+
+    def _write_exports(self):
+        targets, self._dirty_exports = self._dirty_exports, set()
+        try:
+            if 'rewards' in targets:
+                self._export_rewards()
+            if 'pools' in targets:
+                self._export_pools()
+        except (OSError, yaml.YAMLError, json.JSONDecodeError) as e:
+            print(f"Contribution export failed: {e}")
+
+    def _export_rewards(self):
+        """Write the bot's reward table into responses.yaml, keeping its other sections."""
+        with open(RESPONSES_FILE, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        data['message_rewards'] = {str(count): reward for count, reward in sorted(self.bot.message_rewards.items())}
+        atomic_write(RESPONSES_FILE, yaml.dump(data, default_flow_style=False, allow_unicode=True))
+
+    def _export_pools(self):
+        """Append approved pool contributions missing from contributions.json."""
+        if CONTRIBUTIONS_FILE.exists():
+            with open(CONTRIBUTIONS_FILE, 'r', encoding='utf-8') as f:
+                cj = json.load(f)
+        else:
+            cj = {"submissions": []}
+        submissions = cj.setdefault('submissions', [])
+        present = {(entry.get('type'), entry.get('initial_response')) for entry in submissions}
+
+        with sqlite3.connect(self.db_file) as conn:
+            rows = conn.execute(
+                f"""SELECT contribution_type, content FROM contributions
+                    WHERE approved = 1 AND contribution_type IN ({', '.join('?' * len(POOL_TYPES))})
+                    ORDER BY approved_at, id""", POOL_TYPES).fetchall()
+        added = False
+        for contribution_type, content in rows:
+            if (contribution_type, content) not in present:
+                submissions.append({"user": "approved", "type": contribution_type, "initial_response": content})
+                present.add((contribution_type, content))
+                added = True
+        if added:
+            atomic_write(CONTRIBUTIONS_FILE, json.dumps(cj, indent=2, ensure_ascii=False))
+
+    async def _reconcile(self):
+        """Bring the pools and files in line with the approved rows after a restart."""
+        await self.bot.wait_until_ready()
+        with sqlite3.connect(self.db_file) as conn:
+            rows = conn.execute(
+                "SELECT contribution_type, content FROM contributions WHERE approved = 1 ORDER BY approved_at, id").fetchall()
+
+        at_response = self.bot.get_cog('AtResponse')
+        for contribution_type, content in rows:
+            if contribution_type in AT_RESPONSE_TYPES and at_response:
+                at_response.add_response(content)
+            elif contribution_type == "Message Rewards":
+                self.add_message_reward(content)
+        self._schedule_export('pools')
 
     def create_tables(self):
         conn = sqlite3.connect(self.db_file)
@@ -115,12 +235,9 @@ class Contribution(commands.Cog):
 
         Returns (success: bool, note: str)
         """
-        import pathlib, json, yaml
-
         try:
-            # Simple types handled by file updates
-            if contribution_type in ("Muninn @ Response", "Huginn @ Response", "Mention Response"):
-                # Use InterBotCommunication cog to add @ responses which handles file paths
+            if contribution_type in AT_RESPONSE_TYPES:
+                # InterBotCommunication adds them to each bot's AtResponse pool
                 ibc = self.bot.get_cog('InterBotCommunication')
                 if ibc:
                     # For Huginn @ Response, try to send to other bot and also add locally
@@ -139,37 +256,15 @@ class Contribution(commands.Cog):
                     return False, "Inter-bot cog not found; manual action required."
 
             if contribution_type == "Message Rewards":
-                # Update Muninn/responses.yaml -> message_rewards with next numeric key
-                resp_path = pathlib.Path(__file__).resolve().parent.parent / 'responses.yaml'
-                if not resp_path.exists():
-                    return False, f"responses.yaml not found at {resp_path}"
-                with open(resp_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-
-                msg_rewards = data.get('message_rewards', {})
-                # compute next key: max existing numeric key + 100
-                numeric_keys = [int(k) for k in msg_rewards.keys() if str(k).isdigit()]
-                next_key = (max(numeric_keys) if numeric_keys else 100) + 100
-                msg_rewards[str(next_key)] = content
-                data['message_rewards'] = msg_rewards
-                with open(resp_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
-                return True, f"Added message reward at {next_key}."
-
-            if contribution_type in ("Random Insults", "Random Prompts", "Message Rewards", "Mention Response", "GIF Ban Response"):
-                # Append to contributions.json to keep historical randomized pools
-                contrib_path = pathlib.Path(__file__).resolve().parent.parent / 'contributions.json'
-                if contrib_path.exists():
-                    with open(contrib_path, 'r', encoding='utf-8') as f:
-                        cj = json.load(f)
-                else:
-                    cj = {"submissions": []}
+                milestone = self.add_message_reward(content)
+                if milestone is None:
+                    return False, "Reward already exists or the reward table isn't loaded."
+                return True, f"Added message reward at {milestone}."
 
-                entry = {"user": "approved", "type": contribution_type if contribution_type else "Unknown", "initial_response": content}
-                cj.setdefault('submissions', []).append(entry)
-                with open(contrib_path, 'w', encoding='utf-8') as f:
-                    json.dump(cj, f, indent=2, ensure_ascii=False)
-                return True, "Appended to contributions.json"
+            if contribution_type in POOL_TYPES:
+                # Kept for the randomized pools; the file is rebuilt from approved rows
+                self._schedule_export('pools')
+                return True, "Queued for contributions.json"
 
             # Types that are too complex or RPG-related
             if contribution_type and any(x in contribution_type for x in ("Items", "Weapons", "Armor", "Jobs", "Commands", "Expeditions")):
@@ -391,44 +486,20 @@ class ContributionButton(Button):
             await ctx.send("This command is only available to the bot owner.")
             return
         
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Get contribution details
-        cursor.execute("SELECT submitter_id, guild_id, content, contribution_type FROM contributions WHERE id = ? AND approved = 0", 
-                      (contribution_id,))
-        contribution = cursor.fetchone()
-        
+        contribution, applied_ok, note = await self.approve_and_apply(contribution_id)
         if not contribution:
             await ctx.send(f"No pending contribution found with ID {contribution_id}.")
-            conn.close()
             return
         
         submitter_id, guild_id, content, contribution_type = contribution
         
-        # Approve the contribution
-        cursor.execute("UPDATE contributions SET approved = 1, approved_at = ? WHERE id = ?", 
-                      (datetime.datetime.utcnow().isoformat(), contribution_id))
-        
-        # Award star
-        cursor.execute('SELECT stars FROM stars WHERE guild_id = ? AND user_id = ?', (guild_id, submitter_id))
-        result = cursor.fetchone()
-        if result:
-            cursor.execute('UPDATE stars SET stars = stars + 1 WHERE guild_id = ? AND user_id = ?', 
-                          (guild_id, submitter_id))
-        else:
-            cursor.execute('INSERT INTO stars (guild_id, user_id, stars) VALUES (?, ?, ?)', 
-                          (guild_id, submitter_id, 1))
-        
-        conn.commit()
-        conn.close()
-        
         submitter = self.bot.get_user(submitter_id)
         embed = discord.Embed(
             title="Contribution Approved",
             color=discord.Color.green(),
             description=f"**ID:** {contribution_id}\n**Type:** {contribution_type}\n**Content:** {content[:500]}...\n**Submitter:** {submitter.mention if submitter else 'Unknown'}"
         )
+        embed.add_field(name="Applied", value=f"{applied_ok}. {note}", inline=False)
         await ctx.send(embed=embed)
 
     @commands.command()
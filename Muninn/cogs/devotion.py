@@ -1,8 +1,8 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ui import Modal, TextInput, View, Select
 import sqlite3
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 import pytz
 
 def get_time(hour, minute=0):
@@ -161,6 +161,8 @@ class DevotionSelectView(View):
         self.add_item(DevotionSelect())
 
 class DevotionAccountability(commands.Cog):
+    DAILY_COUNT_COLUMNS = {'yes': 'yes_count', 'no': 'no_count', 'not_yet': 'not_yet_count'}
+
     def __init__(self, bot):
         self.bot = bot
         self.db_path = "discord.db"
@@ -171,13 +173,44 @@ class DevotionAccountability(commands.Cog):
         self.default_minute = 0
         
         self._initialize_database()
-        
-        # Start a loop that checks every minute and determines if any server needs a devotion message
-        self.devotion_scheduler = tasks.loop(minutes=1)(self.devotion_scheduler_task)
-        self.devotion_scheduler.start()
 
-    def cog_unload(self):
-        self.devotion_scheduler.cancel()
+    def _sync_devotion_job(self, guild_id):
+        """Create, move or remove the guild's daily devotion job to match its server config."""
+        scheduler = self.bot.get_cog('Scheduler')
+        server_config_cog = self.bot.get_cog('ServerConfig')
+        if not scheduler or not server_config_cog:
+            return
+
+        configs = server_config_cog.get_many(
+            guild_id,
+            ['devotion_enabled', 'devotion_channel', 'devotion_hour', 'devotion_minute', 'timezone'],
+            {'devotion_enabled': True, 'devotion_hour': self.default_hour,
+             'devotion_minute': self.default_minute, 'timezone': 'US/Pacific'}
+        )
+        job_id = f"devotion:{guild_id}"
+        if configs['devotion_enabled'] and configs['devotion_channel']:
+            scheduler.schedule(
+                job_id, "devotion",
+                {"kind": "daily", "hour": configs['devotion_hour'], "minute": configs['devotion_minute']},
+                timezone=configs['timezone'], guild_id=guild_id
+            )
+        else:
+            scheduler.cancel(job_id)
+
+    @commands.Cog.listener()
+    async def on_scheduler_ready(self, scheduler):
+        for guild in self.bot.guilds:
+            self._sync_devotion_job(guild.id)
+
+    @commands.Cog.listener()
+    async def on_server_config_changed(self, guild_id, key):
+        if key.startswith('devotion_') or key == 'timezone':
+            self._sync_devotion_job(guild_id)
+
+    @commands.Cog.listener()
+    async def on_scheduled_job(self, job):
+        if job['handler'] == 'devotion':
+            await self.send_scheduled_devotion(job['guild_id'])
 
     def _get_server_devotion_time(self, guild_id):
         """Get the configured devotion time for a specific server."""
@@ -185,34 +218,11 @@ class DevotionAccountability(commands.Cog):
         if not server_config_cog:
             return self.default_hour, self.default_minute
         
-        hour = server_config_cog.get_config(guild_id, 'devotion_hour', self.default_hour)
-        minute = server_config_cog.get_config(guild_id, 'devotion_minute', self.default_minute)
-        return hour, minute
-
-    def _should_send_devotion_now(self, guild_id):
-        """Check if it's time to send devotion message for this guild."""
-        server_config_cog = self.bot.get_cog('ServerConfig')
-        if not server_config_cog:
-            return False
-        
-        # Check if devotion is enabled for this guild
-        enabled = server_config_cog.get_config(guild_id, 'devotion_enabled', True)
-        if not enabled:
-            return False
-        
-        # Check if there's a devotion channel configured
-        channel_id = server_config_cog.get_config(guild_id, 'devotion_channel')
-        if not channel_id:
-            return False
-        
-        # Get configured time
-        hour, minute = self._get_server_devotion_time(guild_id)
-        
-        # Get current Pacific time
-        now = datetime.now(self.california_tz)
-        
-        # Check if current time matches configured time (within the current minute)
-        return now.hour == hour and now.minute == minute
+        configs = server_config_cog.get_many(
+            guild_id, ['devotion_hour', 'devotion_minute'],
+            {'devotion_hour': self.default_hour, 'devotion_minute': self.default_minute}
+        )
+        return configs['devotion_hour'], configs['devotion_minute']
 
     def _initialize_database(self):
         """Initialize the database table for devotion tracking."""
@@ -245,6 +255,35 @@ class DevotionAccountability(commands.Cog):
                     UNIQUE(user_id, guild_id)
                 )
             """)
+
+            # Per-guild daily response totals, incremented alongside each response
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS devotion_daily_stats (
+                    guild_id INTEGER NOT NULL,
+                    day DATE NOT NULL,
+                    yes_count INTEGER DEFAULT 0,
+                    no_count INTEGER DEFAULT 0,
+                    not_yet_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, day)
+                )
+            """)
+
+            # Leaderboards and range stats read straight off these indexes
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_devotion_streaks_current ON devotion_streaks(guild_id, current_streak DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_devotion_streaks_longest ON devotion_streaks(guild_id, longest_streak DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_devotion_responses_guild_day ON devotion_responses(guild_id, date_responded, user_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_devotion_responses_user_day ON devotion_responses(user_id, guild_id, date_responded)")
+
+            # One-time backfill of the daily totals from existing history
+            cursor.execute("SELECT COUNT(*) FROM devotion_daily_stats")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("""
+                    INSERT INTO devotion_daily_stats (guild_id, day, yes_count, no_count, not_yet_count)
+                    SELECT guild_id, date_responded,
+                           SUM(response_type = 'yes'), SUM(response_type = 'no'), SUM(response_type = 'not_yet')
+                    FROM devotion_responses
+                    GROUP BY guild_id, date_responded
+                """)
             conn.commit()
 
     def _log_devotion_response(self, user_id, guild_id, response_type, when_text=None, what_text=None):
@@ -259,8 +298,16 @@ class DevotionAccountability(commands.Cog):
                 (user_id, guild_id, response_type, when_text, what_text, timestamp, date_responded)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (user_id, guild_id, response_type, when_text, what_text, timestamp, today))
+
+            count_column = self.DAILY_COUNT_COLUMNS.get(response_type)
+            if count_column:
+                cursor.execute(f"""
+                    INSERT INTO devotion_daily_stats (guild_id, day, {count_column}) VALUES (?, ?, 1)
+                    ON CONFLICT(guild_id, day) DO UPDATE SET {count_column} = {count_column} + 1
+                """, (guild_id, today))
             
             # Update streak if response is 'yes'
+            streak_info = None
             if response_type == 'yes':
                 streak_info = self._update_streak(cursor, user_id, guild_id, today)
                 # streak_info will be None if it's a same-day submission
@@ -268,9 +315,25 @@ class DevotionAccountability(commands.Cog):
             conn.commit()
             return streak_info  # Return streak info for use in responses
 
+    @staticmethod
+    def _advance_streak(state, today):
+        """Streak state machine: apply a 'yes' on ``today`` to ``(current, longest, last_date, start_date)``.
+
+        Returns the new state and whether it changed (a second 'yes' on the same day doesn't).
+        """
+        current_streak, longest_streak, last_date, start_date = state
+        if last_date == today:
+            return state, False
+        if last_date and (today - last_date).days == 1:
+            current_streak += 1
+        else:
+            # Streak broken or first devotion, start new streak
+            current_streak = 1
+            start_date = today
+        return (current_streak, max(longest_streak, current_streak), today, start_date), True
+
     def _update_streak(self, cursor, user_id, guild_id, today):
-        """Update the user's devotion streak."""
-        # Get current streak data
+        """Update the user's devotion streak in O(1) from its stored state."""
         cursor.execute("""
             SELECT current_streak, longest_streak, last_devotion_date, streak_start_date
             FROM devotion_streaks 
@@ -278,48 +341,41 @@ class DevotionAccountability(commands.Cog):
         """, (user_id, guild_id))
         
         row = cursor.fetchone()
-        
         if row:
             current_streak, longest_streak, last_devotion_date, streak_start_date = row
-            last_date = datetime.strptime(last_devotion_date, '%Y-%m-%d').date() if last_devotion_date else None
-            
-            # Check if this continues the streak (consecutive days)
-            if last_date and (today - last_date).days == 1:
-                # Continue streak
-                current_streak += 1
-            elif last_date == today:
-                # Same day, don't update streak (but return current info)
-                return current_streak, longest_streak, False
-            else:
-                # Streak broken or first devotion, start new streak
-                current_streak = 1
-                streak_start_date = today.strftime('%Y-%m-%d')
-            
-            # Update longest streak if current is longer
-            longest_streak = max(longest_streak, current_streak)
-            
-            cursor.execute("""
-                UPDATE devotion_streaks 
-                SET current_streak = ?, longest_streak = ?, last_devotion_date = ?, 
-                    streak_start_date = ?, last_updated = ?
-                WHERE user_id = ? AND guild_id = ?
-            """, (current_streak, longest_streak, today.strftime('%Y-%m-%d'), 
-                  streak_start_date, datetime.now(self.california_tz).strftime("%Y-%m-%d %H:%M:%S"),
-                  user_id, guild_id))
+            state = (
+                current_streak or 0,
+                longest_streak or 0,
+                datetime.strptime(last_devotion_date, '%Y-%m-%d').date() if last_devotion_date else None,
+                datetime.strptime(streak_start_date, '%Y-%m-%d').date() if streak_start_date else None,
+            )
         else:
-            # First devotion for this user
-            current_streak = 1
-            longest_streak = 1
-            cursor.execute("""
-                INSERT INTO devotion_streaks 
-                (user_id, guild_id, current_streak, longest_streak, last_devotion_date, 
-                 streak_start_date, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, guild_id, current_streak, longest_streak, today.strftime('%Y-%m-%d'),
-                  today.strftime('%Y-%m-%d'), datetime.now(self.california_tz).strftime("%Y-%m-%d %H:%M:%S")))
+            state = (0, 0, None, None)
+
+        (current_streak, longest_streak, last_date, start_date), changed = self._advance_streak(state, today)
+        if not changed:
+            # Same day, don't update streak (but return current info)
+            return current_streak, longest_streak, False
+
+        cursor.execute("""
+            INSERT INTO devotion_streaks 
+            (user_id, guild_id, current_streak, longest_streak, last_devotion_date, streak_start_date, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                current_streak = excluded.current_streak,
+                longest_streak = excluded.longest_streak,
+                last_devotion_date = excluded.last_devotion_date,
+                streak_start_date = excluded.streak_start_date,
+                last_updated = excluded.last_updated
+        """, (user_id, guild_id, current_streak, longest_streak, last_date.strftime('%Y-%m-%d'),
+              start_date.strftime('%Y-%m-%d'), datetime.now(self.california_tz).strftime("%Y-%m-%d %H:%M:%S")))
         
         return current_streak, longest_streak, True
 
+    def _active_streak_cutoff(self):
+        """Oldest last-devotion date (Pacific) that still counts as an active streak."""
+        return (datetime.now(self.california_tz).date() - timedelta(days=1)).strftime('%Y-%m-%d')
+
     def _get_user_streak(self, user_id, guild_id):
         """Get the current streak information for a user."""
         with sqlite3.connect(self.db_path) as conn:
@@ -366,29 +422,29 @@ class DevotionAccountability(commands.Cog):
         else:
             return f"🏆 LEGENDARY! {current_streak} days! Your dedication is absolutely incredible!"
 
-    async def devotion_scheduler_task(self):
-        """Check each guild and send devotion messages if it's time."""
+    async def send_scheduled_devotion(self, guild_id):
+        """Send the devotion message for a guild when its scheduled job fires."""
+        guild = self.bot.get_guild(guild_id)
+        server_config_cog = self.bot.get_cog('ServerConfig')
+        if not guild or not server_config_cog:
+            return
+
+        channel_id = server_config_cog.get_config(guild_id, 'devotion_channel')
+        if not channel_id:
+            return
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            print(f"Devotion channel {channel_id} not found in {guild.name}")
+            return
+
         try:
-            for guild in self.bot.guilds:
-                if self._should_send_devotion_now(guild.id):
-                    server_config_cog = self.bot.get_cog('ServerConfig')
-                    if server_config_cog:
-                        channel_id = server_config_cog.get_config(guild.id, 'devotion_channel')
-                        if channel_id:
-                            channel = self.bot.get_channel(channel_id)
-                            if channel:
-                                try:
-                                    # Check if we already sent today to avoid duplicates
-                                    if not self._has_sent_today(guild.id):
-                                        await self.send_devotion_message(channel)
-                                        self._mark_sent_today(guild.id)
-                                        print(f"Sent devotion message to {guild.name} - #{channel.name}")
-                                except Exception as e:
-                                    print(f"Error sending devotion message to {guild.name}: {e}")
-                            else:
-                                print(f"Devotion channel {channel_id} not found in {guild.name}")
+            # Check if we already sent today to avoid duplicates
+            if not self._has_sent_today(guild_id):
+                await self.send_devotion_message(channel)
+                self._mark_sent_today(guild_id)
+                print(f"Sent devotion message to {guild.name} - #{channel.name}")
         except Exception as e:
-            print(f"Error in devotion scheduler: {e}")
+            print(f"Error sending devotion message to {guild.name}: {e}")
 
     def _has_sent_today(self, guild_id):
         """Check if we've already sent a devotion message today for this guild."""
@@ -491,30 +547,33 @@ class DevotionAccountability(commands.Cog):
         if days > 30:
             days = 30  # Limit to 30 days max
         
+        start_day = datetime.now(self.california_tz).date() - timedelta(days=days)
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
-            # Get stats for the last X days
+            # Sum the daily totals for the last X days
             cursor.execute("""
-                SELECT response_type, COUNT(*) as count
-                FROM devotion_responses 
-                WHERE guild_id = ? AND date_responded >= date('now', '-{} days')
-                GROUP BY response_type
-                ORDER BY count DESC
-            """.format(days), (ctx.guild.id,))
+                SELECT SUM(yes_count), SUM(no_count), SUM(not_yet_count)
+                FROM devotion_daily_stats 
+                WHERE guild_id = ? AND day >= ?
+            """, (ctx.guild.id, start_day))
             
-            stats = cursor.fetchall()
+            totals = cursor.fetchone()
+            stats = sorted(
+                ((response_type, count) for response_type, count in zip(('yes', 'no', 'not_yet'), totals) if count),
+                key=lambda stat: stat[1], reverse=True
+            )
             
             if not stats:
                 await ctx.send(f"No devotion responses recorded in the last {days} days.")
                 return
             
-            # Get total unique users who responded
+            # Get total unique users who responded (range scan on the guild/day index)
             cursor.execute("""
                 SELECT COUNT(DISTINCT user_id) as unique_users
                 FROM devotion_responses 
-                WHERE guild_id = ? AND date_responded >= date('now', '-{} days')
-            """.format(days), (ctx.guild.id,))
+                WHERE guild_id = ? AND date_responded >= ?
+            """, (ctx.guild.id, start_day))
             
             unique_users = cursor.fetchone()[0]
             
@@ -532,8 +591,8 @@ class DevotionAccountability(commands.Cog):
                 SELECT COUNT(*) as active_streaks, MAX(current_streak) as longest_current
                 FROM devotion_streaks 
                 WHERE guild_id = ? AND current_streak > 0 
-                AND date(last_devotion_date) >= date('now', '-1 day')
-            """, (ctx.guild.id,))
+                AND last_devotion_date >= ?
+            """, (ctx.guild.id, self._active_streak_cutoff()))
             
             streak_info = cursor.fetchone()
             if streak_info:
@@ -566,9 +625,9 @@ class DevotionAccountability(commands.Cog):
             cursor.execute("""
                 SELECT response_type, when_text, what_text, date_responded
                 FROM devotion_responses 
-                WHERE user_id = ? AND guild_id = ? AND date_responded >= date('now', '-{} days')
+                WHERE user_id = ? AND guild_id = ? AND date_responded >= ?
                 ORDER BY date_responded DESC
-            """.format(days), (ctx.author.id, ctx.guild.id))
+            """, (ctx.author.id, ctx.guild.id, datetime.now(self.california_tz).date() - timedelta(days=days)))
             
             history = cursor.fetchall()
             
@@ -997,10 +1056,10 @@ class DevotionAccountability(commands.Cog):
                     SELECT user_id, current_streak, last_devotion_date, streak_start_date
                     FROM devotion_streaks 
                     WHERE guild_id = ? AND current_streak > 0 
-                    AND date(last_devotion_date) >= date('now', '-1 day')
+                    AND last_devotion_date >= ?
                     ORDER BY current_streak DESC, last_devotion_date ASC
                     LIMIT 10
-                """, (ctx.guild.id,))
+                """, (ctx.guild.id, self._active_streak_cutoff()))
                 title = "🔥 Current Streak Leaderboard"
                 description = "Active devotion streaks (must have had devotion within last day)"
             else:
@@ -1064,15 +1123,15 @@ class DevotionAccountability(commands.Cog):
             cursor.execute("""
                 SELECT 
                     COUNT(*) as total_users,
-                    COUNT(CASE WHEN current_streak > 0 AND date(last_devotion_date) >= date('now', '-1 day') THEN 1 END) as active_streaks,
-                    MAX(current_streak) as longest_current,
+                    COUNT(CASE WHEN current_streak > 0 AND last_devotion_date >= :cutoff THEN 1 END) as active_streaks,
+                    MAX(CASE WHEN last_devotion_date >= :cutoff THEN current_streak END) as longest_current,
                     MAX(longest_streak) as longest_ever,
-                    AVG(CASE WHEN current_streak > 0 AND date(last_devotion_date) >= date('now', '-1 day') THEN current_streak END) as avg_active,
-                    COUNT(CASE WHEN current_streak >= 7 AND date(last_devotion_date) >= date('now', '-1 day') THEN 1 END) as week_plus,
-                    COUNT(CASE WHEN current_streak >= 30 AND date(last_devotion_date) >= date('now', '-1 day') THEN 1 END) as month_plus
+                    AVG(CASE WHEN current_streak > 0 AND last_devotion_date >= :cutoff THEN current_streak END) as avg_active,
+                    COUNT(CASE WHEN current_streak >= 7 AND last_devotion_date >= :cutoff THEN 1 END) as week_plus,
+                    COUNT(CASE WHEN current_streak >= 30 AND last_devotion_date >= :cutoff THEN 1 END) as month_plus
                 FROM devotion_streaks 
-                WHERE guild_id = ?
-            """, (ctx.guild.id,))
+                WHERE guild_id = :guild_id
+            """, {'guild_id': ctx.guild.id, 'cutoff': self._active_streak_cutoff()})
             
             stats = cursor.fetchone()
             
@@ -1,9 +1,11 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ui import View, Button
 import sqlite3
 import datetime
 import random
+import time
+from dataclasses import dataclass, field
 
 class EmojiApprovalView(View):
     def __init__(self, submission_id, bot_owner_id):
@@ -41,6 +43,10 @@ class EmojiApprovalView(View):
                 
                 conn.commit()
 
+        contest_cog = interaction.client.get_cog('EmojiContest')
+        if contest_cog:
+            contest_cog.invalidate_emojis()
+
         await interaction.response.send_message("Emoji submission approved! Submitter awarded a star.", ephemeral=True)
         await interaction.message.edit(view=None)
 
@@ -59,7 +65,22 @@ class EmojiApprovalView(View):
         await interaction.response.send_message("Emoji submission rejected.", ephemeral=True)
         await interaction.message.edit(view=None)
 
+VOTE_EMOJIS = {"1️⃣": 1, "2️⃣": 2}
+
+@dataclass
+class Contest:
+    """An open emoji vote and its live tally."""
+    id: int
+    channel_id: int
+    message_id: int
+    options: list  # [(emoji id, url), (emoji id, url)]
+    ends_at: float
+    votes: dict = field(default_factory=dict)  # user id -> choice
+    tally: list = field(default_factory=lambda: [0, 0])
+
 class EmojiContest(commands.Cog):
+    VOTE_DURATION = 24 * 60 * 60
+
     def __init__(self, bot):
         self.bot = bot
         self.conn = sqlite3.connect("discord.db")
@@ -84,10 +105,25 @@ class EmojiContest(commands.Cog):
         )
         """)
         self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS votes (
-            user_id INTEGER PRIMARY KEY,
+        CREATE TABLE IF NOT EXISTS emoji_contests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER,
+            option1_id INTEGER NOT NULL,
+            option2_id INTEGER NOT NULL,
+            started_at REAL NOT NULL,
+            ends_at REAL NOT NULL,
+            closed INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_emoji_contests_open ON emoji_contests (closed, channel_id)")
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS emoji_contest_votes (
+            contest_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
             choice INTEGER NOT NULL,
-            voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (contest_id, user_id)
         )
         """)
         # Create stars table if it doesn't exist
@@ -99,12 +135,98 @@ class EmojiContest(commands.Cog):
             PRIMARY KEY (guild_id, user_id)
         )''')
         self.conn.commit()
-        self.emoji_vote_task.start()
+
+        self._emoji_ids = None  # Approved emoji ids, for picking vote pairs
+        self.contests = {}  # contest id -> Contest
+        self.contest_by_channel = {}
+        self.contest_by_message = {}
+        self._load_contests()
 
     def cog_unload(self):
-        self.emoji_vote_task.cancel()
         self.conn.close()
 
+    def _load_contests(self):
+        """Rebuild open contests and their tallies after a restart."""
+        self.cursor.execute('''SELECT c.id, c.channel_id, c.message_id, c.ends_at, c.option1_id, e1.url, c.option2_id, e2.url
+                               FROM emoji_contests c
+                               JOIN emojis e1 ON e1.id = c.option1_id
+                               JOIN emojis e2 ON e2.id = c.option2_id
+                               WHERE c.closed = 0''')
+        for contest_id, channel_id, message_id, ends_at, id1, url1, id2, url2 in self.cursor.fetchall():
+            self._track(Contest(contest_id, channel_id, message_id, [(id1, url1), (id2, url2)], ends_at))
+
+        self.cursor.execute('''SELECT v.contest_id, v.user_id, v.choice FROM emoji_contest_votes v
+                               JOIN emoji_contests c ON c.id = v.contest_id WHERE c.closed = 0''')
+        for contest_id, user_id, choice in self.cursor.fetchall():
+            contest = self.contests.get(contest_id)
+            if contest:
+                contest.votes[user_id] = choice
+                contest.tally[choice - 1] += 1
+
+    def _track(self, contest):
+        self.contests[contest.id] = contest
+        self.contest_by_channel[contest.channel_id] = contest
+        if contest.message_id:
+            self.contest_by_message[contest.message_id] = contest
+
+    def _untrack(self, contest):
+        self.contests.pop(contest.id, None)
+        if self.contest_by_channel.get(contest.channel_id) is contest:
+            del self.contest_by_channel[contest.channel_id]
+        self.contest_by_message.pop(contest.message_id, None)
+
+    @property
+    def emoji_ids(self):
+        if self._emoji_ids is None:
+            self.cursor.execute("SELECT id FROM emojis")
+            self._emoji_ids = [row[0] for row in self.cursor.fetchall()]
+        return self._emoji_ids
+
+    def invalidate_emojis(self):
+        self._emoji_ids = None
+
+    def record_vote(self, contest, user_id, choice):
+        """Set a user's vote, keeping the table and the live tally in step."""
+        previous = contest.votes.get(user_id)
+        if previous == choice:
+            return
+        self.cursor.execute('''INSERT INTO emoji_contest_votes (contest_id, user_id, choice) VALUES (?, ?, ?)
+                               ON CONFLICT(contest_id, user_id) DO UPDATE SET choice = excluded.choice, voted_at = CURRENT_TIMESTAMP''',
+                            (contest.id, user_id, choice))
+        self.conn.commit()
+        if previous:
+            contest.tally[previous - 1] -= 1
+        contest.votes[user_id] = choice
+        contest.tally[choice - 1] += 1
+
+    def withdraw_vote(self, contest, user_id, choice):
+        """Drop a user's vote if it is still ``choice``."""
+        if contest.votes.get(user_id) != choice:
+            return
+        self.cursor.execute("DELETE FROM emoji_contest_votes WHERE contest_id = ? AND user_id = ?", (contest.id, user_id))
+        self.conn.commit()
+        del contest.votes[user_id]
+        contest.tally[choice - 1] -= 1
+
+    def _reaction_vote(self, payload):
+        contest = self.contest_by_message.get(payload.message_id)
+        choice = VOTE_EMOJIS.get(str(payload.emoji))
+        if contest is None or choice is None or payload.user_id == self.bot.user.id:
+            return None, None
+        return contest, choice
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        contest, choice = self._reaction_vote(payload)
+        if contest:
+            self.record_vote(contest, payload.user_id, choice)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        contest, choice = self._reaction_vote(payload)
+        if contest:
+            self.withdraw_vote(contest, payload.user_id, choice)
+
     @commands.command()
     async def upload(self, ctx):
         if not ctx.message.attachments:
@@ -157,81 +279,111 @@ class EmojiContest(commands.Cog):
         if choice not in [1, 2]:
             await ctx.send("Invalid choice! Use `!vote 1` or `!vote 2`.")
             return
-        
-        self.cursor.execute("REPLACE INTO votes (user_id, choice) VALUES (?, ?)", (ctx.author.id, choice))
-        self.conn.commit()
+
+        contest = self.contest_by_channel.get(ctx.channel.id)
+        if contest is None:
+            await ctx.send("There is no emoji vote running in this channel.")
+            return
+
+        self.record_vote(contest, ctx.author.id, choice)
         await ctx.send(f"Vote registered for option {choice}!")
 
     @commands.command()
     @commands.is_owner()
     async def start_vote(self, ctx):
         """Manually starts an emoji vote."""
-        channel = ctx.channel  # Use the current channel for voting
-        self.cursor.execute("SELECT id, url FROM emojis ORDER BY RANDOM() LIMIT 2")
-        images = self.cursor.fetchall()
-        
-        if len(images) < 2:
+        await self._open_vote(ctx.channel)  # Use the current channel for voting
+
+    @commands.Cog.listener()
+    async def on_scheduler_ready(self, scheduler):
+        # Weekly vote every Monday
+        scheduler.schedule("emoji_vote:weekly", "emoji_vote_start", {"kind": "weekly", "weekday": 0, "hour": 9, "minute": 0},
+                           timezone="US/Pacific", payload={"channel_id": 1298762960184934432})  # Replace with your channel ID
+        # Make sure every open contest still has its deadline job
+        for contest in list(self.contests.values()):
+            self._schedule_end(scheduler, contest)
+
+    def _schedule_end(self, scheduler, contest):
+        job_id = f"emoji_vote:end:{contest.id}"
+        if scheduler.get_job(job_id) is None:
+            scheduler.schedule(job_id, "emoji_vote_end", {"kind": "once"},
+                               payload={"contest_id": contest.id}, run_at=max(contest.ends_at, time.time()))
+
+    @commands.Cog.listener()
+    async def on_scheduled_job(self, job):
+        if job['handler'] == 'emoji_vote_start':
+            channel = self.bot.get_channel(job['payload']['channel_id'])
+            if channel:
+                await self._open_vote(channel)
+        elif job['handler'] == 'emoji_vote_end':
+            contest = self.contests.get(job['payload'].get('contest_id'))
+            if contest:  # Jobs from before contests were tracked carry no contest id
+                await self.announce_winner(contest)
+
+    async def _open_vote(self, channel):
+        """Post a new vote and schedule its result announcement 24 hours later."""
+        if len(self.emoji_ids) < 2:
             return
-        
+
+        # A channel runs one vote at a time; finish the previous one first
+        previous = self.contest_by_channel.get(channel.id)
+        if previous:
+            await self.announce_winner(previous)
+
+        option_ids = random.sample(self.emoji_ids, 2)
+        self.cursor.execute("SELECT id, url FROM emojis WHERE id IN (?, ?)", option_ids)
+        urls = dict(self.cursor.fetchall())
+        if len(urls) < 2:
+            self.invalidate_emojis()  # An emoji was removed behind our back
+            return
+        options = [(emoji_id, urls[emoji_id]) for emoji_id in option_ids]
+
         embed = discord.Embed(title="Emoji Vote!", description="Vote using `!vote 1` or `!vote 2`.", color=discord.Color.blue())
         embed.add_field(name="Option 1", value="React with 1️⃣", inline=True)
         embed.add_field(name="Option 2", value="React with 2️⃣", inline=True)
-        embed.set_image(url=images[0][1])
+        embed.set_image(url=options[0][1])
         embed.set_footer(text="Voting lasts 24 hours!")
-        await channel.send(embed=embed)
-        
-        # Store current vote session
-        self.current_vote = images
-        self.conn.execute("DELETE FROM votes")  # Clear old votes
+        message = await channel.send(embed=embed)
+
+        now = time.time()
+        self.cursor.execute('''INSERT INTO emoji_contests (channel_id, message_id, option1_id, option2_id, started_at, ends_at)
+                               VALUES (?, ?, ?, ?, ?, ?)''',
+                            (channel.id, message.id, option_ids[0], option_ids[1], now, now + self.VOTE_DURATION))
         self.conn.commit()
-        
-        # Wait 24 hours, then announce the result
-        await discord.utils.sleep_until(datetime.datetime.utcnow() + datetime.timedelta(days=1))
-        self.announce_winner(channel)
-
-    @tasks.loop(hours=168)  # Runs every week
-    async def emoji_vote_task(self):
-        now = datetime.datetime.utcnow()
-        if now.weekday() != 0:  # Only run on Monday
+        contest = Contest(self.cursor.lastrowid, channel.id, message.id, options, now + self.VOTE_DURATION)
+        self._track(contest)
+
+        for emoji in VOTE_EMOJIS:
+            await message.add_reaction(emoji)
+
+        # Announce the result in 24 hours; the deadline survives restarts
+        scheduler = self.bot.get_cog('Scheduler')
+        if scheduler:
+            self._schedule_end(scheduler, contest)
+
+    async def announce_winner(self, contest):
+        self.cursor.execute("UPDATE emoji_contests SET closed = 1 WHERE id = ?", (contest.id,))
+        self.conn.commit()
+        self._untrack(contest)
+
+        channel = self.bot.get_channel(contest.channel_id)
+        if channel is None:
             return
-        
-        channel = self.bot.get_channel(1298762960184934432)  # Replace with your channel ID
-        self.cursor.execute("SELECT id, url FROM emojis ORDER BY RANDOM() LIMIT 2")
-        images = self.cursor.fetchall()
-        
-        if len(images) < 2:
+
+        if not contest.votes:
+            await channel.send("No votes were cast!")
             return
-        
-        embed = discord.Embed(title="Emoji Vote!", description="Vote using `!vote 1` or `!vote 2`.", color=discord.Color.blue())
-        embed.add_field(name="Option 1", value="React with 1️⃣", inline=True)
-        embed.add_field(name="Option 2", value="React with 2️⃣", inline=True)
-        embed.set_image(url=images[0][1])
-        embed.set_footer(text="Voting lasts 24 hours!")
-        await channel.send(embed=embed)
-        
-        # Store current vote session
-        self.current_vote = images
-        self.conn.execute("DELETE FROM votes")  # Clear old votes
-        self.conn.commit()
-        
-        # Wait 24 hours, then announce the result
-        await discord.utils.sleep_until(now + datetime.timedelta(days=1))
-        self.announce_winner(channel)
 
-    def announce_winner(self, channel):
-        self.cursor.execute("SELECT choice, COUNT(*) FROM votes GROUP BY choice")
-        results = self.cursor.fetchall()
-        
-        if not results:
-            channel.send("No votes were cast!")
+        first, second = contest.tally
+        if first == second:
+            await channel.send(f"It's a tie, {first} vote(s) each!")
             return
-        
-        winner = max(results, key=lambda x: x[1])[0]
-        winning_image = self.current_vote[winner - 1][1]
-        
-        embed = discord.Embed(title="Voting Results", description=f"Option {winner} wins!", color=discord.Color.green())
-        embed.set_image(url=winning_image)
-        channel.send(embed=embed)
+
+        winner = 1 if first > second else 2
+        embed = discord.Embed(title="Voting Results", description=f"Option {winner} wins, {max(first, second)} to {min(first, second)}!",
+                              color=discord.Color.green())
+        embed.set_image(url=contest.options[winner - 1][1])
+        await channel.send(embed=embed)
 
     @commands.command()
     @commands.is_owner()
@@ -314,6 +466,7 @@ class EmojiContest(commands.Cog):
         
         # Move to approved emojis and award star
         self.cursor.execute("INSERT INTO emojis (url, uploader_id) VALUES (?, ?)", (url, uploader_id))
+        self.invalidate_emojis()
         self.cursor.execute("UPDATE emoji_submissions SET approved = 1, approved_at = ? WHERE id = ?", 
                           (datetime.datetime.utcnow().isoformat(), submission_id))
         
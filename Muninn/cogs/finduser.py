@@ -1,10 +1,174 @@
 import discord
 from discord.ext import commands
-from fuzzywuzzy import process
+from fuzzywuzzy import fuzz, process
+from bisect import bisect_left
+from collections import defaultdict
+import re
+import unicodedata
+
+MENTION_PATTERN = re.compile(r"^<@!?(\d+)>$")
+
+def normalize_name(name: str) -> str:
+    """Casefold and collapse whitespace so lookups ignore styling differences."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class MemberNameIndex:
+    """Name index for one guild: exact, prefix and trigram lookups over
+    display names, nicknames, global names and usernames."""
+
+    def __init__(self):
+        self.names_by_member = {}  # member id -> set of normalized names
+        self.members_by_name = defaultdict(set)  # normalized name -> member ids
+        self.members_by_trigram = defaultdict(set)  # trigram -> member ids
+        self.sorted_names = []  # for prefix search
+        self._sorted_dirty = False
+
+    @staticmethod
+    def names_for(member: discord.Member) -> set:
+        names = {member.display_name, member.name, getattr(member, "global_name", None), member.nick}
+        return {normalize_name(n) for n in names if n}
+
+    def add(self, member: discord.Member):
+        self.remove(member.id)
+        names = self.names_for(member)
+        self.names_by_member[member.id] = names
+        for name in names:
+            self.members_by_name[name].add(member.id)
+            for gram in trigrams(name):
+                self.members_by_trigram[gram].add(member.id)
+        self._sorted_dirty = True
+
+    def remove(self, member_id: int):
+        names = self.names_by_member.pop(member_id, None)
+        if not names:
+            return
+        for name in names:
+            self.members_by_name[name].discard(member_id)
+            if not self.members_by_name[name]:
+                del self.members_by_name[name]
+            for gram in trigrams(name):
+                self.members_by_trigram[gram].discard(member_id)
+        self._sorted_dirty = True
+
+    def _prefix_matches(self, query: str) -> set:
+        if self._sorted_dirty:
+            self.sorted_names = sorted(self.members_by_name)
+            self._sorted_dirty = False
+        matches = set()
+        i = bisect_left(self.sorted_names, query)
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(query):
+            matches |= self.members_by_name[self.sorted_names[i]]
+            i += 1
+        return matches
+
+    def search(self, query: str, limit: int = 5, max_candidates: int = 50):
+        """Return up to ``limit`` ``(member_id, score)`` pairs, best first."""
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        # Exact and prefix matches beat any fuzzy score
+        exact = self.members_by_name.get(query)
+        if exact:
+            return [(member_id, 100) for member_id in list(exact)[:limit]]
+        prefix = self._prefix_matches(query)
+        if len(prefix) == 1:
+            return [(next(iter(prefix)), 99)]
+
+        # Prune to members sharing the most trigrams with the query before fuzzy scoring
+        overlap = defaultdict(int)
+        for gram in trigrams(query):
+            for member_id in self.members_by_trigram.get(gram, ()):
+                overlap[member_id] += 1
+        candidates = set(sorted(overlap, key=overlap.get, reverse=True)[:max_candidates]) | prefix
+        if not candidates:
+            candidates = set(self.names_by_member)
+
+        scored = []
+        for member_id in candidates:
+            score = max(fuzz.WRatio(query, name) for name in self.names_by_member[member_id])
+            if member_id in prefix:
+                score = max(score, 95)
+            scored.append((member_id, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
 
 class Search(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.indexes = {}  # guild id -> MemberNameIndex
+
+    def _get_index(self, guild: discord.Guild) -> MemberNameIndex:
+        index = self.indexes.get(guild.id)
+        if index is None:
+            index = MemberNameIndex()
+            for member in guild.members:
+                index.add(member)
+            self.indexes[guild.id] = index
+        return index
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if member.guild.id in self.indexes:
+            self.indexes[member.guild.id].add(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        if member.guild.id in self.indexes:
+            self.indexes[member.guild.id].remove(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if after.guild.id in self.indexes and MemberNameIndex.names_for(before) != MemberNameIndex.names_for(after):
+            self.indexes[after.guild.id].add(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        # Username and global name changes arrive per user, not per guild
+        if before.name == after.name and getattr(before, "global_name", None) == getattr(after, "global_name", None):
+            return
+        for guild_id, index in self.indexes.items():
+            if after.id in index.names_by_member:
+                guild = self.bot.get_guild(guild_id)
+                member = guild.get_member(after.id) if guild else None
+                if member:
+                    index.add(member)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.indexes.pop(guild.id, None)
+
+    def _member_from_reference(self, search: str, guild: discord.Guild):
+        """Resolve mentions and raw IDs without touching the name index."""
+        search = search.strip()
+        mention = MENTION_PATTERN.match(search)
+        if mention:
+            return guild.get_member(int(mention.group(1)))
+        if search.isdigit() and len(search) >= 15:
+            return guild.get_member(int(search))
+        return None
+
+    async def find_users(self, search: str, guild: discord.Guild, limit: int = 5):
+        """
+        Returns up to ``limit`` ``(member, score)`` pairs ranked by how closely their names match.
+        """
+        if not guild or not search:
+            return []
+
+        member = self._member_from_reference(search, guild)
+        if member:
+            return [(member, 100)]
+
+        results = []
+        for member_id, score in self._get_index(guild).search(search, limit=limit):
+            member = guild.get_member(member_id)
+            if member:
+                results.append((member, score))
+        return results
 
     async def find_user(self, search: str, guild: discord.Guild):
         """
@@ -13,17 +177,14 @@ class Search(commands.Cog):
         if not guild:
             return None
 
-        members = guild.members
-        names = {member: member.display_name for member in members}
-
-        # Use fuzzy matching to find the closest match
-        best_match = process.extractOne(search, names.values())
+        results = await self.find_users(search, guild, limit=1)
+        if results:
+            return results[0][0]
 
-        if best_match:
-            closest_name = best_match[0]
-            user = next(user for user, name in names.items() if name == closest_name)
-            return user
-        return None
+        # Index miss (e.g. member cache not yet populated): fall back to a full fuzzy scan
+        names = {member: member.display_name for member in guild.members}
+        best_match = process.extractOne(search, names) if names else None
+        return best_match[2] if best_match else None
 
 async def setup(bot):
     await bot.add_cog(Search(bot))
@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import random
 from datetime import datetime, time
 from .tz import TimezoneConverter  # Import the TimezoneConverter cog
@@ -9,11 +9,6 @@ import sqlite3  # Import sqlite3 for database handling
 import matplotlib.pyplot as plt  # Import matplotlib for graph generation
 import os  # Import os for file handling
 
-def get_time(hour, minute=0):
-    """Helper function to generate localized time."""
-    now = datetime.now(pytz.timezone("US/Pacific"))
-    return now.replace(hour=hour, minute=minute, second=0, microsecond=0).timetz()
-
 class FoodCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -30,21 +25,28 @@ class FoodCog(commands.Cog):
         ]
 
 
-        # Define scheduled times using the helper function
-        self.scheduled_times = [
-            get_time(8),  # 8:00 AM
-            get_time(12),  # 12:00 PM
-            get_time(19),  # 7:00 PM
-        ]
-        self.food_scheduler = tasks.loop(time=self.scheduled_times)(self.food_scheduler_task)
-        self.food_scheduler.start()
+        # Meal times (Pacific), run by the Scheduler cog
+        self.meal_hours = {
+            "breakfast": 8,  # 8:00 AM
+            "lunch": 12,  # 12:00 PM
+            "dinner": 19,  # 7:00 PM
+        }
         self.db_path = "discord.db"
         self.california_tz = pytz.timezone('US/Pacific')  # Add California timezone
         self._initialize_database()
         self.reaction_timeout = 1800  # Timeout for reactions in seconds
 
-    def cog_unload(self):   
-        self.food_scheduler.cancel()
+    @commands.Cog.listener()
+    async def on_scheduler_ready(self, scheduler):
+        for meal, hour in self.meal_hours.items():
+            scheduler.schedule(f"food:{meal}", "food", {"kind": "daily", "hour": hour, "minute": 0},
+                               timezone="US/Pacific", payload={"meal": meal})
+
+    @commands.Cog.listener()
+    async def on_scheduled_job(self, job):
+        if job['handler'] == 'food':
+            await self.send_food_message(job['payload']['meal'])
+            print(f"Sent {job['payload']['meal']} message.")
 
     def _initialize_database(self):
         """Initialize the SQLite database and create the meals table if it doesn't exist."""
@@ -62,17 +64,6 @@ class FoodCog(commands.Cog):
             """)
             conn.commit()
 
-    async def food_scheduler_task(self):
-        """Task to send food messages at scheduled times."""
-        now = datetime.now(self.california_tz)  # Use California timezone
-        for meal, scheduled_time in zip(["breakfast", "lunch", "dinner"], self.scheduled_times):
-            # Check if the current time matches the scheduled time (ignoring seconds and microseconds)
-            if now.time().hour == scheduled_time.hour and now.time().minute == scheduled_time.minute:
-                await self.send_food_message(meal)
-                print(f"Sent {meal} message at {scheduled_time}.")
-            else:
-                print(f"Skipping {meal}. Current time: {now.time()}, Scheduled time: {scheduled_time}")
-
     async def send_food_message(self, meal):
         if self.target_channel_id is None:
             return  # No target channel set
@@ -1,7 +1,9 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+import random
+import sqlite3
 import time  # Used for tracking timestamps
-import asyncio
+from .utils import RateWindow
 
 
 class GifDetector(commands.Cog):
@@ -11,6 +13,9 @@ class GifDetector(commands.Cog):
     - A single automatic ban slot: the first user to exceed the limit will be auto-banned (3 hours by default).
     - One hardcoded allowed user (set ALLOWED_USER_ID) may send up to 3 GIFs per 6 hours.
     - Manual command `!gifban` to ban a user for a specified number of hours (default 3).
+
+    Bans are kept in the `gif_bans` table so they survive restarts, and one
+    sweeper loop clears expired ones.
     """
 
     # --- CONFIGURE THESE ---
@@ -22,101 +27,121 @@ class GifDetector(commands.Cog):
     DEFAULT_THRESHOLD = 3  # number of GIFs that triggers enforcement (>= this)
     AUTO_BAN_DURATION = 3 * 60 * 60  # 3 hours auto-ban duration
 
+    FALLBACK_RESPONSES = [
+        "Please don't post GIFs here.",
+        "GIFs are restricted right now — please use images instead.",
+        "Heads up: GIF posting is temporarily limited."
+    ]
+
     def __init__(self, bot):
         self.bot = bot
-        # user_id -> list of timestamps (seconds since epoch) when GIFs were sent
-        self.user_gif_data = {}  # {user_id: [ts1, ts2, ...]}
+        # Recent GIF timestamps per user; one above the threshold so going over it is visible
+        self.gif_rate = RateWindow(self.DEFAULT_WINDOW, self.DEFAULT_THRESHOLD + 1)
+        self.allowed_gif_rate = RateWindow(self.ALLOWED_USER_WINDOW, self.ALLOWED_USER_LIMIT + 1)
+
+        # guild_id -> approved "GIF Ban Response" contributions, refreshed on approval
+        self._ban_responses = {}
+
+        self.conn = sqlite3.connect('discord.db')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS gif_bans (
+            user_id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            expires_at REAL NOT NULL,
+            auto INTEGER NOT NULL DEFAULT 0
+        )''')
+        self.conn.commit()
 
         # currently auto-banned user id (only one at a time) and its unban time
         self.auto_banned_user = None  # user_id
         self.auto_ban_expires = 0
 
-        # track manual bans to allow scheduled unban bookkeeping
-        # maps user_id -> unban_timestamp
+        # user_id -> unban_timestamp for every active ban, auto bans included
         self.manual_bans = {}
-
-    def _is_gif_in_message(self, message: discord.Message) -> bool:
-        # Check attachments
-        for attachment in message.attachments:
-            if attachment.filename.lower().endswith('.gif'):
-                return True
-
-        # Check embeds (Tenor/Giphy and others)
-        for embed in message.embeds:
-            try:
-                if embed.type in ('gifv', 'gif'):
-                    return True
-                if embed.url and (embed.url.lower().endswith('.gif') or 'gif' in embed.url.lower()):
-                    return True
-            except Exception:
-                continue
-
-        # Optionally, check for direct urls in content
-        if 'tenor.com' in message.content.lower() or 'giphy.com' in message.content.lower():
-            return True
-
-        return False
-
-    def _cleanup_old_entries(self, user_id: int, now: float, window: int):
-        if user_id in self.user_gif_data:
-            self.user_gif_data[user_id] = [ts for ts in self.user_gif_data[user_id] if now - ts <= window]
-
-    async def _apply_ban(self, guild: discord.Guild, user: discord.User, duration_seconds: int, reason: str = "GIF ban"):
+        for user_id, expires_at, auto in self.conn.execute(
+                'SELECT user_id, expires_at, auto FROM gif_bans WHERE expires_at > ?', (time.time(),)):
+            self.manual_bans[user_id] = expires_at
+            if auto and expires_at > self.auto_ban_expires:
+                self.auto_banned_user, self.auto_ban_expires = user_id, expires_at
+
+    async def cog_load(self):
+        self.expire_bans.start()
+
+    async def cog_unload(self):
+        self.expire_bans.cancel()
+        self.conn.close()
+
+    @tasks.loop(minutes=5)
+    async def expire_bans(self):
+        """Single sweeper for every ban; enforcement also checks expiry itself, so this is only cleanup."""
+        now = time.time()
+        try:
+            expired = self.conn.execute('DELETE FROM gif_bans WHERE expires_at <= ? RETURNING user_id', (now,)).fetchall()
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"GIF ban sweep failed: {e}")
+            return
+        for (user_id,) in expired:
+            if self.manual_bans.get(user_id, 0) <= now:
+                self.manual_bans.pop(user_id, None)
+        if self.auto_banned_user is not None and now >= self.auto_ban_expires:
+            self.auto_banned_user = None
+            self.auto_ban_expires = 0
+
+    async def _apply_ban(self, guild: discord.Guild, user: discord.User, duration_seconds: int, reason: str = "GIF ban", auto: bool = False):
         # NOTE: per user's request, do NOT actually ban users. We keep the "ban" nomenclature
-        # but instead record the ban in-memory and send a randomized approved response.
+        # but instead record the ban and send a randomized approved response.
         # Return True to indicate enforcement applied.
         unban_ts = time.time() + duration_seconds
-        # record in manual_bans for bookkeeping
+        self.conn.execute(
+            '''INSERT INTO gif_bans (user_id, guild_id, expires_at, auto) VALUES (?, ?, ?, ?)
+               ON CONFLICT(user_id) DO UPDATE SET guild_id = excluded.guild_id, expires_at = excluded.expires_at, auto = excluded.auto''',
+            (user.id, guild.id if guild else None, unban_ts, int(auto))
+        )
+        self.conn.commit()
         self.manual_bans[user.id] = unban_ts
-        # Schedule removal
-        asyncio.create_task(self._clear_manual_ban_after(user.id, duration_seconds))
+        if auto:
+            self.auto_banned_user = user.id
+            self.auto_ban_expires = unban_ts
         return True
 
-    async def _schedule_unban(self, guild: discord.Guild, user_id: int, duration_seconds: int):
-        # Legacy unban scheduler kept for compatibility (no-op since we don't actually ban)
-        await asyncio.sleep(duration_seconds)
-        self.manual_bans.pop(user_id, None)
-
-    async def _clear_manual_ban_after(self, user_id: int, duration_seconds: int):
-        await asyncio.sleep(duration_seconds)
+    def _lift_ban(self, user_id: int):
+        self.conn.execute('DELETE FROM gif_bans WHERE user_id = ?', (user_id,))
+        self.conn.commit()
         self.manual_bans.pop(user_id, None)
+        if self.auto_banned_user == user_id:
+            self.auto_banned_user = None
+            self.auto_ban_expires = 0
 
     async def _get_random_gifban_response(self, guild: discord.Guild):
-        """Fetch a random approved 'GIF Ban Response' from the contributions DB for this guild.
+        """Pick a random approved 'GIF Ban Response' contribution for this guild.
 
-        Falls back to a default message if none are available.
+        The pool is read from the contributions table once per guild and
+        refreshed when a new response is approved. Falls back to a default
+        message if none are available.
         """
-        import sqlite3
-        try:
-            conn = sqlite3.connect('discord.db')
-            cursor = conn.cursor()
-            cursor.execute('''SELECT content FROM contributions WHERE contribution_type = ? AND approved = 1 AND guild_id = ?''',
-                           ("GIF Ban Response", guild.id))
-            rows = cursor.fetchall()
-            conn.close()
-            if rows:
-                import random as _random
-                return _random.choice([r[0] for r in rows])
-        except Exception:
-            pass
-
-        # default fallback responses
-        fallbacks = [
-            "Please don't post GIFs here.",
-            "GIFs are restricted right now — please use images instead.",
-            "Heads up: GIF posting is temporarily limited."
-        ]
-        import random as _random
-        return _random.choice(fallbacks)
+        pool = self._ban_responses.get(guild.id)
+        if pool is None:
+            try:
+                rows = self.conn.execute(
+                    '''SELECT content FROM contributions WHERE contribution_type = ? AND approved = 1 AND guild_id = ?''',
+                    ("GIF Ban Response", guild.id)
+                ).fetchall()
+            except sqlite3.Error:
+                rows = []
+            pool = self._ban_responses[guild.id] = [row[0] for row in rows]
+        return random.choice(pool or self.FALLBACK_RESPONSES)
 
     @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return  # Ignore bot messages
+    async def on_contribution_approved(self, contribution_type, guild_id):
+        if contribution_type == "GIF Ban Response":
+            self._ban_responses.pop(guild_id, None)
 
-        if not self._is_gif_in_message(message):
+    async def on_message_features(self, features):
+        """Called by MessagePipeline, which has already done the GIF detection."""
+        if features.is_bot or not features.has_gif:
             return
 
+        message = features.message
         user_id = message.author.id
         now = time.time()
 
@@ -139,17 +164,13 @@ class GifDetector(commands.Cog):
 
         # Determine window/threshold depending on whether this is the allowed user
         if user_id == self.ALLOWED_USER_ID:
-            window = self.ALLOWED_USER_WINDOW
+            rate = self.allowed_gif_rate
             threshold = self.ALLOWED_USER_LIMIT
         else:
-            window = self.DEFAULT_WINDOW
+            rate = self.gif_rate
             threshold = self.DEFAULT_THRESHOLD
 
-        # Cleanup old timestamps and add this one
-        self._cleanup_old_entries(user_id, now, window)
-        self.user_gif_data.setdefault(user_id, []).append(now)
-
-        count = len(self.user_gif_data[user_id])
+        count = rate.hit(user_id, now)
 
         # If within allowed threshold, do nothing
         if count <= threshold:
@@ -173,10 +194,8 @@ class GifDetector(commands.Cog):
                     guild = message.guild
                     user = message.author
                     # Apply "ban" (now just bookkeeping + response)
-                    applied = await self._apply_ban(guild, user, self.AUTO_BAN_DURATION, reason="Auto GIF ban")
+                    applied = await self._apply_ban(guild, user, self.AUTO_BAN_DURATION, reason="Auto GIF ban", auto=True)
                     if applied:
-                        self.auto_banned_user = user_id
-                        self.auto_ban_expires = now + self.AUTO_BAN_DURATION
                         resp = await self._get_random_gifban_response(guild)
                         await message.channel.send(f"{user.mention}, {resp} (enforced for {int(self.AUTO_BAN_DURATION/3600)} hours)")
                     else:
@@ -210,7 +229,6 @@ class GifDetector(commands.Cog):
         try:
             success = await self._apply_ban(ctx.guild, member, duration, reason=f"Manual GIF ban by {ctx.author}")
             if success:
-                self.manual_bans[member.id] = time.time() + duration
                 await ctx.send(f"{member.mention} has been GIF-banned for {hours} hour(s).")
             else:
                 await ctx.send(f"Could not ban {member.mention}. I may lack permissions.")
@@ -222,12 +240,8 @@ class GifDetector(commands.Cog):
     async def ungifban(self, ctx, member: discord.User):
         """Remove a GIF-ban (manual) before it expires."""
         try:
-            await ctx.guild.unban(member)
-            self.manual_bans.pop(member.id, None)
-            # If this was the auto-banned user, clear that state
-            if self.auto_banned_user == member.id:
-                self.auto_banned_user = None
-                self.auto_ban_expires = 0
+            # Bans are bookkeeping only (see _apply_ban), so there is no guild ban to lift
+            self._lift_ban(member.id)
             await ctx.send(f"Removed GIF-ban for {member.mention}.")
         except Exception as e:
             await ctx.send(f"Could not unban: {e}")
@@ -236,10 +250,12 @@ class GifDetector(commands.Cog):
     async def reset_gif_count(self, ctx, member: discord.Member = None):
         """Manually resets the GIF count for a user or all users."""
         if member:
-            self.user_gif_data.pop(member.id, None)
+            self.gif_rate.reset(member.id)
+            self.allowed_gif_rate.reset(member.id)
             await ctx.send(f"Reset GIF count for {member.mention}.")
         else:
-            self.user_gif_data.clear()
+            self.gif_rate.reset()
+            self.allowed_gif_rate.reset()
             await ctx.send("All GIF counts have been reset.")
 
     @commands.command(name='gifbans')
@@ -267,9 +283,7 @@ class GifDetector(commands.Cog):
             lines.append("Manual bans:")
             for uid, expire_ts in list(self.manual_bans.items()):
                 if now >= expire_ts:
-                    # expired, remove bookkeeping
-                    self.manual_bans.pop(uid, None)
-                    continue
+                    continue  # Expired; the sweeper removes it
                 remaining = int(expire_ts - now)
                 hrs = remaining // 3600
                 mins = (remaining % 3600) // 60
@@ -1,5 +1,7 @@
 import os
-import requests
+import json
+import asyncio
+from collections import OrderedDict
 from PIL import Image
 from io import BytesIO
 import numpy as np
@@ -8,72 +10,170 @@ from discord.ext import commands
 class TwemojiRenderer(commands.Cog):
     TWEMOJI_CDN = "https://cdn.jsdelivr.net/gh/twitter/twemoji@latest/assets/72x72/"
     CACHE_DIR = "cogs/graphs/emoji_cache"
+    # The atlas lives outside CACHE_DIR so writing it doesn't bump the directory mtime
+    ATLAS_PATH = "cogs/graphs/emoji_atlas.png"
+    ATLAS_INDEX_PATH = "cogs/graphs/emoji_atlas.json"
+    TILE_SIZE = 72
+    ATLAS_COLUMNS = 16
+    TILE_CACHE_SIZE = 512
 
     def __init__(self, bot):
         self.bot = bot
         # Create cache directory if it doesn't exist
         os.makedirs(self.CACHE_DIR, exist_ok=True)
+        self._atlas = None  # RGBA numpy array of the packed atlas
+        self._atlas_index = {}  # twemoji code -> slot in the atlas grid
+        self._atlas_mtime = None
+        self._tiles = OrderedDict()  # (code, height) -> pre-scaled RGBA numpy tile
 
     def _get_twemoji_code(self, emoji):
         """Convert emoji to its hex code for Twemoji URL"""
-        if len(emoji) == 0:
-            return None
-        
+        if len(emoji) == 0 or emoji.startswith('<'):
+            return None  # Discord custom emojis have no Twemoji asset
+
+        # Twemoji drops the variation selector unless the emoji is a ZWJ sequence
+        if '\u200d' not in emoji:
+            emoji = emoji.replace('\ufe0f', '')
+
         # Handle combined emojis (like flags)
-        codes = []
-        for char in emoji:
-            codes.extend([f"{ord(c):x}" for c in char])
-        return "-".join(codes)
+        return "-".join(f"{ord(c):x}" for c in emoji)
 
-    def get_emoji_image(self, emoji):
-        """Get Twemoji image for an emoji, using cache if available"""
+    # ----- Atlas -----
+
+    def _cached_codes(self):
+        return sorted(f[:-4] for f in os.listdir(self.CACHE_DIR) if f.endswith(".png"))
+
+    def _build_atlas(self):
+        """Pack every cached Twemoji PNG into a single atlas image plus index."""
+        codes = self._cached_codes()
+        rows = max(1, -(-len(codes) // self.ATLAS_COLUMNS))
+        atlas = Image.new('RGBA', (self.ATLAS_COLUMNS * self.TILE_SIZE, rows * self.TILE_SIZE), (0, 0, 0, 0))
+        index = {}
+        for code in codes:
+            try:
+                with Image.open(os.path.join(self.CACHE_DIR, f"{code}.png")) as img:
+                    tile = img.convert('RGBA')
+                    if tile.size != (self.TILE_SIZE, self.TILE_SIZE):
+                        tile = tile.resize((self.TILE_SIZE, self.TILE_SIZE), Image.Resampling.LANCZOS)
+            except Exception as e:
+                print(f"Skipping unreadable emoji {code}: {e}")
+                continue
+            slot = len(index)
+            x = (slot % self.ATLAS_COLUMNS) * self.TILE_SIZE
+            y = (slot // self.ATLAS_COLUMNS) * self.TILE_SIZE
+            atlas.paste(tile, (x, y))
+            index[code] = slot
+
+        tmp_path = f"{self.ATLAS_PATH}.tmp"
+        atlas.save(tmp_path, format="PNG")
+        with open(f"{self.ATLAS_INDEX_PATH}.tmp", "w") as f:
+            json.dump({"tile_size": self.TILE_SIZE, "columns": self.ATLAS_COLUMNS, "codes": index}, f)
+        os.replace(f"{self.ATLAS_INDEX_PATH}.tmp", self.ATLAS_INDEX_PATH)
+        os.replace(tmp_path, self.ATLAS_PATH)
+
+    def _ensure_atlas(self):
+        """Load the atlas, rebuilding it first if the emoji cache changed since it was packed."""
+        atlas_stale = (
+            not os.path.exists(self.ATLAS_PATH)
+            or not os.path.exists(self.ATLAS_INDEX_PATH)
+            or os.path.getmtime(self.CACHE_DIR) > os.path.getmtime(self.ATLAS_PATH)
+        )
+        if atlas_stale:
+            self._build_atlas()
+
+        atlas_mtime = os.path.getmtime(self.ATLAS_PATH)
+        if self._atlas is not None and atlas_mtime == self._atlas_mtime:
+            return
+
+        with open(self.ATLAS_INDEX_PATH, "r") as f:
+            index = json.load(f)
+        with Image.open(self.ATLAS_PATH) as atlas:
+            self._atlas = np.array(atlas.convert('RGBA'))
+        self._atlas_index = index["codes"]
+        self._atlas_mtime = atlas_mtime
+        self._tiles.clear()
+
+    def get_emoji_tile(self, emoji, height):
+        """Return a decoded RGBA tile for an emoji scaled to ``height``, or None if not cached"""
         code = self._get_twemoji_code(emoji)
         if not code:
             return None
 
-        cache_path = os.path.join(self.CACHE_DIR, f"{code}.png")
-        
-        # Use cached image if available
-        if os.path.exists(cache_path):
-            return Image.open(cache_path)
+        key = (code, height)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
 
-        # Download from Twemoji CDN
-        url = f"{self.TWEMOJI_CDN}/{code}.png"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
-                img.save(cache_path)  # Cache for future use
-                return img
-        except Exception:
-            pass
-        return None
+        self._ensure_atlas()
+        slot = self._atlas_index.get(code)
+        if slot is None:
+            return None
+
+        x = (slot % self.ATLAS_COLUMNS) * self.TILE_SIZE
+        y = (slot // self.ATLAS_COLUMNS) * self.TILE_SIZE
+        tile_img = Image.fromarray(self._atlas[y:y + self.TILE_SIZE, x:x + self.TILE_SIZE])
+        if height != self.TILE_SIZE:
+            tile_img = tile_img.resize((height, height), Image.Resampling.LANCZOS)
+        tile = np.array(tile_img)
+
+        self._tiles[key] = tile
+        while len(self._tiles) > self.TILE_CACHE_SIZE:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def get_emoji_image(self, emoji):
+        """Get Twemoji image for an emoji from the atlas (see ``fetch_emoji_images``)"""
+        tile = self.get_emoji_tile(emoji, self.TILE_SIZE)
+        return Image.fromarray(tile) if tile is not None else None
+
+    async def fetch_emoji_images(self, emojis):
+        """Download any emojis missing from the cache through the shared HTTP client"""
+        fetcher = self.bot.get_cog("Fetcher")
+        missing = []
+        for emoji in emojis:
+            code = self._get_twemoji_code(emoji)
+            if code and code not in missing and not os.path.exists(os.path.join(self.CACHE_DIR, f"{code}.png")):
+                missing.append(code)
+
+        if not missing or fetcher is None:
+            return
+
+        async def download(code):
+            data = await fetcher.fetch_bytes(f"{self.TWEMOJI_CDN}{code}.png")
+            if data is None:
+                return
+            try:
+                img = Image.open(BytesIO(data))
+                img.save(os.path.join(self.CACHE_DIR, f"{code}.png"))  # Cache for future use
+            except Exception as e:
+                print(f"Error caching emoji {code}: {e}")
+
+        await asyncio.gather(*(download(code) for code in missing))
+        # Repack once for the whole batch rather than once per emoji
+        await asyncio.to_thread(self._ensure_atlas)
+
+    # ----- Labels -----
+
+    def create_emoji_labels(self, emojis, size=(100, 24)):
+        """Create one RGBA label array per emoji, each a single blit of a cached tile"""
+        width, height = size
+        emoji_height = height - 4  # Leave some padding
+        labels = np.zeros((len(emojis), height, width, 4), dtype=np.uint8)
+        y_offset = (height - emoji_height) // 2
+        for i, emoji in enumerate(emojis):
+            tile = self.get_emoji_tile(emoji, emoji_height)
+            if tile is None:
+                continue
+            tile_width = min(tile.shape[1], width - 2)
+            # Tiles start from a transparent canvas, so a straight copy equals alpha compositing
+            labels[i, y_offset:y_offset + emoji_height, 2:2 + tile_width] = tile[:, :tile_width]
+        return labels
 
     def create_emoji_label(self, emoji, text, size=(100, 24)):
         """Create a label with Twemoji and text"""
         try:
-            # Create a fully transparent background
-            label = Image.new('RGBA', size, (0, 0, 0, 0))
-            
-            # Get the emoji image
-            emoji_img = self.get_emoji_image(emoji)
-            if emoji_img:
-                # Convert to RGBA and ensure proper alpha channel
-                emoji_img = emoji_img.convert('RGBA')
-                
-                # Calculate emoji size while maintaining aspect ratio
-                emoji_height = size[1] - 4  # Leave some padding
-                aspect = emoji_img.width / emoji_img.height
-                emoji_width = int(emoji_height * aspect)
-                emoji_img = emoji_img.resize((emoji_width, emoji_height), Image.Resampling.LANCZOS)
-                
-                # Center emoji vertically
-                y_offset = (size[1] - emoji_height) // 2
-                # Paste emoji at the start of the label
-                label.paste(emoji_img, (2, y_offset), emoji_img)  # Add 2px padding from left
-
-            # Convert to numpy array with proper alpha handling
-            return np.array(label)
+            return self.create_emoji_labels([emoji], size)[0]
         except Exception as e:
             print(f"Error creating emoji label: {e}")
             return None
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 import matplotlib.pyplot as plt
+from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 import sqlite3
 import os
 from pathlib import Path
@@ -153,6 +154,9 @@ class MealStatsGraph(commands.Cog):
                 await ctx.send(f"No emoji data available for the last {days} days.")
                 return
 
+            # Download any uncached Twemoji in one batch before drawing
+            await self.emoji_renderer.fetch_emoji_images([stat[0] for stat in stats])
+
             # Create figure with dark theme
             plt.figure(figsize=(12, 8))
             
@@ -180,6 +184,16 @@ class MealStatsGraph(commands.Cog):
 
             ax.set_yticks(y_pos)
             ax.set_yticklabels(labels_text, fontproperties=prop)
+
+            # Draw the Twemoji glyph between each name and its bar, one blit per label
+            emoji_labels = self.emoji_renderer.create_emoji_labels(emojis, size=(28, 28))
+            ax.tick_params(axis='y', pad=34)
+            for i, label in enumerate(emoji_labels):
+                if label[..., 3].any():
+                    ax.add_artist(AnnotationBbox(
+                        OffsetImage(label), (0, i), xybox=(-16, 0),
+                        xycoords=('axes fraction', 'data'), boxcoords="offset points", frameon=False
+                    ))
             
             # Add count labels on the bars
             for i, v in enumerate(counts):
@@ -5,62 +5,301 @@ import json
 import random
 import os
 import asyncio  # Add this import for the delay functionality
+import sqlite3
+import time
 import string  # Add this import for handling punctuation
 
-DATA_FILE = "memorization_data.json"
+DATA_FILE = "memorization_data.json"  # Legacy store, imported into the database once
+DB_FILE = "discord.db"
+
+MIN_EASE = 1.3
+RETRY_SECONDS = 10 * 60  # A missed item comes back after this long
+
+NON_ESSENTIAL_WORDS = {"a", "an", "the", "and", "or", "but", "of", "in", "on", "at", "to", "by", "for", "with"}
+MAX_WORD_LENGTH_BUCKET = 12
+PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+class CompiledSet:
+    """A set's items split into words once, plus a distractor index over its vocabulary.
+
+    Each distinct word is bucketed by (length, frequency band) so a wrong
+    option can be drawn from words that look like the right answer.
+    """
+
+    def __init__(self, set_data):
+        self.skip_non_essential = set_data.get("skip_non_essential", False)
+        # item id -> (all words, essential mask, words used for questions)
+        self.items = {}
+        frequency = {}
+        for item in set_data["items"]:
+            words = tuple(item["body"].split())
+            essential = tuple(word.lower() not in NON_ESSENTIAL_WORDS for word in words)
+            practice_words = tuple(word for word, keep in zip(words, essential) if keep) if self.skip_non_essential else words
+            self.items[item["id"]] = (words, essential, practice_words)
+            for word, keep in zip(words, essential):
+                if keep:
+                    frequency[word] = frequency.get(word, 0) + 1
+        self.frequency = frequency
+
+        self.buckets = {}
+        self.by_length = {}
+        for word, count in frequency.items():
+            length = self.length_bucket(word)
+            self.buckets.setdefault((length, count.bit_length()), []).append(word)
+            self.by_length.setdefault(length, []).append(word)
+        self.vocabulary = list(frequency)
+
+    @staticmethod
+    def length_bucket(word):
+        return min(len(word.translate(PUNCTUATION)), MAX_WORD_LENGTH_BUCKET)
+
+    def words(self, item):
+        return self.items[item["id"]][2]
+
+    def all_words(self, item):
+        return self.items[item["id"]][0]
+
+    def distractors(self, correct, count=4):
+        """Up to ``count`` distinct wrong options that resemble ``correct``."""
+        length = self.length_bucket(correct)
+        options = []
+        pools = (self.buckets.get((length, self.frequency.get(correct, 1).bit_length()), ()),
+                 self.by_length.get(length, ()), self.vocabulary)
+        for pool in pools:
+            # Sampling one extra leaves room for skipping the correct word itself
+            for word in random.sample(pool, min(len(pool), count + 1)):
+                if word != correct and word not in options:
+                    options.append(word)
+                    if len(options) == count:
+                        return options
+        return options
 
 class Memorization(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data = {}
-
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
+        self.conn = sqlite3.connect(DB_FILE)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.create_tables()
+        self.import_json()
+        self._compiled = {}  # set id -> CompiledSet
+
+    def cog_unload(self):
+        self.conn.close()
+
+    def create_tables(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS memorization_groups (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS memorization_sets (
+                    id INTEGER PRIMARY KEY,
+                    group_id INTEGER NOT NULL REFERENCES memorization_groups(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    author_id INTEGER,
+                    types TEXT NOT NULL,
+                    skip_non_essential INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE (group_id, name)
+                );
+                CREATE TABLE IF NOT EXISTS memorization_items (
+                    id INTEGER PRIMARY KEY,
+                    set_id INTEGER NOT NULL REFERENCES memorization_sets(id) ON DELETE CASCADE,
+                    title TEXT NOT NULL,
+                    body TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_memorization_items_set ON memorization_items (set_id);
+                CREATE TABLE IF NOT EXISTS memorization_solutions (
+                    item_id INTEGER NOT NULL REFERENCES memorization_items(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    solution TEXT NOT NULL,
+                    PRIMARY KEY (item_id, position)
+                );
+                CREATE TABLE IF NOT EXISTS memorization_stats (
+                    user_id INTEGER NOT NULL,
+                    item_id INTEGER NOT NULL REFERENCES memorization_items(id) ON DELETE CASCADE,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    correct INTEGER NOT NULL DEFAULT 0,
+                    ease REAL NOT NULL DEFAULT 2.5,
+                    interval_days REAL NOT NULL DEFAULT 0,
+                    last_seen REAL,
+                    due_at REAL,
+                    PRIMARY KEY (user_id, item_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_memorization_stats_due ON memorization_stats (user_id, due_at);
+            """)
+
+    def import_json(self):
+        """Copy the legacy JSON file into the tables the first time the cog runs."""
+        if not os.path.exists(DATA_FILE):
+            return
+        if self.conn.execute("SELECT 1 FROM memorization_groups LIMIT 1").fetchone():
+            return
+        try:
             with open(DATA_FILE, "r") as f:
-                return json.load(f)
-        return {}
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not import {DATA_FILE}: {e}")
+            return
+
+        with self.conn:
+            for group, sets in data.items():
+                for set_name, set_data in sets.items():
+                    set_id = self.insert_set(group, set_name, set_data.get("author"), set_data.get("types", []),
+                                             set_data.get("skip_non_essential", False))
+                    for item in set_data.get("items", []):
+                        self.insert_item(set_id, item["title"], item["body"], item.get("solutions", []))
+        print(f"Imported memorization sets from {DATA_FILE}")
+
+    ## ----- Storage -----
+    # The insert_* helpers don't commit; callers wrap them in `with self.conn:`
+
+    def insert_set(self, group, set_name, author_id, types, skip_non_essential):
+        self.conn.execute("INSERT OR IGNORE INTO memorization_groups (name) VALUES (?)", (group,))
+        cursor = self.conn.execute(
+            """INSERT INTO memorization_sets (group_id, name, author_id, types, skip_non_essential)
+               SELECT id, ?, ?, ?, ? FROM memorization_groups WHERE name = ?""",
+            (set_name, author_id, json.dumps(list(types)), int(bool(skip_non_essential)), group)
+        )
+        return cursor.lastrowid
+
+    def insert_item(self, set_id, title, body, solutions):
+        cursor = self.conn.execute("INSERT INTO memorization_items (set_id, title, body) VALUES (?, ?, ?)",
+                                   (set_id, title, body))
+        self.conn.executemany("INSERT INTO memorization_solutions (item_id, position, solution) VALUES (?, ?, ?)",
+                              [(cursor.lastrowid, position, solution) for position, solution in enumerate(solutions)])
+        return cursor.lastrowid
+
+    def group_names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM memorization_groups ORDER BY id")]
+
+    def set_names(self, group):
+        return [row[0] for row in self.conn.execute(
+            """SELECT s.name FROM memorization_sets s JOIN memorization_groups g ON g.id = s.group_id
+               WHERE g.name = ? ORDER BY s.id""", (group,))]
+
+    def get_set_id(self, group, set_name):
+        row = self.conn.execute(
+            """SELECT s.id FROM memorization_sets s JOIN memorization_groups g ON g.id = s.group_id
+               WHERE g.name = ? AND s.name = ?""", (group, set_name)).fetchone()
+        return row[0] if row else None
+
+    def get_set(self, group, set_name):
+        """Return a set with its items as a dict, or None if it doesn't exist."""
+        row = self.conn.execute(
+            """SELECT s.id, s.author_id, s.types, s.skip_non_essential
+               FROM memorization_sets s JOIN memorization_groups g ON g.id = s.group_id
+               WHERE g.name = ? AND s.name = ?""", (group, set_name)).fetchone()
+        if row is None:
+            return None
+        set_id, author_id, types, skip_non_essential = row
+
+        items = {}
+        for item_id, title, body in self.conn.execute(
+                "SELECT id, title, body FROM memorization_items WHERE set_id = ? ORDER BY id", (set_id,)):
+            items[item_id] = {"id": item_id, "title": title, "body": body, "solutions": []}
+        for item_id, solution in self.conn.execute(
+                """SELECT so.item_id, so.solution FROM memorization_solutions so
+                   JOIN memorization_items i ON i.id = so.item_id
+                   WHERE i.set_id = ? ORDER BY so.item_id, so.position""", (set_id,)):
+            items[item_id]["solutions"].append(solution)
+
+        return {
+            "id": set_id,
+            "author": author_id,
+            "types": json.loads(types),
+            "skip_non_essential": bool(skip_non_essential),
+            "items": list(items.values()),
+        }
 
-    def save_data(self):
-        with open(DATA_FILE, "w") as f:
-            json.dump(self.data, f, indent=4)
+    def compiled(self, set_data):
+        """Return the cached CompiledSet for a set, building it on first use."""
+        compiled = self._compiled.get(set_data["id"])
+        if compiled is None:
+            compiled = self._compiled[set_data["id"]] = CompiledSet(set_data)
+        return compiled
+
+    ## ----- Spaced repetition -----
+
+    def next_item_id(self, user_id, set_id):
+        """The item this user should see next: never-seen items first, then the one due soonest."""
+        row = self.conn.execute(
+            """SELECT i.id FROM memorization_items i
+               LEFT JOIN memorization_stats st ON st.item_id = i.id AND st.user_id = ?
+               WHERE i.set_id = ?
+               ORDER BY COALESCE(st.due_at, 0), RANDOM() LIMIT 1""", (user_id, set_id)).fetchone()
+        return row[0] if row else None
+
+    def record_attempt(self, user_id, item_id, is_correct):
+        """Update a user's stats for one item (a simplified SM-2 schedule)."""
+        now = time.time()
+        with self.conn:
+            row = self.conn.execute("SELECT ease, interval_days FROM memorization_stats WHERE user_id = ? AND item_id = ?",
+                                    (user_id, item_id)).fetchone()
+            ease, interval_days = row if row else (2.5, 0)
+            if is_correct:
+                interval_days = 1 if interval_days == 0 else interval_days * ease
+                ease += 0.1
+                due_at = now + interval_days * 86400
+            else:
+                interval_days = 0
+                ease = max(MIN_EASE, ease - 0.2)
+                due_at = now + RETRY_SECONDS
+            self.conn.execute(
+                """INSERT INTO memorization_stats (user_id, item_id, attempts, correct, ease, interval_days, last_seen, due_at)
+                   VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+                   ON CONFLICT(user_id, item_id) DO UPDATE SET
+                       attempts = attempts + 1, correct = correct + excluded.correct, ease = excluded.ease,
+                       interval_days = excluded.interval_days, last_seen = excluded.last_seen, due_at = excluded.due_at""",
+                (user_id, item_id, int(is_correct), ease, interval_days, now, due_at)
+            )
 
     @commands.command(name="create_set")
     async def create_set(self, ctx, group: str, set_name: str, skip_non_essential: bool, *memorization_types):
         """Create a new memorization set with multiple types and a toggle for skipping non-essential words."""
-        if group not in self.data:
-            self.data[group] = {}
-        if set_name in self.data[group]:
+        if self.get_set_id(group, set_name) is not None:
             await ctx.send(f"A set with the name '{set_name}' already exists in group '{group}'.")
             return
-        self.data[group][set_name] = {
-            "author": ctx.author.id,
-            "types": list(memorization_types),
-            "skip_non_essential": skip_non_essential,
-            "items": []
-        }
-        self.save_data()
+        with self.conn:
+            self.insert_set(group, set_name, ctx.author.id, memorization_types, skip_non_essential)
         await ctx.send(f"Set '{set_name}' created in group '{group}' with types: {', '.join(memorization_types)} and skip_non_essential set to {skip_non_essential}.")
 
     @commands.command(name="add_item")
     async def add_item(self, ctx, group: str, set_name: str, title: str, body: str, *solutions):
         """Add an item to a memorization set."""
-        if group not in self.data or set_name not in self.data[group]:
+        set_id = self.get_set_id(group, set_name)
+        if set_id is None:
             await ctx.send(f"Set '{set_name}' in group '{group}' does not exist.")
             return
-        self.data[group][set_name]["items"].append({
-            "title": title,
-            "body": body,
-            "solutions": list(solutions)
-        })
-        self.save_data()
+        with self.conn:
+            self.insert_item(set_id, title, body, solutions)
+        self._compiled.pop(set_id, None)
         await ctx.send(f"Item '{title}' added to set '{set_name}' in group '{group}'.")
 
+    @commands.command(name="memorization_stats")
+    async def memorization_stats(self, ctx, group: str, set_name: str):
+        """Show your progress on a memorization set."""
+        set_id = self.get_set_id(group, set_name)
+        if set_id is None:
+            await ctx.send(f"Set '{set_name}' in group '{group}' does not exist.")
+            return
+        total, seen, attempts, correct, due = self.conn.execute(
+            """SELECT COUNT(*), COUNT(st.item_id), COALESCE(SUM(st.attempts), 0), COALESCE(SUM(st.correct), 0),
+                      SUM(CASE WHEN st.due_at IS NULL OR st.due_at <= ? THEN 1 ELSE 0 END)
+               FROM memorization_items i
+               LEFT JOIN memorization_stats st ON st.item_id = i.id AND st.user_id = ?
+               WHERE i.set_id = ?""", (time.time(), ctx.author.id, set_id)).fetchone()
+        embed = discord.Embed(title=f"{set_name} ({group})", color=discord.Color.blue())
+        embed.add_field(name="Items seen", value=f"{seen}/{total}")
+        embed.add_field(name="Accuracy", value=f"{correct}/{attempts}" + (f" ({correct / attempts:.0%})" if attempts else ""))
+        embed.add_field(name="Due now", value=str(due or 0))
+        await ctx.send(embed=embed)
+
     @commands.command(name="practice")
     async def practice(self, ctx, group: str = None):
         """Start practicing a memorization set."""
-        self.data = self.load_data()  # Load data when the command is invoked
-
-        if not self.data:
+        group_names = self.group_names()
+        if not group_names:
             await ctx.send("No data available. Please create a set first.")
             return
 
@@ -69,7 +308,7 @@ class Memorization(commands.Cog):
             embed = discord.Embed(title="Select a Group", description="Choose a group to practice.")
             view = View()
 
-            for group_name in self.data.keys():
+            for group_name in group_names:
                 button = Button(label=group_name, style=discord.ButtonStyle.primary)
                 button.callback = self.create_group_callback(ctx, group_name, embed, view)
                 view.add_item(button)
@@ -77,7 +316,7 @@ class Memorization(commands.Cog):
             await ctx.send(embed=embed, view=view)
             return
 
-        if group not in self.data:
+        if group not in group_names:
             await ctx.send(f"Group '{group}' does not exist.")
             return
 
@@ -85,7 +324,7 @@ class Memorization(commands.Cog):
         embed = discord.Embed(title=f"Select a Set in '{group}'", description="Choose a set to practice.")
         view = View()
 
-        for set_name in self.data[group].keys():
+        for set_name in self.set_names(group):
             button = Button(label=set_name, style=discord.ButtonStyle.primary)
             button.callback = self.create_set_callback(ctx, group, set_name, embed, view)
             view.add_item(button)
@@ -103,7 +342,7 @@ class Memorization(commands.Cog):
             embed.description = "Choose a set to practice."
             view.clear_items()
 
-            for set_name in self.data[group_name].keys():
+            for set_name in self.set_names(group_name):
                 button = Button(label=set_name, style=discord.ButtonStyle.primary)
                 button.callback = self.create_set_callback(ctx, group_name, set_name, embed, view)
                 view.add_item(button)
@@ -117,8 +356,8 @@ class Memorization(commands.Cog):
                 await interaction.response.send_message("This button is not for you!", ephemeral=True)
                 return
 
-            set_data = self.data[group][set_name]
-            if not set_data["items"]:
+            set_data = self.get_set(group, set_name)
+            if set_data is None or not set_data["items"]:
                 await interaction.response.send_message(f"Set '{set_name}' in group '{group}' has no items.", ephemeral=True)
                 return
 
@@ -144,7 +383,7 @@ class Memorization(commands.Cog):
                 await interaction.response.send_message("This button is not for you!", ephemeral=True)
                 return
 
-            set_data = self.data[group][set_name]
+            set_data = self.get_set(group, set_name)
             embed.title = f"Practicing Set: {set_name} ({mem_type})"
             embed.description = f"Memorization Type: {mem_type}\n\nStarting practice..."
             view.clear_items()
@@ -198,35 +437,34 @@ class Memorization(commands.Cog):
         total_questions = 0
         message = None  # Track the message to edit
 
-        skip_non_essential = set_data.get("skip_non_essential", False)
-        non_essential_words = {"a", "an", "the", "and", "or", "but", "of", "in", "on", "at", "to", "by", "for", "with"}
+        compiled = self.compiled(set_data)
 
+        items = {item["id"]: item for item in set_data["items"]}
         for question_number in range(1, num_questions + 1):
-            item = random.choice(set_data["items"])
+            # Picked by due date so missed and unseen items come up first
+            item = items[self.next_item_id(ctx.author.id, set_data["id"])]
 
-            # Filter out non-essential words if the toggle is enabled
-            if skip_non_essential:
-                words = [word for word in item["body"].split() if word.lower() not in non_essential_words]
-            else:
-                words = item["body"].split()
+            # Already split, with non-essential words dropped if the set skips them
+            words = compiled.words(item)
 
             # Add "Question X of Y" to the title
             question_title = f"Question {question_number} of {num_questions}: {item['title']}"
 
             if memorization_type == "Multiple Choice (All Words)":
-                is_correct, message = await self.multiple_choice_all(ctx, item, message, thread, question_title, words)
+                is_correct, message = await self.multiple_choice_all(ctx, item, message, thread, question_title, words, compiled)
             elif memorization_type == "Multiple Choice (Single Word)":
-                is_correct, message = await self.multiple_choice_one(ctx, item, message, thread, question_title)
+                is_correct, message = await self.multiple_choice_one(ctx, item, message, thread, question_title, compiled)
             elif memorization_type == "Fill in the Blank (All Words)":
                 is_correct, message = await self.fill_in_blank_all(ctx, item, message, thread, question_title, words)
             elif memorization_type == "Fill in the Blank (Single Word)":
                 is_correct, message = await self.fill_in_blank_one(ctx, item, message, thread, question_title)
             elif memorization_type == "Sequential Practice (All Words)":
-                is_correct, message = await self.sequential_practice(ctx, item, message, thread, question_title)
+                is_correct, message = await self.sequential_practice(ctx, item, message, thread, question_title, compiled.all_words(item))
             else:
                 await thread.send(f"Unknown memorization type: {memorization_type}")
                 return
 
+            self.record_attempt(ctx.author.id, item["id"], is_correct)
             total_questions += 1
             if is_correct:
                 correct_answers += 1
@@ -253,12 +491,10 @@ class Memorization(commands.Cog):
         else:
             await thread.send(embed=embed)
 
-    async def multiple_choice_all(self, ctx, item, message, thread, question_title, words):
+    async def multiple_choice_all(self, ctx, item, message, thread, question_title, words, compiled):
         """Handle Multiple Choice (all words)."""
         blank_word = random.choice(words)
-        options = random.sample(words, min(4, len(words)))
-        if blank_word not in options:
-            options.append(blank_word)
+        options = compiled.distractors(blank_word) + [blank_word]
         random.shuffle(options)
 
         embed = discord.Embed(title=question_title, description=item["body"].replace(blank_word, "???"))
@@ -288,12 +524,10 @@ class Memorization(commands.Cog):
         await view.wait()
         return result["is_correct"], message
 
-    async def multiple_choice_one(self, ctx, item, message, thread, question_title):
+    async def multiple_choice_one(self, ctx, item, message, thread, question_title, compiled):
         """Handle Multiple Choice (one word)."""
         correct_word = item["solutions"][0]
-        options = random.sample(item["body"].split(), min(4, len(item["body"].split())))
-        if correct_word not in options:
-            options.append(correct_word)
+        options = compiled.distractors(correct_word) + [correct_word]
         random.shuffle(options)
 
         embed = discord.Embed(title=question_title, description=item["body"].replace(correct_word, "_____"))
@@ -342,8 +576,8 @@ class Memorization(commands.Cog):
         try:
             response = await self.bot.wait_for("message", check=check, timeout=60)  # 1-minute timeout
             # Strip punctuation from both the user's response and the blank word
-            user_answer = response.content.strip().translate(str.maketrans('', '', string.punctuation))
-            correct_answer = blank_word.translate(str.maketrans('', '', string.punctuation))
+            user_answer = response.content.strip().translate(PUNCTUATION)
+            correct_answer = blank_word.translate(PUNCTUATION)
 
             if user_answer.lower() == correct_answer.lower():
                 embed.description += "\n\nCorrect!"
@@ -376,8 +610,8 @@ class Memorization(commands.Cog):
         try:
             response = await self.bot.wait_for("message", check=check, timeout=30)
             # Strip punctuation from both the user's response and the correct word
-            user_answer = response.content.strip().translate(str.maketrans('', '', string.punctuation))
-            correct_answer = correct_word.translate(str.maketrans('', '', string.punctuation))
+            user_answer = response.content.strip().translate(PUNCTUATION)
+            correct_answer = correct_word.translate(PUNCTUATION)
 
             if user_answer.lower() == correct_answer.lower():
                 embed.description += "\n\nCorrect!"
@@ -394,9 +628,8 @@ class Memorization(commands.Cog):
             await message.edit(embed=embed)
             return False, message
 
-    async def sequential_practice(self, ctx, item, message, thread, question_title):
+    async def sequential_practice(self, ctx, item, message, thread, question_title, words):
         """Handle Sequential Practice (All Words)."""
-        words = item["body"].split()
         correct_answers = 0
 
         for blank_word in words:
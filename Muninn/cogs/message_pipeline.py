@@ -0,0 +1,168 @@
+import discord
+from discord.ext import commands
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import re
+
+URL_PATTERN = re.compile(r'https?://\S+')
+# Custom Discord emojis, plus runs of unicode emoji (flags included), in one pass. These are the
+# same ranges and run counting StatsTracker always used, so user_activity.emoji_count stays comparable.
+EMOJI_PATTERN = re.compile(r'<a?:\w+:\d+>|[\U0001F300-\U0001F6FF\U0001F900-\U0001F9FF\U0001F1E0-\U0001F1FF]+')
+GIF_HOSTS = ('tenor.com', 'giphy.com')
+
+@dataclass(frozen=True)
+class MessageFeatures:
+    """Everything the message handlers need, computed once per message."""
+    message: discord.Message
+    author_id: int
+    guild_id: int
+    is_bot: bool
+    is_dm: bool
+    is_command: bool
+    content: str
+    clean_content: str  # Content with URLs removed
+    message_length: int
+    word_count: int
+    emoji_count: int
+    attachment_count: int
+    has_gif: bool
+    mentions_bot: bool  # Direct mention of this bot, not @everyone
+    mentions_everyone: bool
+    mentioned_user_ids: tuple
+    mentioned_role_ids: tuple
+
+def _has_gif(message, lowered):
+    for attachment in message.attachments:
+        if attachment.filename.lower().endswith('.gif'):
+            return True
+    for embed in message.embeds:
+        if embed.type in ('gifv', 'gif'):
+            return True
+        if embed.url and 'gif' in embed.url.lower():
+            return True
+    return any(host in lowered for host in GIF_HOSTS)
+
+def extract_features(message, bot_user, prefix="!"):
+    """Build the ``MessageFeatures`` for a message."""
+    content = message.content or ""
+    clean_content = URL_PATTERN.sub('', content)
+    return MessageFeatures(
+        message=message,
+        author_id=message.author.id,
+        guild_id=message.guild.id if message.guild else None,
+        is_bot=message.author.bot,
+        is_dm=isinstance(message.channel, discord.DMChannel),
+        is_command=content.startswith(prefix),
+        content=content,
+        clean_content=clean_content,
+        message_length=len(clean_content),
+        word_count=len(clean_content.split()),
+        emoji_count=len(EMOJI_PATTERN.findall(clean_content)),
+        attachment_count=len(message.attachments),
+        has_gif=_has_gif(message, content.lower()),
+        mentions_bot=not message.mention_everyone and any(user.id == bot_user.id for user in message.mentions),
+        mentions_everyone=message.mention_everyone,
+        mentioned_user_ids=tuple(user.id for user in message.mentions),
+        mentioned_role_ids=tuple(role.id for role in message.role_mentions),
+    )
+
+class MessagePipeline(commands.Cog):
+    """Computes ``MessageFeatures`` once per message and hands them to every cog.
+
+    Any cog with an ``async def on_message_features(self, features)`` method is
+    a handler; handlers run concurrently and each one's run time is recorded.
+    Messages sent by this bot are never dispatched.
+    """
+
+    FEATURE_CACHE_SIZE = 256
+    SLOW_HANDLER_SECONDS = 2.0
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._features = OrderedDict()  # message id -> MessageFeatures
+        self._handlers = []
+        self._handlers_key = None
+        # handler name -> [calls, errors, total seconds, max seconds]
+        self.stats = {}
+        self.extract_stats = [0, 0.0]  # [messages, total seconds]
+
+    def features_for(self, message):
+        """Return the features for a message, computing them at most once."""
+        features = self._features.get(message.id)
+        if features is None:
+            start = time.perf_counter()
+            prefix = self.bot.command_prefix if isinstance(self.bot.command_prefix, str) else "!"
+            features = extract_features(message, self.bot.user, prefix)
+            self.extract_stats[0] += 1
+            self.extract_stats[1] += time.perf_counter() - start
+            self._features[message.id] = features
+            if len(self._features) > self.FEATURE_CACHE_SIZE:
+                self._features.popitem(last=False)
+        return features
+
+    @property
+    def handlers(self):
+        # Rebuilt only when a cog is added, removed or reloaded
+        key = tuple(id(cog) for cog in self.bot.cogs.values())
+        if key != self._handlers_key:
+            self._handlers = [
+                (name, cog.on_message_features)
+                for name, cog in self.bot.cogs.items()
+                if callable(getattr(cog, 'on_message_features', None))
+            ]
+            self._handlers_key = key
+        return self._handlers
+
+    async def _run(self, name, handler, features):
+        start = time.perf_counter()
+        failed = False
+        try:
+            await handler(features)
+        except Exception as e:
+            failed = True
+            print(f"Message handler {name} failed: {e}")
+        elapsed = time.perf_counter() - start
+
+        stats = self.stats.setdefault(name, [0, 0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += failed
+        stats[2] += elapsed
+        stats[3] = max(stats[3], elapsed)
+        if elapsed > self.SLOW_HANDLER_SECONDS:
+            print(f"Slow message handler {name}: {elapsed:.2f}s")
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author == self.bot.user:
+            return
+        features = self.features_for(message)
+        await asyncio.gather(*(self._run(name, handler, features) for name, handler in self.handlers))
+
+    @commands.command()
+    @commands.is_owner()
+    async def pipeline_stats(self, ctx, reset: str = None):
+        """Show how long each message handler takes. Pass `reset` to clear the numbers."""
+        if reset == "reset":
+            self.stats.clear()
+            self.extract_stats = [0, 0.0]
+            await ctx.send("Message pipeline stats cleared.")
+            return
+
+        messages, extract_total = self.extract_stats
+        embed = discord.Embed(
+            title="Message Pipeline",
+            description=f"{messages} messages, feature extraction avg {extract_total / max(messages, 1) * 1000:.2f} ms",
+            color=discord.Color.blue()
+        )
+        for name, (calls, errors, total, longest) in sorted(self.stats.items(), key=lambda item: -item[1][2]):
+            embed.add_field(
+                name=name,
+                value=f"{calls} calls, {errors} errors\navg {total / max(calls, 1) * 1000:.1f} ms, max {longest * 1000:.1f} ms",
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(MessagePipeline(bot))
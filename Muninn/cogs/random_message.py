@@ -1,36 +1,116 @@
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
+from discord.utils import time_snowflake, utcnow
 import random
+import sqlite3
 
 class RandomMessage(commands.Cog):
+    MAX_ATTEMPTS = 8
+    WINDOW_SIZE = 50  # messages fetched around each random point
+
     def __init__(self, bot):
         self.bot = bot
+        self.db_path = "discord.db"
+        self._initialize_database()
+
+    def _initialize_database(self):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_activity'")
+            if cursor.fetchone():
+                # Lets us seek to a random message id within one channel without a scan
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_activity_channel_message ON user_activity(channel_id, message_id)")
+                conn.commit()
+
+    def _channel_imported(self, channel_id):
+        """Whether StatsTracker has imported this channel's full history."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='imported_channels'")
+                if not cursor.fetchone():
+                    return False
+                cursor.execute("SELECT 1 FROM imported_channels WHERE channel_id = ?", (channel_id,))
+                return cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            print(f"Error reading imported channels: {e}")
+            return False
+
+    def _random_stored_message_ids(self, channel_id, k):
+        """Pick up to ``k`` stored message ids for a channel uniformly at random."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM user_activity WHERE channel_id = ?", (channel_id,))
+                count = cursor.fetchone()[0]
+                message_ids = []
+                # Random offsets on the (channel_id, message_id) index, so gaps in ids don't skew the pick
+                for offset in random.sample(range(count), min(k, count)):
+                    cursor.execute("""
+                        SELECT message_id FROM user_activity
+                        WHERE channel_id = ?
+                        ORDER BY message_id LIMIT 1 OFFSET ?
+                    """, (channel_id, offset))
+                    message_ids.append(cursor.fetchone()[0])
+                return message_ids
+        except sqlite3.Error as e:
+            print(f"Error reading stored message ids: {e}")
+            return []
+
+    async def _sample_from_database(self, channel):
+        for message_id in self._random_stored_message_ids(channel.id, self.MAX_ATTEMPTS):
+            try:
+                message = await channel.fetch_message(message_id)
+            except discord.NotFound:
+                continue  # Deleted since it was imported
+            if not message.embeds:
+                return message
+        return None
+
+    async def _sample_from_history(self, channel):
+        """Jump to a random point in the channel's lifetime and pick a message near it."""
+        created_at = getattr(channel, "created_at", None) or channel.guild.created_at
+        low = time_snowflake(created_at)
+        high = time_snowflake(utcnow())
+        for _ in range(self.MAX_ATTEMPTS):
+            around = discord.Object(id=random.randint(low, high))
+            window = [
+                message async for message in channel.history(limit=self.WINDOW_SIZE, around=around)
+                if not message.embeds
+            ]
+            if window:
+                return random.choice(window)
+        return None
 
     @commands.hybrid_command()
-    async def random_message(self, ctx: Context):
-        """Fetches a random message from the entire channel history."""
-        await ctx.send("CAW! This'll take a bit, so come back when I have your message!")
+    async def random_message(self, ctx: Context, source: str = "auto"):
+        """Fetches a random message from the channel history.
+
+        `source` can be `history` to sample the channel directly, `stored` to draw
+        from stored statistics, or `auto` to use stored ids when the channel has been imported.
+        """
+        if source not in ("auto", "history", "stored"):
+            await ctx.send(f"Unknown source `{source}`. Use `auto`, `history` or `stored`.", ephemeral=True)
+            return
 
         channel = ctx.channel
-        messages = []
+        random_message = None
 
-        async for message in channel.history(limit=None):
-            # Ignore messages that are embeds
-            if message.embeds:
-                continue
-            messages.append(message)
+        if source == "stored" or (source == "auto" and self._channel_imported(channel.id)):
+            random_message = await self._sample_from_database(channel)
+        if random_message is None and source in ("auto", "history"):
+            random_message = await self._sample_from_history(channel)
 
-        if not messages:
-            await ctx.channel.send("No messages found in the channel history.", ephemeral=True)
+        if not random_message:
+            await ctx.send("No messages found in the channel history.", ephemeral=True)
             return
 
-        random_message = random.choice(messages)
         message_link = f"https://discord.com/channels/{ctx.guild.id}/{channel.id}/{random_message.id}"
-        
+
         await ctx.channel.send(
             content=f"Random Message: {random_message.content}\n{message_link}",
         )
 
 async def setup(bot):
-    await bot.add_cog(RandomMessage(bot))
\ No newline at end of file
+    await bot.add_cog(RandomMessage(bot))
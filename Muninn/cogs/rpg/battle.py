@@ -1,21 +1,162 @@
 import discord
 from discord.ext import commands
 import asyncio
-import threading
 import json
 import random
 import time
-from icecream import ic
+from collections import defaultdict
 import math
 
+OFFENSE = ('Physical Offense', 'Magic Offense')
+DEFENSE = ('Physical Defense', 'Magic Defense')
+
+def resolve_round(player1_stats, player2_stats, player1_action, player2_action, player1_name=None, player2_name=None):
+    """Work out one round of combat without touching Discord or the database.
+
+    Returns ``(damage_to_player1, damage_to_player2, text)``.
+    """
+    player1_name = player1_name or player1_stats['profile_name']
+    player2_name = player2_name or player2_stats['profile_name']
+
+    action1_strength = player1_action['strength']
+    action2_strength = player2_action['strength']
+
+    action1_type = player1_action['type']
+    action2_type = player2_action['type']
+
+    damage_to_player1 = 0
+    damage_to_player2 = 0
+    text = ""
+
+    # Both Players Attack...
+    if action1_type in OFFENSE and action2_type in OFFENSE:
+        p1_strength_advantage = max((action2_strength - action1_strength) - (player2_stats['defense'] + player2_stats['defense_boost']), 0)
+        p2_strength_advantage = max((action1_strength - action2_strength) - (player1_stats['defense'] + player1_stats['defense_boost']), 0)
+
+        damage_to_player1 = math.ceil(p1_strength_advantage)
+        damage_to_player2 = math.ceil(p2_strength_advantage)
+        if damage_to_player1 == damage_to_player2:
+            text = "Both combatants' weapons clashed together, but neither came out on top! Both left unscathed."
+        elif damage_to_player1 > 0:
+            text = f"Both combatants' weapons clashed together!\n{player1_name} took **{damage_to_player1} damage!**"
+        elif damage_to_player2 > 0:
+            text = f"Both combatants' weapons clashed together!\n{player2_name} took **{damage_to_player2} damage!**"
+        return damage_to_player1, damage_to_player2, text
+
+    # Both Players Defend...
+    if action1_type in DEFENSE and action2_type in DEFENSE:
+        return 0, 0, "Both combatants went on the defensive!\nUnsurprisingly, **nothing happened.**"
+
+    def defense_win(attacker_stats, defender_stats, attack_strength, defense_strength, defense_is_magical):
+        damage_to_defender = max((attack_strength - (2 * defense_strength)) - (defender_stats['defense'] + defender_stats['defense_boost']), 1)
+        if defense_is_magical:
+            text = f"{defender_stats['profile_name']}'s magical defence dulled {attacker_stats['profile_name']}'s attack!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
+        else:
+            text = f"{defender_stats['profile_name']}'s defence dulled {attacker_stats['profile_name']}'s attack!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
+        return damage_to_defender, text
+
+    def attack_win(attacker_stats, defender_stats, attack_strength, defense_strength, attack_is_magical):
+        damage_to_defender = max(((2 * attack_strength) - defense_strength) - (defender_stats['defense'] + defender_stats['defense_boost']), 1)
+        if attack_is_magical:
+            text = f"{attacker_stats['profile_name']}'s magical offensive won out against {defender_stats['profile_name']}'s defenses!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
+        else:
+            text = f"{attacker_stats['profile_name']}'s brute force won out against {defender_stats['profile_name']}'s magical shielding!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
+        return damage_to_defender, text
+
+    # Defense Wins...
+        ## magic defense beats magic attack
+    if action1_type == 'Magic Defense' and action2_type == 'Magic Offense':
+        damage_to_player1, text = defense_win(player2_stats, player1_stats, action2_strength, action1_strength, True)
+
+    elif action2_type == 'Magic Defense' and action1_type == 'Magic Offense':
+        damage_to_player2, text = defense_win(player1_stats, player2_stats, action1_strength, action2_strength, True)
+
+        ## phys defense beats phys attack
+    elif action1_type == 'Physical Defense' and action2_type == 'Physical Offense':
+        damage_to_player1, text = defense_win(player2_stats, player1_stats, action2_strength, action1_strength, False)
+
+    elif action2_type == 'Physical Defense' and action1_type == 'Physical Offense':
+        damage_to_player2, text = defense_win(player1_stats, player2_stats, action1_strength, action2_strength, False)
+
+    # Attack Wins...
+        ## magic attack beats phys defense
+    elif action1_type == 'Magic Offense' and action2_type == 'Physical Defense':
+        damage_to_player2, text = attack_win(player1_stats, player2_stats, action1_strength, action2_strength, True)
+
+    elif action2_type == 'Magic Offense' and action1_type == 'Physical Defense':
+        damage_to_player1, text = attack_win(player2_stats, player1_stats, action2_strength, action1_strength, True)
+
+        ## phys attack beats magic defense
+    elif action1_type == 'Physical Offense' and action2_type == 'Magic Defense':
+        damage_to_player2, text = attack_win(player1_stats, player2_stats, action1_strength, action2_strength, False)
+
+    elif action2_type == 'Physical Offense' and action1_type == 'Magic Defense':
+        damage_to_player1, text = attack_win(player2_stats, player1_stats, action2_strength, action1_strength, False)
+
+    return damage_to_player1, damage_to_player2, text
+
+def simulate_battle(player1_stats, player2_stats, player1_actions, player2_actions, rng, max_rounds=200):
+    """Play out a battle with random action choices. Returns ``(winner, rounds, damage dealt)``.
+
+    ``winner`` is 1, 2 or 0 for a draw (both at 0 HP or the round cap was hit).
+    """
+    health1, health2 = player1_stats['health'], player2_stats['health']
+    damage_dealt = 0
+    for rounds in range(1, max_rounds + 1):
+        damage1, damage2, _ = resolve_round(player1_stats, player2_stats,
+                                            rng.choice(player1_actions), rng.choice(player2_actions),
+                                            "Player 1", "Player 2")
+        health1 -= damage1
+        health2 -= damage2
+        damage_dealt += damage1 + damage2
+        if health1 <= 0 or health2 <= 0:
+            winner = 0 if health1 <= 0 and health2 <= 0 else (2 if health1 <= 0 else 1)
+            return winner, rounds, damage_dealt
+    return 0, max_rounds, damage_dealt
+
+class BattleSession:
+    """State of one battle, owned by the thread it is fought in.
+
+    Damage and coin changes are accumulated in ``pending`` and written in a
+    single transaction at the end of each round.
+    """
+
+    def __init__(self, thread, player1, player2, player1_stats, player2_stats):
+        self.thread = thread
+        self.player1 = player1
+        self.player2 = player2
+        self.stats = {player1.id: player1_stats, player2.id: player2_stats}
+        self.pending = defaultdict(lambda: defaultdict(int))  # user id -> stat -> delta
+        self.state = "choosing"
+        self.round = 0
+        self.loadouts = {}  # user id -> (actions, armor, items); equipment can't change mid-battle
+
+    def record(self, player, stat, amount):
+        self.pending[player.id][stat] += amount
+        if stat in self.stats[player.id]:
+            self.stats[player.id][stat] = self.stats[player.id][stat] + amount
+
+    def take_pending(self):
+        changes = {user_id: dict(deltas) for user_id, deltas in self.pending.items()}
+        self.pending.clear()
+        return changes
+
+    def involves(self, user):
+        return user.id in self.stats
+
 class Battle(commands.Cog):
+    ROUND_DELAY = 5  # seconds between rounds
+
     def __init__(self, bot):
         self.bot = bot
         self.search = bot.get_cog('Search')  # For User Find
         self.utils = bot.get_cog('Utils')  # For Player's Icon
-        self.stats_manager = self.bot.get_cog("StatsManager") 
-        self.data_manager = self.bot.get_cog("DataManager")  
-        self.active_battles = set()
+        self.stats_manager = self.bot.get_cog("StatsManager")
+        self.data_manager = self.bot.get_cog("DataManager")
+        self.active_battles = {}  # thread id -> BattleSession
+
+    def _in_battle(self, user):
+        return any(session.involves(user) for session in self.active_battles.values())
 
     @commands.command()
     async def battle(self, ctx, user: str = None):
@@ -29,11 +170,15 @@ class Battle(commands.Cog):
             if not user:
                 await ctx.send("No person found.")
                 return
-            
+
         if user == ctx.author:
             await ctx.send("You can't fight yourself!")
             return
 
+        if self._in_battle(ctx.author) or self._in_battle(user):
+            await ctx.send("One of you is already in a battle!")
+            return
+
         # Check if either user has 0 health
         author_stats = await self.stats_manager.fetch_user_stats(ctx.author)
         user_stats = await self.stats_manager.fetch_user_stats(user)
@@ -43,11 +188,11 @@ class Battle(commands.Cog):
         if user_stats['health'] <= 0:
             await ctx.send(f"{user.mention} cannot battle with 0 health!")
             return
-        
+
         embed = discord.Embed(title="Battle Challenge!", description=f"{user.mention}, you've been challenged by {ctx.author.mention}!", color=discord.Color.red())
         embed.add_field(name="Instructions", value="Respond with `!accept` to begin or `!cancel` to deny the challenge.")
         await ctx.send(embed=embed)
-        
+
         def check(confirm_message):
             return confirm_message.author == user and confirm_message.channel == ctx.channel
 
@@ -79,69 +224,92 @@ class Battle(commands.Cog):
 
     async def start_battle(self, thread, player1, player2):
         print("Starting battle thread")
-        self.active_battles.add((player1, player2))
         player1_stats = await self.stats_manager.fetch_user_stats(player1)
         player2_stats = await self.stats_manager.fetch_user_stats(player2)
-        async def battle_loop():
-            while player1_stats['health'] > 0 and player2_stats['health'] > 0:
-                await self.prompt_actions(thread, player1, player2, player1_stats, player2_stats)
+        session = BattleSession(thread, player1, player2, player1_stats, player2_stats)
+        self.active_battles[thread.id] = session
+
+        try:
+            while session.state != "finished":
+                if session.state == "choosing":
+                    actions = await self.prompt_actions(session)
+                    session.state = "resolving" if actions else "abandoned"
+                elif session.state == "resolving":
+                    await self.play_round(session, *actions)
+                    session.state = "finished" if await self.check_winner(session) else "pacing"
+                elif session.state == "pacing":
+                    await asyncio.sleep(self.ROUND_DELAY)  # Yields to the rest of the bot
+                    session.state = "choosing"
+                elif session.state == "abandoned":
+                    await thread.send("A combatant never made a move, so the battle was called off.")
+                    session.state = "finished"
+        finally:
+            # Anything not yet written (e.g. the battle was cancelled) is flushed in one go
+            self.flush(session)
+            self.active_battles.pop(thread.id, None)
             print("Exiting battle loop!")
 
-        # Start the battle loop asynchronously
-        await battle_loop()
-        self.active_battles.discard((player1, player2))
+    def flush(self, session):
+        changes = session.take_pending()
+        if changes:
+            self.stats_manager.apply_stat_changes(changes)
+
+    async def get_player_actions(self, player_stats):
+        """Collect a player's available actions and equipment summary from their equipped items."""
+        item_slots = [
+            'head',
+            'upper',
+            'lower',
+            'feet',
+            'hand_left',
+            'hand_right'
+        ]
+
+        # Loop through each item in equipped items, finding actions
+        actions = []
+        armor = ""
+        items = ""
+
+        for slot in item_slots:
+            if not player_stats[slot]:
+                continue
 
-    async def prompt_actions(self, thread, player1, player2, player1_stats, player2_stats):
+            item = json.loads(player_stats[slot])
+            item_data = await self.data_manager.find_data(item['type'], item['name'])
+            if not item_data:
+                continue
+
+            if 'actions' in item_data and isinstance(item_data['actions'], list):
+                actions.extend(item_data['actions'])  # Ensure actions are appended correctly
+            if 'base_defense' in item_data:
+                armor += f"**{item_data['name']}**: +{item_data['base_defense']} Defense\n"
+            if 'base_heal' in item_data:
+                items += f"**{item_data['name']}**: Heals {item_data['base_heal']} HP\n"
+
+        return actions, armor, items
+
+    async def prompt_actions(self, session):
+        """Ask both players for an action; returns ``(action1, action2)`` or None if someone timed out."""
         print("Prompting actions")
+        thread = session.thread
+
         async def get_player_info(player, player_stats):
             print(f"Fetching inventory for {player.display_name}")
 
-            embed_color, avatar_image, has_custom_image = await self.utils.get_avatar_color_and_image(player)
-            pfp = discord.File(f"/usr/src/bot/profile_images/{player.id}.png", filename="image.png") if has_custom_image else None
-            
+            assets = await self.utils.get_profile_assets(player)
+            pfp = self.utils.profile_file(assets)
+
             action_embed = discord.Embed(title=f"{player_stats['profile_name']}'s Actions", color=discord.Color.blue())
-            action_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else player.avatar.url)
-
-            item_slots = [
-                'head',
-                'upper',
-                'lower',
-                'feet',
-                'hand_left',
-                'hand_right'
-            ]
-
-            # Loop through each item in equipped items, finding actions
-            actions = []
-            armor = ""
-            items = ""
-
-            for slot in item_slots:
-                if not player_stats[slot]:
-                    continue
-                
-                if slot == 'hand_left' and not player_stats[slot]:
-                    item_data = await self.data_manager.find_data('equipment', 'Right Fist')
-                elif slot == 'hand_right' and player_stats[slot] is None:
-                    item_data = await self.data_manager.find_data('equipment', 'Left Fist')
-                else:
-                    item = json.loads(player_stats[slot])
-                    item_data = await self.data_manager.find_data(item['type'], item['name'])
-
-                if 'actions' in item_data and isinstance(item_data['actions'], list):
-                    actions.extend(item_data['actions'])  # Ensure actions are appended correctly
-                if 'base_defense' in item_data:
-                    armor += f"**{item_data['name']}**: +{item_data['base_defense']} Defense\n"
-                if 'base_heal' in item_data:
-                    items += f"**{item_data['name']}**: Heals {item_data['base_heal']} HP\n"
-                    
-            ic(actions)
-        
-
-            action_embed.add_field(name="Actions", 
+            action_embed.set_thumbnail(url=self.utils.profile_thumbnail_url(player, assets))
+
+            if player.id not in session.loadouts:
+                session.loadouts[player.id] = await self.get_player_actions(player_stats)
+            actions, armor, items = session.loadouts[player.id]
+
+            action_embed.add_field(name="Actions",
                                    value="\n".join(
                                        [f"**{action['name']}** – *{action['type']}*\n{action['description']}\n" for action in actions]
-                                       ) or "No actions available", 
+                                       ) or "No actions available",
                                    inline=False)
             action_embed.add_field(name="Armor", value=armor or "No armor equipped", inline=False)
             action_embed.add_field(name="Items", value=items or "No items available", inline=False)
@@ -149,9 +317,9 @@ class Battle(commands.Cog):
             return actions, action_embed, pfp
 
         async def selected_action_embed(player, player_name):
-            embed_color, avatar_image, has_custom_image = await self.utils.get_avatar_color_and_image(player)
+            assets = await self.utils.get_profile_assets(player)
             embed = discord.Embed(title=f"{player_name} made a decision!")
-            embed.set_thumbnail(url="attachment://image.png" if has_custom_image else player.avatar.url)
+            embed.set_thumbnail(url=self.utils.profile_thumbnail_url(player, assets))
             return embed
 
         class ActionSelection(discord.ui.View):
@@ -163,7 +331,7 @@ class Battle(commands.Cog):
 
                 for action in actions:
                     button = discord.ui.Button(label=action['name'], style=discord.ButtonStyle.blurple)
-                    
+
                     async def callback(interaction: discord.Interaction, action=action):
                         if interaction.user != self.player:
                             await interaction.response.send_message("It's not your turn!", ephemeral=True)
@@ -176,164 +344,119 @@ class Battle(commands.Cog):
                     button.callback = callback
                     self.add_item(button)
 
-        # Player 1 action
-        actions, player1_embed, pfp = await get_player_info(player1, player1_stats)
-        view1 = ActionSelection(actions, player1, player1_stats)
-        player1_message = await thread.send(embed=player1_embed, view=view1, file=pfp)
-        await view1.wait()  # Wait for user interaction
-        if not view1.selected_action:
-            await thread.send(f"{player1.mention}, please make an action!")
-            return
-        player1_action = view1.selected_action  # Retrieve selected action
-
-        # Player 2 action
-        actions, player2_embed, pfp = await get_player_info(player2, player2_stats)
-        view2 = ActionSelection(actions, player2, player2_stats)
-        player2_message = await thread.send(embed=player2_embed, view=view2, file=pfp)
-        await view2.wait()  # Wait for user interaction
-        if not view2.selected_action:
-            await thread.send(f"{player2.mention}, please make an action!")
-            return
-        player2_action = view2.selected_action  # Retrieve selected action
-        
-        text = ""
-        
-        # Calculate Values
-        action1_strength = player1_action['strength']
-        action2_strength = player2_action['strength']
-        
-        action1_type = player1_action['type']
-        action2_type = player2_action['type']
-        
-        damage_to_player1 = 0
-        damage_to_player2 = 0
-        
-        # Both Players Attack...
-        if action1_type in ['Physical Offense', 'Magic Offense'] and action2_type in ['Physical Offense', 'Magic Offense']:
-            p1_strength_advantage = max((action2_strength - action1_strength) - (player2_stats['defense'] + player2_stats['defense_boost']), 0)
-            p2_strength_advantage = max((action1_strength - action2_strength) - (player1_stats['defense'] + player1_stats['defense_boost']), 0)
-
-            damage_to_player1 = math.ceil(p1_strength_advantage)
-            damage_to_player2 = math.ceil(p2_strength_advantage)
-            if damage_to_player1 == damage_to_player2:
-                text = "Both combatants' weapons clashed together, but neither came out on top! Both left unscathed."
-            elif damage_to_player1 > 0: 
-                text = f"Both combatants' weapons clashed together!\n{player1.display_name} took **{damage_to_player1} damage!**"
-            elif damage_to_player2 > 0: 
-                text = f"Both combatants' weapons clashed together!\n{player2.display_name} took **{damage_to_player2} damage!**"
-        
-        # Both Players Defend...
-        elif action1_type in ['Physical Defense', 'Magic Defense'] and action2_type in ['Physical Defense', 'Magic Defense']:
-            text = "Both combatants went on the defensive!\nUnsurprisingly, **nothing happened.**"
-            return
-        
-        def defense_win(attacker_stats, defender_stats, attack_strength, defense_strength, defense_is_magical):
-            damage_to_defender = max((attack_strength - (2 * defense_strength)) - (defender_stats['defense'] + defender_stats['defense_boost']), 1)
-            if defense_is_magical:
-                text = f"{defender_stats['profile_name']}'s magical defence dulled {attacker_stats['profile_name']}'s attack!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
-            else:
-                text = f"{defender_stats['profile_name']}'s defence dulled {attacker_stats['profile_name']}'s attack!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!" 
-            return damage_to_defender, text
-        
-        def attack_win(attacker_stats, defender_stats, attack_strength, defense_strength, attack_is_magical):
-            damage_to_defender = max(((2 * attack_strength) - defense_strength) - (defender_stats['defense'] + defender_stats['defense_boost']), 1)
-            if attack_is_magical:
-                text = f"{attacker_stats['profile_name']}'s magical offensive won out against {defender_stats['profile_name']}'s defenses!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!"
-            else:
-                text = f"{attacker_stats['profile_name']}'s brute force won out against {defender_stats['profile_name']}'s magical shielding!\n{attacker_stats['profile_name']} dealt **{damage_to_defender} damage**!" 
-            return damage_to_defender, text
-        
-        # Defense Wins...
-            ## magic defense beats magic attack
-        if action1_type == 'Magic Defense' and action2_type == 'Magic Offense':
-            damage_to_player1, text = defense_win(player2_stats, player1_stats, action2_strength, action1_strength, True)
-            
-        elif action2_type == 'Magic Defense' and action1_type == 'Magic Offense':
-            damage_to_player2, text = defense_win(player1_stats, player2_stats, action1_strength, action2_strength, True)
-            
-            ## phys defense beats phys attack
-        elif action1_type == 'Physical Defense' and action2_type == 'Physical Offense':
-            damage_to_player1, text = defense_win(player2_stats, player1_stats, action2_strength, action1_strength, False)
-            
-        elif action2_type == 'Physical Defense' and action1_type == 'Physical Offense':
-            damage_to_player2, text = defense_win(player1_stats, player2_stats, action1_strength, action2_strength, False)
-            
-        # Attack Wins...
-            ## magic attack beats phys defense
-        elif action1_type == 'Magic Offense' and action2_type == 'Physical Defense':
-            damage_to_player2, text = attack_win(player1_stats, player2_stats, action1_strength, action2_strength, True)
-            
-        elif action2_type == 'Magic Offense' and action1_type == 'Physical Defense':
-            damage_to_player1, text = attack_win(player2_stats, player1_stats, action2_strength, action1_strength, True)
-            
-            ## phys attack beats magic defense
-        elif action1_type == 'Physical Offense' and action2_type == 'Magic Defense':
-            damage_to_player2, text = attack_win(player1_stats, player2_stats, action1_strength, action2_strength, False)
-            
-        elif action2_type == 'Physical Offense' and action1_type == 'Magic Defense':
-            damage_to_player1, text = attack_win(player2_stats, player1_stats, action2_strength, action1_strength, False)
-            
-        
-        # Modify stats
-        await self.stats_manager.modify_user_stat(player1, 'health', -damage_to_player1) # Update Database
-        await self.stats_manager.modify_user_stat(player2, 'health', -damage_to_player2) # Update Database
-        player1_stats['health'] = player1_stats['health'] - damage_to_player1 # Update Local
-        player2_stats['health'] = player2_stats['health'] - damage_to_player2 # Update Local
+        selected = []
+        for player in (session.player1, session.player2):
+            player_stats = session.stats[player.id]
+            actions, player_embed, pfp = await get_player_info(player, player_stats)
+            view = ActionSelection(actions, player, player_stats)
+            await thread.send(embed=player_embed, view=view, file=pfp)
+            await view.wait()  # Wait for user interaction
+            if not view.selected_action:
+                await thread.send(f"{player.mention}, please make an action!")
+                return None
+            selected.append(view.selected_action)  # Retrieve selected action
+        return tuple(selected)
+
+    async def play_round(self, session, player1_action, player2_action):
+        player1, player2 = session.player1, session.player2
+        player1_stats, player2_stats = session.stats[player1.id], session.stats[player2.id]
+        session.round += 1
+
+        damage_to_player1, damage_to_player2, text = resolve_round(
+            player1_stats, player2_stats, player1_action, player2_action,
+            player1.display_name, player2.display_name
+        )
+
+        # Accumulate locally; written once per round below
+        session.record(player1, 'health', -damage_to_player1)
+        session.record(player2, 'health', -damage_to_player2)
+        self.flush(session)
 
         # Send battle update
-        battle_embed = discord.Embed(title="Battle Update", 
-                                     color=discord.Color.red(), 
-                                     description=f"{player1_stats['profile_name']} used **{player1_action['name']}**! *(strength {action1_strength})*\n"
+        battle_embed = discord.Embed(title="Battle Update",
+                                     color=discord.Color.red(),
+                                     description=f"{player1_stats['profile_name']} used **{player1_action['name']}**! *(strength {player1_action['strength']})*\n"
                                                  f"***\"{random.choice(player1_action['lines'])}\"***\n\n"
-                                                 f"{player2_stats['profile_name']} used **{player2_action['name']}**! *(strength {action2_strength})*\n"
+                                                 f"{player2_stats['profile_name']} used **{player2_action['name']}**! *(strength {player2_action['strength']})*\n"
                                                  f"***\"{random.choice(player2_action['lines'])}\"***\n\n\n"
                                                  f"{text}",
                                      )
         battle_embed.add_field(name=f"{player1_stats['profile_name']}'s Health", value=f"{player1_stats['health']} HP", inline=True)
         battle_embed.add_field(name=f"{player2_stats['profile_name']}'s Health", value=f"{player2_stats['health']} HP", inline=True)
-        await thread.send(embed=battle_embed)
-
-        time.sleep(5)
-
-        # Check if anyone has won
-        if player1_stats['health'] <= 0:
-            # Steal 20% of player1's coins
-            player1_coins = player1_stats.get('coins', 0)
-            stolen_coins = int(player1_coins * 0.2)
-            await self.stats_manager.modify_user_stat(player1, 'coins', -stolen_coins)
-            await self.stats_manager.modify_user_stat(player2, 'coins', stolen_coins)
-
-            victory_embed = discord.Embed(
-                title="Battle Over!",
-                description=f"{player2.mention} wins!\n{player2.mention} stole {stolen_coins} coins from {player1.mention}!",
-                color=discord.Color.green()
-            )
-            victory_embed.add_field(name=f"{player1_stats['profile_name']}'s Final Health", value=f"{max(0, player1_stats['health'])} HP", inline=True)
-            victory_embed.add_field(name=f"{player2_stats['profile_name']}'s Final Health", value=f"{max(0, player2_stats['health'])} HP", inline=True)
-            await thread.send(embed=victory_embed)
-
-        elif player2_stats['health'] <= 0:
-            # Steal 20% of player2's coins
-            player2_coins = player2_stats.get('coins', 0)
-            stolen_coins = int(player2_coins * 0.2)
-            await self.stats_manager.modify_user_stat(player2, 'coins', -stolen_coins)
-            await self.stats_manager.modify_user_stat(player1, 'coins', stolen_coins)
-
-            victory_embed = discord.Embed(
-                title="Battle Over!",
-                description=f"{player1.mention} wins!\n{player1.mention} stole {stolen_coins} coins from {player2.mention}!",
-                color=discord.Color.green()
-            )
-            victory_embed.add_field(name=f"{player1_stats['profile_name']}'s Final Health", value=f"{max(0, player1_stats['health'])} HP", inline=True)
-            victory_embed.add_field(name=f"{player2_stats['profile_name']}'s Final Health", value=f"{max(0, player2_stats['health'])} HP", inline=True)
-            await thread.send(embed=victory_embed)
+        await session.thread.send(embed=battle_embed)
+
+    async def check_winner(self, session):
+        """Send the victory message and coin transfer if someone is out of health."""
+        player1, player2 = session.player1, session.player2
+        if session.stats[player1.id]['health'] <= 0:
+            loser, winner = player1, player2
+        elif session.stats[player2.id]['health'] <= 0:
+            loser, winner = player2, player1
+        else:
+            return False
+
+        # Steal 20% of the loser's coins
+        stolen_coins = int(session.stats[loser.id].get('coins', 0) * 0.2)
+        session.record(loser, 'coins', -stolen_coins)
+        session.record(winner, 'coins', stolen_coins)
+        self.flush(session)
+
+        victory_embed = discord.Embed(
+            title="Battle Over!",
+            description=f"{winner.mention} wins!\n{winner.mention} stole {stolen_coins} coins from {loser.mention}!",
+            color=discord.Color.green()
+        )
+        victory_embed.add_field(name=f"{session.stats[player1.id]['profile_name']}'s Final Health", value=f"{max(0, session.stats[player1.id]['health'])} HP", inline=True)
+        victory_embed.add_field(name=f"{session.stats[player2.id]['profile_name']}'s Final Health", value=f"{max(0, session.stats[player2.id]['health'])} HP", inline=True)
+        await session.thread.send(embed=victory_embed)
+        return True
+
+    @commands.command()
+    @commands.is_owner()
+    async def simulate_battles(self, ctx, player1: discord.Member, player2: discord.Member, count: int = 1000):
+        """Run headless battles between two players' current loadouts to check balance."""
+        player1_stats = await self.stats_manager.fetch_user_stats(player1)
+        player2_stats = await self.stats_manager.fetch_user_stats(player2)
+        if not player1_stats or not player2_stats:
+            await ctx.send("Both players need a profile.")
+            return
+
+        player1_actions, _, _ = await self.get_player_actions(player1_stats)
+        player2_actions, _, _ = await self.get_player_actions(player2_stats)
+        if not player1_actions or not player2_actions:
+            await ctx.send("Both players need at least one action.")
+            return
+
+        def run():
+            rng = random.Random()
+            results = [simulate_battle(player1_stats, player2_stats, player1_actions, player2_actions, rng)
+                       for _ in range(count)]
+            return results
+
+        start = time.perf_counter()
+        results = await asyncio.to_thread(run)
+        elapsed = time.perf_counter() - start
+
+        wins = [sum(1 for winner, _, _ in results if winner == side) for side in (1, 2, 0)]
+        total_rounds = sum(rounds for _, rounds, _ in results)
+        total_damage = sum(damage for _, _, damage in results)
+
+        embed = discord.Embed(title=f"{count} simulated battles", color=discord.Color.blue())
+        embed.add_field(name=f"{player1_stats['profile_name']} wins", value=f"{wins[0] / count:.1%}", inline=True)
+        embed.add_field(name=f"{player2_stats['profile_name']} wins", value=f"{wins[1] / count:.1%}", inline=True)
+        embed.add_field(name="Draws", value=f"{wins[2] / count:.1%}", inline=True)
+        embed.add_field(name="Average rounds", value=f"{total_rounds / count:.1f}", inline=True)
+        embed.add_field(name="Damage per round", value=f"{total_damage / max(1, total_rounds):.1f}", inline=True)
+        embed.set_footer(text=f"{elapsed * 1000:.0f} ms ({count / elapsed:,.0f} battles/s)" if elapsed else "")
+        await ctx.send(embed=embed)
 
     async def cog_unload(self):
-        for player1, player2 in list(self.active_battles):
-            self.active_battles.discard((player1, player2))
+        for session in list(self.active_battles.values()):
+            self.flush(session)
             channel = self.bot.get_channel(1300535207371472998)  # Replace with the appropriate channel reference
             if channel:
-                await channel.send(f"Battle between {player1.mention} and {player2.mention} has been forcibly stopped due to a reload.")
+                await channel.send(f"Battle between {session.player1.mention} and {session.player2.mention} has been forcibly stopped due to a reload.")
+        self.active_battles.clear()
 
 async def setup(bot):
-    await bot.add_cog(Battle(bot))
\ No newline at end of file
+    await bot.add_cog(Battle(bot))
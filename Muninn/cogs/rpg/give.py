@@ -23,11 +23,8 @@ class Give(commands.Cog):
     @commands.hybrid_command(name="give", description="Hand an item to another player")
     async def give(self, ctx, target: discord.User):
         
-        def remove_from_user_inv(item_data):
-            self.stats_manager.remove_from_user_inventory(ctx.author.id, item_data)
-            
-        def add_to_target_inv(item_data):
-            self.stats_manager.add_to_user_inventory(target.id, item_data)
+        def give_item(item_data):
+            return self.stats_manager.transfer_items(ctx.author.id, target.id, [item_data])
             
         async def choice_embed_view(target):
             user_stats = await self.stats_manager.fetch_user_stats(ctx.author)
@@ -67,13 +64,15 @@ class Give(commands.Cog):
                     index = int(self.values[0])           
                     item_data = user_stats['inventory'][index]
 
+                    if not give_item(item_data):
+                        await interaction.response.edit_message(embed=discord.Embed(
+                            title=f"{user_stats['profile_name']} no longer has the {item_data['name']}!",
+                            color=discord.Color.red()), view=None)
+                        return
+
                     embed = discord.Embed(title=f"{user_stats['profile_name']} gave the {item_data['name']} to {target_stats['profile_name']}!", 
                                         color=0xFF8250, 
                                         description="I'm sure he will appreciate it very much :)")
-                    
-                    add_to_target_inv(item_data)
-                    
-                    remove_from_user_inv(item_data)
                 
                     await interaction.response.edit_message(embed=embed, view=None)
 
@@ -18,8 +18,9 @@ def get_default_values(ctx):
     conn = sqlite3.connect('discord.db')
     cursor = conn.cursor()
 
-    cursor.execute("SELECT user, name, description, items FROM vendors WHERE user = ?", (ctx.author.id, ))
+    cursor.execute("SELECT user, name, description FROM vendors WHERE user = ?", (ctx.author.id, ))
     x = cursor.fetchone()
+    conn.close()
     
     if not x:
         return "", ""
@@ -47,13 +48,15 @@ class StallNameModal(Modal):
         
         conn = sqlite3.connect('discord.db')
         cursor = conn.cursor()
-        cursor.execute("SELECT items FROM vendors WHERE user = ?", (interaction.user.id,))
-        row = cursor.fetchone()
-        items = row[0] if row else None  # Preserve current items, or None if new
-
-        cursor.execute("INSERT OR REPLACE INTO vendors (user, name, description, items) VALUES (?, ?, ?, ?)", (interaction.user.id, name, desc, items))
+        # Listings live in market_listings, so only the stall's name and description change here
+        cursor.execute("""INSERT INTO vendors (user, name, description) VALUES (?, ?, ?)
+                          ON CONFLICT(user) DO UPDATE SET name = excluded.name, description = excluded.description""",
+                       (interaction.user.id, name, desc))
         conn.commit()
         conn.close()
+        market_cog = interaction.client.get_cog("GoMarket")
+        if market_cog:
+            market_cog.invalidate_market()
         
         await interaction.response.edit_message(embed=discord.Embed(title="Market Setup Completed!", 
                                                                     description="We hope you receive much business...", 
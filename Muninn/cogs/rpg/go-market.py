@@ -14,12 +14,24 @@ from discord.ui import Button, Select, View, TextInput, Modal
 from icecream import ic
 
 class GoMarket(commands.Cog):    
+    PER_PAGE = 10
+    # Sort options for stall pages -> ORDER BY clause (never built from user input)
+    SORTS = {
+        'cheapest': "price ASC, id ASC",
+        'priciest': "price DESC, id ASC",
+        'newest': "id DESC",
+        'name': "name COLLATE NOCASE ASC, price ASC",
+    }
+    CACHE_SIZE = 256
+
     def __init__(self, bot):
         self.bot = bot
         self.db_path = "discord.db"
         self.item_generator = bot.get_cog('ItemFetch')
         self.user_manager = self.bot.get_cog("StatsManager")
         self.data_manager = self.bot.get_cog("DataManager")
+        # Query results keyed by their arguments; cleared whenever a listing or stall changes
+        self._listing_cache = {}
     
         """Create the table in the SQLite database if it doesn't exist."""
         conn = sqlite3.connect(self.db_path)
@@ -37,147 +49,184 @@ class GoMarket(commands.Cog):
                             user_id INTEGER PRIMARY KEY,
                             inventory TEXT)''')
 
+        # One row per item on sale; vendors.items is only read by the migration below
+        cursor.execute('''CREATE TABLE IF NOT EXISTS market_listings (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            vendor_id INTEGER NOT NULL,
+                            name TEXT NOT NULL,
+                            type TEXT,
+                            quality TEXT,
+                            price INTEGER NOT NULL,
+                            attributes TEXT NOT NULL
+                            )''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_listings_vendor ON market_listings(vendor_id, price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_listings_name ON market_listings(name COLLATE NOCASE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_listings_type ON market_listings(type, price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_listings_quality ON market_listings(quality, price)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_listings_price ON market_listings(price)")
+
+        self._migrate_vendor_items(cursor)
+
         conn.commit()
         conn.close()
-        
-        
-    def market_serialize(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
 
-        cursor.execute("SELECT user, name, description, items FROM vendors")
-        result = cursor.fetchall()
-        
-        if not result:
-            return
-        
-        serialized = []
+    @staticmethod
+    def _listing_row(vendor_id, item):
+        return (vendor_id, item['name'], item.get('type'), item.get('quality'),
+                int(item['base_price']), json.dumps(item))
+
+    def _migrate_vendor_items(self, cursor):
+        """Move items stored as a JSON list on each vendor into market_listings."""
+        cursor.execute("SELECT user, items FROM vendors WHERE items IS NOT NULL")
+        for vendor_id, items in cursor.fetchall():
+            try:
+                items = json.loads(items)
+            except json.JSONDecodeError as e:
+                print(f"Skipping unreadable stall for {vendor_id}: {e}")
+                continue
+            cursor.executemany('''INSERT INTO market_listings (vendor_id, name, type, quality, price, attributes)
+                                  VALUES (?, ?, ?, ?, ?, ?)''',
+                               [self._listing_row(vendor_id, item) for item in items or []])
+            cursor.execute("UPDATE vendors SET items = NULL WHERE user = ?", (vendor_id,))
+
+    def invalidate_market(self):
+        self._listing_cache.clear()
+
+    def _cached(self, key, load):
+        if key in self._listing_cache:
+            return self._listing_cache[key]
+        if len(self._listing_cache) >= self.CACHE_SIZE:
+            self._listing_cache.clear()
+        result = self._listing_cache[key] = load()
+        return result
         
-        for x in result:
-            user = x[0]
-            name = x[1]
-            description = x[2]
-            
-            if not x[3]:
-                items = None
-            else:
-                items = json.loads(x[3])
-                
-            block = user, name, description, items
-            serialized.append(block)
+    def market_serialize(self):
+        """Return (user, name, description, listing count) for up to 25 stalls that have items."""
+        def load():
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''SELECT v.user, v.name, v.description, COUNT(l.id)
+                              FROM vendors v JOIN market_listings l ON l.vendor_id = v.user
+                              GROUP BY v.user
+                              ORDER BY COUNT(l.id) DESC
+                              LIMIT 25''')
+            result = cursor.fetchall()
+            conn.close()
+            return result
+
+        return self._cached(("vendors",), load)
+
+    def search_listings(self, vendor_id=None, name=None, type=None, quality=None, max_price=None,
+                        sort='cheapest', page=1, per_page=PER_PAGE):
+        """Return ([(listing id, vendor id, item)], total) for one page of matching listings."""
+        def load():
+            clauses, params = [], []
+            if vendor_id is not None:
+                clauses.append("vendor_id = ?")
+                params.append(vendor_id)
+            if name:
+                clauses.append("name LIKE ? COLLATE NOCASE")
+                params.append(f"%{name}%")
+            if type:
+                clauses.append("type = ?")
+                params.append(type)
+            if quality:
+                clauses.append("quality = ?")
+                params.append(quality)
+            if max_price is not None:
+                clauses.append("price <= ?")
+                params.append(max_price)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM market_listings {where}", params)
+            total = cursor.fetchone()[0]
+            cursor.execute(f"""SELECT id, vendor_id, attributes FROM market_listings {where}
+                               ORDER BY {self.SORTS.get(sort, self.SORTS['cheapest'])}
+                               LIMIT ? OFFSET ?""",
+                           params + [per_page, (page - 1) * per_page])
+            listings = [(listing_id, vendor, json.loads(attributes)) for listing_id, vendor, attributes in cursor.fetchall()]
+            conn.close()
+            return listings, total
 
-                
-        return serialized
+        return self._cached(("listings", vendor_id, name, type, quality, max_price, sort, page, per_page), load)
     
     def market_analyze(self, market):
         user_id = market[0]
         name = market[1]
         description = market[2]
-        items = market[3]
-        username = self.bot.get_user(user_id).display_name
+        item_count = market[3]
+        vendor = self.bot.get_user(user_id)
+        username = vendor.display_name if vendor else "Unknown"
         
-        return user_id, name, description, items, username
+        return user_id, name, description, item_count, username
     
     def get_user_inventory(self, user_id):
         """Retrieve the user's inventory from the database."""
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-
-        #Check if inventotry is empty, then skip if empty. theres definitely a waaaaay better way to do this
-        cursor.execute("SELECT user_id FROM inventory WHERE inventory IS NULL")
-        data = cursor.fetchall()
-        print (data)
-        for id in data:
-            print (id)   
-            if id[0] == user_id:
-                return []
-
-        cursor.execute("SELECT inventory FROM inventory WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-        conn.close()
-
-        return json.loads(result[0]) if result is not 'None' else []
-
-    def update_user_inventory(self, user_id, new_inventory, shop_name):
-        """Update the user's inventory in the database."""
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-
-        cursor.execute("INSERT OR REPLACE INTO inventory (user_id, inventory) VALUES (?, ?)", (user_id, json.dumps(new_inventory)))
-        conn.commit()
-        conn.close()
+        return self.user_manager.get_inventory(user_id)
 
     def get_default_values(self, vendor_id):
         
         conn = sqlite3.connect('discord.db')
         cursor = conn.cursor()
 
-        cursor.execute("SELECT user, name, description, items FROM vendors WHERE user = ?", (vendor_id, ))
+        cursor.execute("SELECT name, description FROM vendors WHERE user = ?", (vendor_id, ))
         x = cursor.fetchone()
+        conn.close()
         
         if not x:
             return "", ""
-        
-        name = x[1]
-        description = x[2]
 
-        return name, description
+        return x[0], x[1]
 
     def add_item_to_vendor(self, vendor_id, item_data):
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT items FROM vendors WHERE user = ?", (vendor_id,))
-        items = cursor.fetchone()
-        
-        if items is None or items[0] is None:
-            new_items = []
-        else:
-            new_items = json.loads(items[0])
+        with self.user_manager.inventory_transaction() as c:
+            c.execute('''INSERT INTO market_listings (vendor_id, name, type, quality, price, attributes)
+                         VALUES (?, ?, ?, ?, ?, ?)''', self._listing_row(vendor_id, item_data))
+        self.invalidate_market()
 
-        new_items.append(item_data)
-            
-        name, description = self.get_default_values(vendor_id)
-        
-        cursor.execute("INSERT OR REPLACE INTO vendors (user, name, description, items) VALUES (?, ?, ?, ?)", (vendor_id, name, description, json.dumps(new_items)))
-        conn.commit()
-        conn.close()
+    def list_item_for_sale(self, vendor_id, item_data, listed_item):
+        """Move an item from the vendor's inventory onto their stall in one transaction."""
+        try:
+            with self.user_manager.inventory_transaction() as c:
+                self.user_manager.take_items(c, vendor_id, [item_data])
+                c.execute('''INSERT INTO market_listings (vendor_id, name, type, quality, price, attributes)
+                             VALUES (?, ?, ?, ?, ?, ?)''', self._listing_row(vendor_id, listed_item))
+        except ValueError as e:
+            print(f"Could not list item: {e}")
+            return False
+        self.invalidate_market()
+        return True
         
-    async def buy_item(self, ctx, item, items, vendor_id, vendor_name, vendor_description):
+    async def buy_item(self, ctx, listing_id, item, vendor_id):
         """Handle the item purchase."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        price = item['base_price']
-
-        # Get the user's stats and check if they have enough coins
-        user_stats = await self.user_manager.fetch_user_stats(ctx.author)
-
-        if user_stats['coins'] < price:
-            await ctx.send("You don't have enough coins to purchase this item.")
-            return
-
-        # Deduct the price from the user's coins
-        await self.user_manager.modify_user_stat(ctx.author, 'coins', (price * -1))
-        
-        # Add coins to vendor user
-        await self.user_manager.modify_user_stat(vendor_id, 'coins', (price))
-
-        # Add the item to the user's inventory
-        user_inventory = self.get_user_inventory(ctx.author.id)
-        user_inventory.append(item)
-        self.update_user_inventory(ctx.author.id, user_inventory, vendor_name)
-
-        # Remove the item from the shop's inventory
-        new_shop_data = list(items)
-        new_shop_data.remove(item)
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        failure = None
 
+        # The listing, coins and the buyer's inventory all change together or not at all
         try:
-            cursor.execute("INSERT OR REPLACE INTO vendors (user, name, description, items) VALUES (?, ?, ?, ?)", (vendor_id, vendor_name, vendor_description, json.dumps(new_shop_data)))
+            with self.user_manager.inventory_transaction() as c:
+                # Deleting the listing claims it, so two buyers can't both take the same item
+                c.execute("DELETE FROM market_listings WHERE id = ? RETURNING price", (listing_id,))
+                row = c.fetchone()
+                if row is None:
+                    failure = "Sorry, that item has already been sold."
+                    raise ValueError(failure)
+                price = row[0]
+
+                c.execute("UPDATE stats SET coins = coins - ? WHERE user_id = ? AND coins >= ?", (price, ctx.author.id, price))
+                if c.rowcount == 0:
+                    failure = "You don't have enough coins to purchase this item."
+                    raise ValueError(failure)
+                c.execute("UPDATE stats SET coins = coins + ? WHERE user_id = ?", (price, vendor_id))
+
+                self.user_manager.stack_items(c, ctx.author.id, [item])
+        except ValueError:
+            await ctx.send(failure)
+            return
         finally:
-            conn.commit()
-            conn.close()
+            self.invalidate_market()
+        self.user_manager.invalidate_player(vendor_id)
             
         vendor_user = self.bot.get_user(vendor_id)
         
@@ -187,7 +236,8 @@ class GoMarket(commands.Cog):
             color=discord.Color.green()
         )
         
-        await vendor_user.send(embed=embed)
+        if vendor_user:
+            await vendor_user.send(embed=embed)
 
         # Display the final page
         final_embed = discord.Embed(
@@ -200,8 +250,8 @@ class GoMarket(commands.Cog):
         
         return final_embed
 
-    async def item_buy(self, ctx, item, market_cog, market, user_data, message):
-        
+    async def item_buy(self, ctx, listing, market_cog, market, user_data, message):
+        listing_id, vendor_id, item = listing
         combined_name = f"*{item.get('prefix', '')}* {item['name']}".strip()
         embed = discord.Embed(title=combined_name, color=discord.Color.blue())
         if item.get('description'):
@@ -224,8 +274,9 @@ class GoMarket(commands.Cog):
             
             @discord.ui.button(label=f"Purchase", style=discord.ButtonStyle.green)
             async def buy_button(self, interaction: discord.Interaction, button: Button):
-                embed = await market_cog.buy_item(ctx, item, market[3], market[0], market[1], market[2])
-                await interaction.response.edit_message(embed=embed, view=None)
+                embed = await market_cog.buy_item(ctx, listing_id, item, vendor_id)
+                if embed:
+                    await interaction.response.edit_message(embed=embed, view=None)
             
             @discord.ui.button(label=f"Back", style=discord.ButtonStyle.red)
             async def back_button(self, interaction: discord.Interaction, button: Button):
@@ -239,39 +290,41 @@ class GoMarket(commands.Cog):
                     
         return embed, view
 
-    def page_embed(self, page, items, name, user_data):
-        total_pages = math.ceil(len(items)/10)
-        
-        # Calculate start index for current page
-        start_index = (page - 1) * 10
+    def page_embed(self, page, listings, total, name, user_data):
+        start_index = (page - 1) * self.PER_PAGE
         description = f"{user_data['profile_name']} has **{user_data['coins']} coins**.\n"
         
-        for i in range(10):
-            if ((i)*page) > (len(items)-1):
-                break
-            if start_index >= len(items):
-                break
-            
-            ic(len(items), i, (i+1)*page)
-            
-            item = items[i]
+        for i, (_, _, item) in enumerate(listings):
             if item.get('prefix'):
                 prefix = f"*{item['prefix']}* "
             else:
                 prefix = ""
-            description += f"{i}. {prefix}{item['name']} - `{item['base_price']}` coins\n" 
+            description += f"{start_index + i + 1}. {prefix}{item['name']} - `{item['base_price']}` coins\n" 
 
         embed = discord.Embed(title=f"*{name}* - Page {page}", description=description, color=0xFEBA17)
-        embed.set_footer(text=f"Items {start_index+1}-{min(start_index+10, len(items))} of {len(items)}")
+        embed.set_footer(text=f"Items {start_index+1}-{start_index+len(listings)} of {total}")
         
         return embed
     
-    def market_comb(self, ctx, market, market_cog, page, user_data, message):
-        user, name, description, items, username = self.market_analyze(market)
-        start_index = (page - 1) * 10
-        total_pages = math.ceil(len(items)/10)
+    def market_comb(self, ctx, market, market_cog, page, user_data, message, sort='cheapest'):
+        user, name, description, item_count, username = self.market_analyze(market)
+        start_index = (page - 1) * self.PER_PAGE
+        # Only this page is read from the database
+        items, total = self.search_listings(vendor_id=user, sort=sort, page=page)
+        total_pages = max(1, math.ceil(total/self.PER_PAGE))
+
+        embed = self.page_embed(page, items, total, name, user_data)
 
-        embed = self.page_embed(page, items, name, user_data)
+        class SortSelect(Select):
+            def __init__(self):
+                super().__init__(placeholder="Sort by...", min_values=1, max_values=1, row=3, options=[
+                    SelectOption(label=label.title(), value=label, default=(label == sort))
+                    for label in market_cog.SORTS
+                ])
+
+            async def callback(self, interaction: discord.Interaction):
+                embed, view = market_cog.market_comb(ctx, market, market_cog, 1, user_data, message, self.values[0])
+                await interaction.response.edit_message(embed=embed, view=view)
         
         class MarketView(View):
             def __init__(self, ctx, market_cog, items, page):
@@ -283,62 +336,62 @@ class GoMarket(commands.Cog):
             
             @discord.ui.button(label=f"{start_index+1}", style=discord.ButtonStyle.grey)
             async def first_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[0], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+2}", style=discord.ButtonStyle.grey)
             async def second_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+1], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[1], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+3}", style=discord.ButtonStyle.grey)
             async def third_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+2], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[2], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+4}", style=discord.ButtonStyle.grey)
             async def fourth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+3], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[3], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+5}", style=discord.ButtonStyle.grey)
             async def fifth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+4], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[4], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+6}", style=discord.ButtonStyle.grey)
             async def sixth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+5], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[5], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+7}", style=discord.ButtonStyle.grey)
             async def seventh_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+6], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[6], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+8}", style=discord.ButtonStyle.grey)
             async def eighth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+7], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[7], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+9}", style=discord.ButtonStyle.grey)
             async def ninth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+8], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[8], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"{start_index+10}", style=discord.ButtonStyle.grey)
             async def tenth_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = await self.market_cog.item_buy(ctx, items[start_index+9], market_cog, market, user_data, message)
+                embed, view = await self.market_cog.item_buy(ctx, items[9], market_cog, market, user_data, message)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"Previous", style=discord.ButtonStyle.grey)
             async def prev_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = self.market_cog.market_comb(ctx, market, market_cog, page-1, user_data, message)
+                embed, view = self.market_cog.market_comb(ctx, market, market_cog, page-1, user_data, message, sort)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"Next", style=discord.ButtonStyle.grey)
             async def next_button(self, interaction: discord.Interaction, button: Button):
-                embed, view = self.market_cog.market_comb(ctx, market, market_cog, page+1, user_data, message)
+                embed, view = self.market_cog.market_comb(ctx, market, market_cog, page+1, user_data, message, sort)
                 await interaction.response.edit_message(embed=embed, view=view)
         
             @discord.ui.button(label=f"Back", style=discord.ButtonStyle.red)
@@ -347,6 +400,7 @@ class GoMarket(commands.Cog):
                 await interaction.response.edit_message(embed=embed, view=view)
         
         view = MarketView(ctx, market_cog, items, page)
+        view.add_item(SortSelect())
         
         # Enable/disable buttons based on available items
         buttons = [
@@ -363,12 +417,11 @@ class GoMarket(commands.Cog):
         ]
         
         for index, button in enumerate(buttons):
-            item_index = start_index + index
-            button.disabled = False if item_index < len(items) else True
+            button.disabled = index >= len(items)
             
         if page == 1:
             view.prev_button.disabled = True
-        if page == total_pages:
+        if page >= total_pages:
             view.next_button.disabled = True
     
         return embed, view
@@ -491,18 +544,21 @@ class GoMarket(commands.Cog):
                 
                 # Process the item sale here
                 item = self.user_data['inventory'][self.item_index]
-                item['base_price'] = sell_value
+                listed_item = dict(item, base_price=sell_value)
+
+                # Remove item from the user's inventory and add to vendor
+                if not self.market_cog.list_item_for_sale(interaction.user.id, item, listed_item):
+                    await interaction.response.edit_message(embed=discord.Embed(
+                        title=f"{self.user_data['profile_name']} no longer has the {item['name']}!",
+                        color=discord.Color.red()), view=None)
+                    return
 
                 embed = discord.Embed(
-                    title=f"{self.user_data['profile_name']} put the {item['name']} up for sale for {item['base_price']} coins! You've made the stall happy :)", 
+                    title=f"{self.user_data['profile_name']} put the {item['name']} up for sale for {listed_item['base_price']} coins! You've made the stall happy :)", 
                     color=0xFF8250, 
                     description=""
                 )
                 
-                # Remove item from the user's inventory and add to vendor
-                self.market_cog.add_item_to_vendor(interaction.user.id, item)
-                user_manager.remove_from_user_inventory(interaction.user.id, item)
-                
                 await interaction.response.edit_message(embed=embed, view=None)
                 
         class SellValue(TextInput):
@@ -573,6 +629,24 @@ class GoMarket(commands.Cog):
         else:
             return False
 
+    @commands.command()
+    async def market_search(self, ctx, *, query: str):
+        """Find the cheapest listings across every stall whose item name matches ``query``."""
+        listings, total = self.search_listings(name=query, page=1)
+        if not listings:
+            await ctx.send(f"Nobody is selling anything called '{query}' right now.")
+            return
+
+        description = ""
+        for _, vendor_id, item in listings:
+            vendor = self.bot.get_user(vendor_id)
+            prefix = f"*{item['prefix']}* " if item.get('prefix') else ""
+            description += f"{prefix}{item['name']} - `{item['base_price']}` coins ({vendor.display_name if vendor else 'Unknown'}'s Shop)\n"
+
+        embed = discord.Embed(title=f"Market listings matching '{query}'", description=description, color=0xFEBA17)
+        embed.set_footer(text=f"Showing {len(listings)} of {total}, cheapest first")
+        await ctx.send(embed=embed)
+
     async def market_overview_embed(self, ctx, market_cog, user_data, message):
         embed = discord.Embed(title="Market Overview", 
                               description="Coming up over the hill, a quaint market comes into view. The early morning sun reflected off the colorful glass trinkets and cups, giving the area pleasant, ethereal lighting. The morning dew cooled the air, making it a perfect day to browse the wares.\n\nApproaching closer to the market ,it becomes evident that the stalls are handmade by the vendors. The wooden beams are varied in size and distance, and the canopies - though beautifully differed in color - were also varied in quality and type of material. However, whether faded or new, it was clear each canopy was made with love.", 
@@ -601,7 +675,7 @@ class GoMarket(commands.Cog):
             if market_cog.if_user_has_stall(ctx):
                 @discord.ui.button(label="Add Items to Stall", style=discord.ButtonStyle.grey)
                 async def manage_button(self, interaction: discord.Interaction, button: Button):
-                    if user_data['inventory'] == 'empty':
+                    if not user_data['inventory']:
                         await interaction.response.send_message(embed=discord.Embed(title=f"{user_data['profile_name']} has no items to put up for sale!", color=discord.Color.red()), ephemeral=True)
                     else:
                         embed, view = await market_cog.sell_item_view(ctx, market_cog, user_data)
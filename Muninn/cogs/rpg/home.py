@@ -3,11 +3,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button
-import json
-from icecream import ic
-import os
 import math
-import yaml
 
 
 class Home(commands.Cog):
@@ -18,6 +14,10 @@ class Home(commands.Cog):
         self.item_manager = bot.get_cog("ItemRandomizer")
         self.bot = bot
 
+    @property
+    def crafting(self):
+        return self.bot.get_cog("Crafting")
+
     @commands.hybrid_command(name="home", description="Rest and relax, or make some new items")
     async def home(self, interaction):
          
@@ -28,8 +28,7 @@ class Home(commands.Cog):
         
         user_stats = await self.user_manager.fetch_user_stats(user)
 
-        embed_color, avatar_image, has_custom_image = await self.utils.get_avatar_color_and_image(user)
-        pfpfile = discord.File(f"/usr/src/bot/profile_images/{interaction.author.id}.png", filename="image.png") if has_custom_image else None
+        embed_color = (await self.utils.get_profile_assets(user)).color
 
         home_embed = discord.Embed(
             title=f"{user.display_name}'s Home",
@@ -37,113 +36,61 @@ class Home(commands.Cog):
             color=embed_color
         )
             
-        # Inventory page embed
-        user_inventory = user_stats['inventory']
-        if not user_inventory:  # Handle empty or None inventory
-            user_inventory = []
-        elif isinstance(user_inventory, str):
-            try:
-                user_inventory = json.loads(user_inventory)  # Deserialize if it's a JSON string
-            except json.JSONDecodeError:
-                user_inventory = []  # Default to an empty list if JSON parsing fails
-        elif not isinstance(user_inventory, list):
-            user_inventory = []  # Default to an empty list if it's neither a string nor a list
-
-        # Increment item counters for every item that is found
-        parsed_inventory = {}
-        for item in user_inventory:
-            item_name = item['name']
-            item_in_inventory = parsed_inventory.get(item_name)
-            
-            if not item_in_inventory:
-                parsed_inventory[item_name] = 1
-            else:
-                parsed_inventory[item_name] += 1
-                
-        ic(parsed_inventory)
+        # Item counts are read once for this view and refreshed after each craft
+        item_counts = self.user_manager.count_items_by_name(user.id)
+        crafting = self.crafting
                 
         async def get_crafting_items(user_stats,):
-            # Inventory page embed
-            user_inventory = user_stats['inventory']
-            if not user_inventory:  # Handle empty or None inventory
-                user_inventory = []
-            elif isinstance(user_inventory, str):
-                try:
-                    user_inventory = json.loads(user_inventory)  # Deserialize if it's a JSON string
-                except json.JSONDecodeError:
-                    user_inventory = []  # Default to an empty list if JSON parsing fails
-            elif not isinstance(user_inventory, list):
-                user_inventory = []  # Default to an empty list if it's neither a string nor a list
-
-            # Increment item counters for every item that is found
-            parsed_inventory = {}
-            for item in user_inventory:
-                item_name = item['name']
-                item_in_inventory = parsed_inventory.get(item_name)
-                
-                if not item_in_inventory:
-                    parsed_inventory[item_name] = 1
-                else:
-                    parsed_inventory[item_name] += 1
-            
             inventory_embed = discord.Embed(title=f"Crafting Item Chest", color=discord.Color.yellow(), description="")
             
-            ic(parsed_inventory)
-            
-            if parsed_inventory != {}:
-                for key, value in parsed_inventory.items():
+            if item_counts:
+                for key, value in item_counts.items():
                     inventory_embed.description += f"**`{value}`** {key}\n"
             else:
                 inventory_embed.description = "Your crafting item chest is empty."
             return inventory_embed
 
-        async def craft_item(recipe, user_id, ctx):         
-            ##Generate the item...
-            generated_item = await self.item_manager.generate_item(recipe['type'], recipe['name'])
-            
-            ## First, remove the items to craft
-            for item in recipe['recipe']:
-                amount_to_remove = item['amount']
-                item_name = item['name']
-                removed = 0
-
-                for index in reversed(range(len(user_stats['inventory']))):
-                    inv_item = user_stats['inventory'][index]
-                    if inv_item['name'] == item_name:
-                        # Use the actual item data from the user_stats inventory instead of fetching by index
-                        item_data = inv_item
-                        self.user_manager.remove_from_user_inventory(user_id, item_data)
-                        removed += 1
-                        if removed >= amount_to_remove:
-                            break
+        async def craft_item(recipe, user_id, ctx, quantity=1):         
+            ## Generate the items, remove the ingredients and add the results in one transaction
+            generated_items = await crafting.craft(user_id, recipe, quantity)
+            if not generated_items:
+                return discord.Embed(title=f"Could not craft {recipe['name']}!",
+                                     description="You no longer have all the required items.",
+                                     color=discord.Color.red())
 
-            ##Then add to inventory
-            self.user_manager.add_to_user_inventory(user_id, generated_item)
+            item_counts.clear()
+            item_counts.update(self.user_manager.count_items_by_name(user_id))
             
             ##Give Experience if Applicable
             proficiency = recipe.get('skill')
             if proficiency:
-                await self.user_manager.proficency_increase(interaction.author, proficiency, 1, ctx)
+                await self.user_manager.proficency_increase(interaction.author, proficiency, quantity, ctx)
             
-            if generated_item.get('prefix'):
-                prefix = f"*{generated_item.get('prefix')}* "
-            else:
-                prefix = ""
+            crafted = []
+            for generated_item in generated_items:
+                if generated_item.get('prefix'):
+                    crafted.append(f"*{generated_item.get('prefix')}* {generated_item['name']}")
+                else:
+                    crafted.append(generated_item['name'])
             
-            embed = discord.Embed(title=f"Successfully crafted {recipe['name']}!",
-                                  description=f"{prefix}{generated_item['name']} crafted.".strip(),
+            embed = discord.Embed(title=f"Successfully crafted {recipe['name']}!" if quantity == 1 else f"Successfully crafted {quantity} {recipe['name']}!",
+                                  description="\n".join(f"{name} crafted." for name in crafted),
                                   color=0x7B12B4)
             
             if proficiency:
-                embed.description += f"\n\nIncreased `{proficiency}` proficiency by `1`!"
+                embed.description += f"\n\nIncreased `{proficiency}` proficiency by `{quantity}`!"
             return embed
             
+        proficiencies = {}
+
         async def skill_unlocks(recipe, user_id):
             if not recipe.get('skill_level') or not recipe.get('required_skill'):
                 return True
             
             skill = recipe['required_skill']
-            user_proficiency = await self.user_manager.get_users_proficiency_by_id(user_id, skill)
+            if skill not in proficiencies:
+                proficiencies[skill] = await self.user_manager.get_users_proficiency_by_id(user_id, skill)
+            user_proficiency = proficiencies[skill]
             needed_proficiency = recipe['skill_level']
             
             if user_proficiency < needed_proficiency:
@@ -152,22 +99,10 @@ class Home(commands.Cog):
             
         async def build_recipe_embed(user_stats, recipe, recipes, ctx):
             got_items_str = ""
-            craftable = True
+            most = crafting.index.craftable(item_counts).get(recipe['name'].lower(), 0)
 
-            for item in recipe['recipe']:
-                item_data = await self.item_manager.generate_item("crafting", item['name'])
-                inv_count = 0
-                
-                if len(user_stats['inventory']) > 0:
-                    for inv_item in user_stats['inventory']:
-                        if inv_item['name'] == item['name']:
-                            inv_count += 1
-                else:
-                    inv_count = 0
-               
-                got_items_str += f"**`{item['amount']}`** {item['name']} *(Have `{inv_count}`)*\n"
-                if inv_count < item['amount']:
-                    craftable = False
+            for name, amount in crafting.ingredients_for(recipe).items():
+                got_items_str += f"**`{amount}`** {name} *(Have `{item_counts.get(name, 0)}`)*\n"
                     
             recipe_data = await self.data_manager.find_data(recipe['type'], recipe['name'])
                     
@@ -175,6 +110,8 @@ class Home(commands.Cog):
                                          description=recipe_data.get('description'),
                                          color=0x3617FE)
             recipe_embed.add_field(name="Required Items:", value=got_items_str)
+            if most:
+                recipe_embed.set_footer(text=f"You can craft {most}")
             
             class CraftView(View):
                 def __init__(self):
@@ -184,6 +121,11 @@ class Home(commands.Cog):
                 async def craft_button(self, interaction: discord.Interaction, button: Button):
                     embed = await craft_item(recipe, interaction.user.id, ctx)
                     await interaction.response.edit_message(embed=embed, view=None)  
+
+                @discord.ui.button(label=f"Craft {max(most, 1)}", style=discord.ButtonStyle.blurple)
+                async def craft_max_button(self, interaction: discord.Interaction, button: Button):
+                    embed = await craft_item(recipe, interaction.user.id, ctx, most)
+                    await interaction.response.edit_message(embed=embed, view=None)  
             
                 @discord.ui.button(label=f"Cancel", style=discord.ButtonStyle.grey)
                 async def cancel_button(self, interaction: discord.Interaction, button: Button):
@@ -192,8 +134,10 @@ class Home(commands.Cog):
             
             view = CraftView()
             
-            if not craftable:
+            if not most:
                 view.craft_button.disabled = True
+            if most < 2:
+                view.remove_item(view.craft_max_button)
             
             return recipe_embed, view
         
@@ -224,6 +168,8 @@ class Home(commands.Cog):
             start_index = (page - 1) * 10
             description = ""
             
+            craftable = crafting.index.craftable(item_counts)
+
             # Display recipes for current page
             for i in range(10):
                 recipe_index = start_index + i
@@ -236,7 +182,9 @@ class Home(commands.Cog):
                                 
                 if locked:
                     description += f"{recipe_index+1}. {recipe['name']} `Cannot Craft: Requires {recipe['required_skill'].title()} {recipe['skill_level']}`\n"
-                elif not locked:
+                elif craftable.get(recipe['name'].lower()):
+                    description += f"{recipe_index+1}. {recipe['name']} *(Can craft `{craftable[recipe['name'].lower()]}`)*\n"
+                else:
                     description += f"{recipe_index+1}. {recipe['name']}\n"
 
             embed = discord.Embed(title=f"{user_stats['profile_name']}'s Tinker Book - Page {page}/{total_pages}", description=description, color=0x1777FE)
@@ -279,31 +227,31 @@ class Home(commands.Cog):
             
                 @discord.ui.button(label=f"{start_index+6}", style=discord.ButtonStyle.grey)
                 async def sixth_button(self, interaction: discord.Interaction, button: Button):
-                    if start_index + 4 < len(recipes):
+                    if start_index + 5 < len(recipes):
                         embed, view = await build_recipe_embed(user_stats, recipes[start_index+5], recipes, ctx)
                         await interaction.response.edit_message(embed=embed, view=view)
             
                 @discord.ui.button(label=f"{start_index+7}", style=discord.ButtonStyle.grey)
                 async def seventh_button(self, interaction: discord.Interaction, button: Button):
-                    if start_index + 4 < len(recipes):
+                    if start_index + 6 < len(recipes):
                         embed, view = await build_recipe_embed(user_stats, recipes[start_index+6], recipes, ctx)
                         await interaction.response.edit_message(embed=embed, view=view)
             
                 @discord.ui.button(label=f"{start_index+8}", style=discord.ButtonStyle.grey)
                 async def eighth_button(self, interaction: discord.Interaction, button: Button):
-                    if start_index + 4 < len(recipes):
+                    if start_index + 7 < len(recipes):
                         embed, view = await build_recipe_embed(user_stats, recipes[start_index+7], recipes, ctx)
                         await interaction.response.edit_message(embed=embed, view=view)
             
                 @discord.ui.button(label=f"{start_index+9}", style=discord.ButtonStyle.grey)
                 async def ninth_button(self, interaction: discord.Interaction, button: Button):
-                    if start_index + 4 < len(recipes):
+                    if start_index + 8 < len(recipes):
                         embed, view = await build_recipe_embed(user_stats, recipes[start_index+8], recipes, ctx)
                         await interaction.response.edit_message(embed=embed, view=view)
             
                 @discord.ui.button(label=f"{start_index+10}", style=discord.ButtonStyle.grey)
                 async def tenth_button(self, interaction: discord.Interaction, button: Button):
-                    if start_index + 4 < len(recipes):
+                    if start_index + 9 < len(recipes):
                         embed, view = await build_recipe_embed(user_stats, recipes[start_index+9], recipes, ctx)
                         await interaction.response.edit_message(embed=embed, view=view)
             
@@ -351,25 +299,10 @@ class Home(commands.Cog):
         
             return embed, view
         
-        datapath = './data/recipes'
         unifieddata = []
-        
-        for dirpath, _, filenames in os.walk(datapath):
-            for file in filenames:
-                if file.endswith(".json") or file.endswith(".yaml"):
-                    file_path = os.path.join(dirpath, file)
-                    with open(file_path, 'r') as f:
-                        try:
-                            data = yaml.safe_load(f)
-                            if await skill_unlocks(data, interaction.author.id):
-                                unifieddata.append(data)
-                                print("Added recipe!")
-                            else:     
-                                data['locked'] = True
-                                unifieddata.append(data)   
-                                print("Added locked recipe!")                          
-                        except json.JSONDecodeError as e:
-                            print(f"Skipping invalid JSON: {file_path}, {e}")
+        for recipe in crafting.index.recipes:
+            # Copied so the per-user lock flag doesn't leak into the shared index
+            unifieddata.append(dict(recipe, locked=not await skill_unlocks(recipe, interaction.author.id)))
                          
         user_stats = await self.user_manager.fetch_user_stats(interaction.author)
         embed, crafting_view = build_page_embed(user_stats, 1, unifieddata, interaction)
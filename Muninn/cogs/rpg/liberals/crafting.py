@@ -0,0 +1,92 @@
+from discord.ext import commands
+from collections import defaultdict
+
+class RecipeIndex:
+    """Recipes from the game data registry, indexed by ingredient name."""
+
+    def __init__(self, recipes):
+        self.recipes = sorted(recipes, key=lambda recipe: str(recipe['name']).lower())
+        self.by_name = {str(recipe['name']).lower(): recipe for recipe in self.recipes}
+        # recipe name -> ((ingredient, amount), ...) with duplicate ingredients merged
+        self.requirements = {}
+        # ingredient -> names of the recipes that use it
+        self.by_ingredient = defaultdict(list)
+        # Recipes that need nothing, so are always craftable
+        self.free = []
+
+        for recipe in self.recipes:
+            needed = defaultdict(int)
+            for ingredient in recipe.get('recipe') or []:
+                needed[ingredient['name']] += ingredient['amount']
+            key = str(recipe['name']).lower()
+            # An amount of 0 needs nothing, so it doesn't limit the recipe
+            self.requirements[key] = tuple((name, amount) for name, amount in needed.items() if amount > 0)
+            if not self.requirements[key]:
+                self.free.append(key)
+            for ingredient, _ in self.requirements[key]:
+                self.by_ingredient[ingredient].append(key)
+
+    def craftable(self, counts):
+        """Return ``{recipe name: max craftable}`` for every recipe ``counts`` can make at least once.
+
+        ``counts`` is ``{item name: quantity}``. Only recipes that use an item the
+        user actually holds are looked at. Recipes that need nothing can always
+        be made once.
+        """
+        hits = defaultdict(int)
+        for item_name, quantity in counts.items():
+            if quantity <= 0:
+                continue
+            for recipe_name in self.by_ingredient.get(item_name, ()):
+                hits[recipe_name] += 1
+
+        result = {recipe_name: 1 for recipe_name in self.free}
+        for recipe_name, matched in hits.items():
+            requirements = self.requirements[recipe_name]
+            if matched < len(requirements):
+                continue
+            most = min(counts[name] // amount for name, amount in requirements)
+            if most > 0:
+                result[recipe_name] = most
+        return result
+
+class Crafting(commands.Cog):
+    """Recipe lookups and crafting, rebuilt whenever the game data registry changes."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._index = None
+        self._index_version = None
+
+    @property
+    def data_manager(self):
+        return self.bot.get_cog("DataManager")
+
+    @property
+    def index(self):
+        entries = self.data_manager.get_entries('recipes')  # Also picks up edited files
+        if self._index is None or self._index_version != self.data_manager.version:
+            self._index = RecipeIndex(entries)
+            self._index_version = self.data_manager.version
+        return self._index
+
+    def ingredients_for(self, recipe, quantity: int = 1):
+        """Return ``{item name: amount}`` needed to craft ``recipe`` ``quantity`` times."""
+        return {name: amount * quantity for name, amount in self.index.requirements[str(recipe['name']).lower()]}
+
+    async def craft(self, user_id, recipe, quantity: int = 1):
+        """Craft ``quantity`` of a recipe in one transaction. Returns the crafted items, or None."""
+        item_randomizer = self.bot.get_cog("ItemRandomizer")
+        user_manager = self.bot.get_cog("StatsManager")
+
+        # Each crafted item rolls its own rarity
+        products = [await item_randomizer.generate_item(recipe['type'], recipe['name']) for _ in range(quantity)]
+        if any(product is None for product in products):
+            return None
+
+        if not user_manager.craft_items(user_id, self.ingredients_for(recipe, quantity), products):
+            return None
+        return products
+
+async def setup(bot):
+    await bot.add_cog(Crafting(bot))
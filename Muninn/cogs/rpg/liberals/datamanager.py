@@ -1,71 +1,211 @@
 import discord
 from discord.ext import commands
+import copy
 import json
+import random
+import time
 import yaml
 from icecream import ic
 import os
 
 class DataManager(commands.Cog):
+    """Game data registry.
+
+    All YAML/JSON game data is parsed once into per-type dictionaries keyed by
+    lowercased name. File mtimes are re-checked at most every
+    ``RELOAD_CHECK_INTERVAL`` seconds and only changed files are re-parsed, so
+    edits to ``./data`` show up without a restart.
+
+    Callers get copies of the stored data, since several of them (e.g.
+    ``ItemRandomizer.generate_item``) modify the dict they receive.
+    """
+
+    DATA_PATHS = {
+        'crafting': './data/items/crafting',
+        'equipment': './data/items/equipment',
+        'single_use': './data/items/single_use',
+        'jobs': './data/locations/jobs',
+        'item_gathering': './data/locations/item_gathering',
+        'recipes': './data/recipes',
+    }
+    # Types that are the union of other types
+    COMPOSITE_TYPES = {
+        'items': ('crafting', 'equipment', 'single_use'),
+    }
+    RELOAD_CHECK_INTERVAL = 2.0
+
     def __init__(self, bot):
         self.bot = bot
+        self._files = {}  # file path -> (data type, mtime, parsed data)
+        self._registry = {data_type: {} for data_type in self.DATA_PATHS}  # type -> lowercase name -> data
+        self._last_check = 0.0
+        # Bumped whenever any data changes so dependants (e.g. samplers) know to rebuild
+        self.version = 0
+        self._refresh(force=True)
+
+    # ----- Loading -----
+
+    @staticmethod
+    def _read_file(file_path):
+        with open(file_path, 'r') as f:
+            try:
+                return yaml.safe_load(f)
+            except (yaml.YAMLError, json.JSONDecodeError) as e:
+                print(f"Skipping invalid data file: {file_path}, {e}")
+                return None
+
+    def _scan(self):
+        """Map every data file on disk to its (data type, mtime) without parsing it."""
+        found = {}
+        for data_type, datapath in self.DATA_PATHS.items():
+            for dirpath, _, filenames in os.walk(datapath):
+                for file in filenames:
+                    if file.endswith(".json") or file.endswith(".yaml"):
+                        file_path = os.path.join(dirpath, file)
+                        try:
+                            found[file_path] = (data_type, os.path.getmtime(file_path))
+                        except OSError:
+                            continue
+        return found
+
+    def _refresh(self, force: bool = False):
+        """Re-parse files whose mtime changed since the last check."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+
+        on_disk = self._scan()
+        changed = False
+        for file_path in list(self._files):
+            if file_path not in on_disk:
+                del self._files[file_path]
+                changed = True
+        for file_path, (data_type, mtime) in on_disk.items():
+            cached = self._files.get(file_path)
+            if cached and cached[1] == mtime:
+                continue
+            self._files[file_path] = (data_type, mtime, self._read_file(file_path))
+            changed = True
+
+        if changed:
+            self._rebuild_registry()
+
+    def _rebuild_registry(self):
+        registry = {data_type: {} for data_type in self.DATA_PATHS}
+        for file_path in sorted(self._files):
+            data_type, _, data = self._files[file_path]
+            if not isinstance(data, dict) or 'name' not in data:
+                continue
+            registry[data_type].setdefault(str(data['name']).lower(), data)
+        self._registry = registry
+        self.version += 1
+        print(f"Loaded game data (version {self.version}): " +
+              ", ".join(f"{t}={len(entries)}" for t, entries in registry.items()))
+
+    def _types_for(self, data_type: str):
+        if data_type in self.COMPOSITE_TYPES:
+            return self.COMPOSITE_TYPES[data_type]
+        if data_type in self.DATA_PATHS:
+            return (data_type,)
+        return None
+
+    # ----- Lookups -----
+
+    def get_entries(self, data_type: str):
+        """Return the stored (uncopied) entries of a type; callers must not modify them."""
+        self._refresh()
+        types = self._types_for(data_type)
+        if types is None:
+            return []
+        return [data for t in types for data in self._registry[t].values()]
 
     ## Returns all data of a certain type
     async def get_data_of_type(self, data_type: str = None):
-        print('Getting data of type...')
         if data_type is None:
             return None
 
-        unifieddata = []
-
-        if data_type == 'items':
-            datapath = f'./data/items'
-        elif data_type in ('crafting', 'equipment', 'single_use'):
-            datapath = f'./data/items/{data_type}'
-        elif data_type in ('jobs', 'item_gathering'):
-            datapath = f'./data/locations/{data_type}'
-        elif data_type in ('recipes'):
-            datapath = f'./data/{data_type}'
-        else: 
+        if self._types_for(data_type) is None:
             print(f"ERROR: Data type {data_type} not found")
             return
 
-        for dirpath, _, filenames in os.walk(datapath):
-            for file in filenames:
-                if file.endswith(".json") or file.endswith(".yaml"):
-                    file_path = os.path.join(dirpath, file)
-                    with open(file_path, 'r') as f:
-                        try:
-                            data = yaml.safe_load(f)
-                            unifieddata.append(data)
-                        except json.JSONDecodeError as e:
-                            print(f"Skipping invalid JSON: {file_path}, {e}")
+        return copy.deepcopy(self.get_entries(data_type))
+
+    def _lookup(self, types, item: str):
+        key = str(item).lower()
+        for data_type in types:
+            got_item = self._registry[data_type].get(key)
+            if got_item is not None:
+                return got_item
+        return None
 
-        return unifieddata
-    
     ## Finds One Item within One Dataset
     async def find_data(self, type: str, item: str):
-        print('Finding item in data...')
-        item_data = await self.get_data_of_type(type)
-        try:
-            for got_item in item_data:
-                if got_item["name"].lower() == item.lower():
-                    ic("find_data result", type, got_item['name'])
-                    return got_item
-                
-            
-        except Exception as e:
-            print(f'ERROR - Could not find item in database: {e}')  
+        self._refresh()
+        types = self._types_for(type)
+        if types is None:
+            print(f"ERROR: Data type {type} not found")
             return None
-        
+
+        got_item = self._lookup(types, item)
+        if got_item is not None:
+            ic("find_data result", type, got_item['name'])
+            return copy.deepcopy(got_item)
+
         print(f"Unable to find item {item}")
 
     @commands.command()
     @commands.is_owner()
-    async def debug_data(self, data_type):
-        data = await self.get_data(data_type)
+    async def debug_data(self, ctx, data_type):
+        data = await self.get_data_of_type(data_type)
         print(data)
-    
-    
+
+    @commands.command()
+    @commands.is_owner()
+    async def bench_expedition(self, ctx, location: str = None, rolls: int = 20):
+        """Time an expedition's item lookups by re-reading data from disk vs. the registry."""
+        locations = self.get_entries('item_gathering')
+        if location:
+            locations = [l for l in locations if l['name'].lower() == location.lower()]
+        if not locations:
+            await ctx.send("No gathering location found.")
+            return
+        pool = locations[0].get('item_pool', [])
+
+        def disk_lookup(data_type, name):
+            # Equivalent of the old per-call os.walk + YAML parse + linear scan
+            for file_path in self._scan():
+                if self._files.get(file_path, (None,))[0] not in self._types_for(data_type):
+                    continue
+                data = self._read_file(file_path)
+                if isinstance(data, dict) and str(data.get('name', '')).lower() == name.lower():
+                    return data
+            return None
+
+        def roll(lookup, rng):
+            for item in pool:
+                if rng.random() < item['chance_to_appear']:
+                    lookup(item['type'], item['name'])
+
+        start = time.perf_counter()
+        rng = random.Random(0)  # Same rolls for both runs
+        for _ in range(rolls):
+            roll(disk_lookup, rng)
+        before = (time.perf_counter() - start) / rolls
+
+        start = time.perf_counter()
+        rng = random.Random(0)
+        for _ in range(rolls):
+            roll(lambda t, n: copy.deepcopy(self._lookup(self._types_for(t), n)), rng)
+        after = (time.perf_counter() - start) / rolls
+
+        speedup = before / after if after else float('inf')
+        await ctx.send(
+            f"**{locations[0]['name']}** ({len(pool)} items in pool, {rolls} rolls)\n"
+            f"Disk scan: {before * 1000:.2f} ms/roll\n"
+            f"Registry: {after * 1000:.3f} ms/roll\n"
+            f"Speedup: {speedup:.0f}x"
+        )
 
 async def setup(bot):
     await bot.add_cog(DataManager(bot))
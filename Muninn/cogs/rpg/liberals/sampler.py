@@ -0,0 +1,118 @@
+from discord.ext import commands
+import json
+import os
+import random
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) to build, O(1) per weighted draw."""
+
+    def __init__(self, items, weights):
+        if len(items) != len(weights) or not items:
+            raise ValueError("Alias table needs one positive weight per item")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("Alias table weights must sum to a positive value")
+
+        n = len(items)
+        self.items = list(items)
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1.0 up to float rounding
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng: random.Random, k: int = 1):
+        """Draw ``k`` items with replacement."""
+        n = len(self.items)
+        results = []
+        for _ in range(k):
+            i = int(rng.random() * n)
+            results.append(self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]])
+        return results
+
+class Sampler(commands.Cog):
+    """Weighted sampling for item generation.
+
+    Alias tables are built once per item pool and per rarity table and only
+    rebuilt when the game data registry or ``rarities.json`` changes. All draws
+    go through ``self.rng`` so tests can make them reproducible with ``seed``.
+    """
+
+    RARITIES_PATH = "rarities.json"
+
+    def __init__(self, bot, seed=None):
+        self.bot = bot
+        self.rng = random.Random(seed)
+        self._tables = {}  # cache key -> (source version, AliasTable)
+        self._rarities_mtime = None
+
+    def seed(self, value):
+        self.rng.seed(value)
+
+    @property
+    def data_manager(self):
+        return self.bot.get_cog("DataManager")
+
+    def _get_table(self, key, version, build):
+        cached = self._tables.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+        table = build()
+        self._tables[key] = (version, table)
+        return table
+
+    # ----- Rarities -----
+
+    def _rarity_table(self):
+        mtime = os.path.getmtime(self.RARITIES_PATH)
+
+        def build():
+            with open(self.RARITIES_PATH, "r") as f:
+                rarities = json.load(f)
+            return AliasTable(rarities, [r['chance'] for r in rarities])
+
+        return self._get_table("rarities", mtime, build)
+
+    def draw_rarities(self, k: int = 1):
+        """Draw ``k`` rarity entries from ``rarities.json`` weighted by ``chance``."""
+        return self._rarity_table().sample(self.rng, k)
+
+    def draw_rarity(self):
+        return self.draw_rarities(1)[0]
+
+    # ----- Item pools -----
+
+    def draw_from_pool(self, pool: list, k: int = 1, weight_key: str = 'weight'):
+        """Draw ``k`` entries from a location/activity pool weighted by ``weight_key``.
+
+        The table is cached per pool contents (each entry's name and weight), so
+        edited or in-code pools get their own table. It holds indices into the
+        pool, so the caller always gets back its own entry dicts.
+        """
+        key = ("pool", weight_key, tuple((entry['name'], entry[weight_key]) for entry in pool))
+        table = self._get_table(key, None, lambda: AliasTable(range(len(pool)), [entry[weight_key] for entry in pool]))
+        return [pool[i] for i in table.sample(self.rng, k)]
+
+    def draw_catalogue_items(self, category: str = 'any', k: int = 1):
+        """Draw ``k`` catalogue items weighted by ``1/sqrt(base_price)`` (cheaper is more common)."""
+        data_manager = self.data_manager
+        data_type = 'items' if category == 'any' else category
+
+        def build():
+            items = [item for item in data_manager.get_entries(data_type) if item.get('base_price')]
+            return AliasTable(items, [1 / (item['base_price'] ** 0.5) for item in items])
+
+        return self._get_table(("catalogue", data_type), data_manager.version, build).sample(self.rng, k)
+
+async def setup(bot):
+    await bot.add_cog(Sampler(bot))
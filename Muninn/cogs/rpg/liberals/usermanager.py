@@ -8,54 +8,382 @@ import random
 import math
 import time
 import asyncio
+import hashlib
+import ast
+import contextvars
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace, fields
+from typing import Any, ClassVar, Optional
+
+# Name of the command currently being handled, for per-command query counts
+current_command = contextvars.ContextVar("current_command", default="other")
+
+@dataclass(slots=True)
+class PlayerState:
+    """Everything fetch_user_stats knows about a player.
+
+    Supports ``state['key']`` / ``state.get('key')`` so existing callers that
+    treated the result as a dict keep working.
+    """
+    user_id: int
+    profile_name: str
+    profile_class: Optional[str]
+    alignment: Optional[str]
+    race: Optional[str]
+    bio: str
+    gender_letter: Optional[str]
+    pronoun: str
+    pronoun_possessive: str
+    ability_scores: dict
+    scores_display: str
+    job1: Optional[str]
+    job2: Optional[str]
+    job3: Optional[str]
+    available_jobs: Optional[str]
+    proficiencies: Any
+    health: int
+    health_max: int
+    health_display: str
+    defense: int
+    defense_boost: int
+    defense_display: str
+    attack: int
+    attack_display: str
+    level: int
+    activity: Optional[str]
+    coins: int
+    inventory: list
+    head: Optional[str]
+    upper: Optional[str]
+    lower: Optional[str]
+    feet: Optional[str]
+    hand_left: Optional[str]
+    hand_right: Optional[str]
+
+    _ALIASES: ClassVar[dict] = {'class': 'profile_class'}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._ALIASES.get(key, key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, self._ALIASES.get(key, key), value)
+
+    def __contains__(self, key):
+        return hasattr(self, self._ALIASES.get(key, key))
+
+    def get(self, key, default=None):
+        return getattr(self, self._ALIASES.get(key, key), default)
+
+    def keys(self):
+        return [f.name for f in fields(self)]
+
+    def copy(self):
+        """Copy that callers may modify without touching the cached state."""
+        return replace(self,
+                       ability_scores=dict(self.ability_scores),
+                       inventory=[dict(item) for item in self.inventory])
 
 class StatsManager(commands.Cog):
+    PLAYER_CACHE_TTL = 60  # seconds; writers below also invalidate explicitly
+
     def __init__(self, bot):
         self.bot = bot
         self.item_randomizer = self.bot.get_cog("ItemRandomizer") # For Item and Expedition Info
         self.data_manager = self.bot.get_cog("DataManager") # For Item and Expedition Info
+        self._player_cache = {}  # user id -> (loaded at, PlayerState)
+        self.cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self.query_stats = defaultdict(lambda: {"invocations": 0, "queries": 0})
+        self._queries_this_command = contextvars.ContextVar("queries_this_command", default=None)
+        self._due_activities = {}  # user id -> guild name, waiting for the next completion batch
+        self._activity_flush = None
+        self._initialize_inventory_table()
+
+    async def cog_load(self):
+        self.bot.before_invoke(self._before_command)
+        self.bot.after_invoke(self._after_command)
+
+    async def _before_command(self, ctx):
+        current_command.set(ctx.command.qualified_name if ctx.command else "other")
+        self._queries_this_command.set([0])
+
+    async def _after_command(self, ctx):
+        counter = self._queries_this_command.get()
+        if counter is None:
+            return
+        stats = self.query_stats[current_command.get()]
+        stats["invocations"] += 1
+        stats["queries"] += counter[0]
+
+    def _connect(self, **kwargs):
+        """Open discord.db with statement counting for the current command."""
+        conn = sqlite3.connect('discord.db', **kwargs)
+        counter = self._queries_this_command.get()
+
+        def count(statement):
+            if statement.lstrip().upper().startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+                return
+            if counter is not None:
+                counter[0] += 1
+            else:
+                self.query_stats["other"]["queries"] += 1
 
-    async def fetch_user_stats(self, user):
-        conn = sqlite3.connect('discord.db')
-        c = conn.cursor()
+        conn.set_trace_callback(count)
+        return conn
 
-        c.execute('SELECT health, health_max, defense, defense_boost, attack, level, activity, coins, job1, job2, job3, found_jobs FROM stats WHERE user_id = ?', (user.id,))
-        stats_data = c.fetchone()
+    def invalidate_player(self, user_id):
+        """Drop a cached player state; call after writing any player table directly."""
+        if self._player_cache.pop(user_id, None) is not None:
+            self.cache_stats["invalidations"] += 1
 
-        c.execute('SELECT class, gender, alignment, race, name, bio, ability_scores FROM profiles WHERE user_id = ?', (user.id,))
-        profile_data = c.fetchone()
+    ## ----- Inventory storage -----
+    ## One row per stack of identical items; the rolled attributes (prefix, quality,
+    ## price, stats) are part of the stack key so differently rolled items never merge.
 
-        c.execute('SELECT user_id, head, upper, lower, feet, hand_left, hand_right FROM equipped_items WHERE user_id = ?', (user.id,))
-        equipped_armor = c.fetchone()
+    def _initialize_inventory_table(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS inventory_items (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        item_key TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        type TEXT,
+                        quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0),
+                        attributes TEXT NOT NULL,
+                        UNIQUE (user_id, item_key))''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_inventory_items_user_name ON inventory_items(user_id, name)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_inventory_items_user_type ON inventory_items(user_id, type)")
+        conn.commit()
+        self._migrate_inventory_blobs(conn)
+        conn.close()
 
-        c.execute("SELECT * FROM proficiencies WHERE user_id = ?", (user.id,))
-        proficiencies = (c.fetchone())[0]
+    def _migrate_inventory_blobs(self, conn):
+        """Move items out of the legacy JSON column in `inventory` into inventory_items."""
+        c = conn.cursor()
+        c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='inventory'")
+        if not c.fetchone():
+            return
 
-        c.execute("SELECT author, baking, brewing, carpentry, cleaning, coachman, cooking, cupbearing, farming, fishing, floristry, gardening, guarding, glassblowing, healing, husbandry, innkeeping, knighthood, leadership, masonry, metalworking, painting, pottery, royalty, sculpting, smithing, spinning, stablekeeping, tailoring, teaching, vigilance FROM proficiencies WHERE user_id = ?", (user.id,))
-        proficiencies = (c.fetchone())[0]
+        c.execute("SELECT user_id, inventory FROM inventory WHERE inventory IS NOT NULL AND inventory NOT IN ('', '[]')")
+        rows = c.fetchall()
+        if not rows:
+            return
 
-        c.execute("SELECT inventory FROM inventory WHERE user_id = ?", (user.id,))
-        raw_inventory = (c.fetchone())[0]
+        migrated = 0
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            for user_id, raw_inventory in rows:
+                try:
+                    items = json.loads(raw_inventory)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping unreadable inventory for {user_id}: {e}")
+                    continue
+                items = [json.loads(item) if isinstance(item, str) else item for item in items]
+                self.stack_items(c, user_id, [item for item in items if isinstance(item, dict)])
+                # The row stays as the "has an inventory" marker; the blob is no longer read
+                c.execute("UPDATE inventory SET inventory = NULL WHERE user_id = ?", (user_id,))
+                migrated += 1
+            conn.commit()
+            print(f"Migrated {migrated} inventories to inventory_items")
+        except Exception as e:
+            conn.rollback()
+            print(f"ERROR - Inventory migration failed, left untouched: {e}")
+
+    @staticmethod
+    def _item_key(item_data):
+        canonical = json.dumps(item_data, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest(), canonical
+
+    @contextmanager
+    def inventory_transaction(self):
+        """Yield a cursor inside one write transaction; everything rolls back on error.
+
+        The inventory helpers below raise ValueError when a user lacks an item,
+        which aborts the whole transaction (crafting, trades and purchases).
+        """
+        conn = self._connect(isolation_level=None)
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            yield c
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def stack_items(self, cursor, user_id, items):
+        """Add items to a user's inventory inside an open transaction."""
+        self.invalidate_player(user_id)
+        stacks = Counter()
+        canonical_by_key = {}
+        for item_data in items:
+            key, canonical = self._item_key(item_data)
+            stacks[key] += 1
+            canonical_by_key[key] = (canonical, item_data)
+
+        for key, count in stacks.items():
+            canonical, item_data = canonical_by_key[key]
+            cursor.execute('''
+                INSERT INTO inventory_items (user_id, item_key, name, type, quantity, attributes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, item_key) DO UPDATE SET quantity = quantity + excluded.quantity
+            ''', (user_id, key, item_data['name'], item_data.get('type'), count, canonical))
+
+    def take_items(self, cursor, user_id, items):
+        """Remove exact items from a user's inventory inside an open transaction."""
+        self.invalidate_player(user_id)
+        for key, count in Counter(self._item_key(item_data)[0] for item_data in items).items():
+            cursor.execute('''
+                UPDATE inventory_items SET quantity = quantity - ?
+                WHERE user_id = ? AND item_key = ? AND quantity > ?
+            ''', (count, user_id, key, count))
+            if cursor.rowcount == 0:
+                cursor.execute("DELETE FROM inventory_items WHERE user_id = ? AND item_key = ? AND quantity = ?", (user_id, key, count))
+                if cursor.rowcount == 0:
+                    raise ValueError(f"User {user_id} does not have {count}x item {key}")
+
+    def take_items_by_name(self, cursor, user_id, name, amount):
+        """Remove ``amount`` items called ``name`` (any roll), oldest stacks first."""
+        self.invalidate_player(user_id)
+        cursor.execute("SELECT id, quantity FROM inventory_items WHERE user_id = ? AND name = ? ORDER BY id", (user_id, name))
+        remaining = amount
+        for stack_id, quantity in cursor.fetchall():
+            if remaining <= 0:
+                break
+            used = min(quantity, remaining)
+            if used == quantity:
+                cursor.execute("DELETE FROM inventory_items WHERE id = ?", (stack_id,))
+            else:
+                cursor.execute("UPDATE inventory_items SET quantity = quantity - ? WHERE id = ?", (used, stack_id))
+            remaining -= used
+        if remaining > 0:
+            raise ValueError(f"User {user_id} is missing {remaining}x {name}")
+
+    def _read_inventory(self, cursor, user_id):
+        cursor.execute("SELECT attributes, quantity FROM inventory_items WHERE user_id = ? ORDER BY id", (user_id,))
+        inventory = []
+        for attributes, quantity in cursor.fetchall():
+            item_data = json.loads(attributes)
+            inventory.extend(dict(item_data) for _ in range(quantity))
+        return inventory
+
+    def get_inventory(self, user_id):
+        """Return the user's inventory as a flat list of item dicts (one per unit)."""
+        conn = self._connect()
+        try:
+            return self._read_inventory(conn.cursor(), user_id)
+        finally:
+            conn.close()
+
+    def get_inventory_page(self, user_id, page, per_page, exclude_types=()):
+        """Return ``([(item_data, quantity), ...], total_stacks)`` for one page of stacks."""
+        type_filter = ""
+        params = [user_id]
+        if exclude_types:
+            type_filter = f"AND (type IS NULL OR type NOT IN ({', '.join('?' for _ in exclude_types)}))"
+            params.extend(exclude_types)
+
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute(f"SELECT COUNT(*) FROM inventory_items WHERE user_id = ? {type_filter}", params)
+        total = c.fetchone()[0]
+        c.execute(f'''
+            SELECT attributes, quantity FROM inventory_items
+            WHERE user_id = ? {type_filter}
+            ORDER BY id LIMIT ? OFFSET ?
+        ''', params + [per_page, (page - 1) * per_page])
+        rows = [(json.loads(attributes), quantity) for attributes, quantity in c.fetchall()]
+        conn.close()
+        return rows, total
 
-        #Process Inventory Data
-        if raw_inventory is None:
-            inventory = 'empty'
-        elif raw_inventory: 
-            inventory = json.loads(raw_inventory)
+    def count_items_by_name(self, user_id):
+        """Return ``{item name: total quantity}`` for a user's inventory."""
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("SELECT name, SUM(quantity) FROM inventory_items WHERE user_id = ? GROUP BY name", (user_id,))
+        counts = dict(c.fetchall())
         conn.close()
+        return counts
+
+    def transfer_items(self, from_user_id, to_user_id, items):
+        """Move items between users atomically. Returns False if the sender lacks them."""
+        try:
+            with self.inventory_transaction() as c:
+                self.take_items(c, from_user_id, items)
+                self.stack_items(c, to_user_id, items)
+            return True
+        except ValueError as e:
+            print(f"Transfer failed: {e}")
+            return False
+
+    def craft_items(self, user_id, ingredients, products):
+        """Consume ``{name: amount}`` ingredients and add ``products`` in one transaction."""
+        try:
+            with self.inventory_transaction() as c:
+                for name, amount in ingredients.items():
+                    self.take_items_by_name(c, user_id, name, amount)
+                self.stack_items(c, user_id, products)
+            return True
+        except ValueError as e:
+            print(f"Crafting failed: {e}")
+            return False
 
-        if not profile_data and not stats_data:
+    async def fetch_user_stats(self, user):
+        """Return the player's state, loading it with a single query when not cached."""
+        user_id = user if isinstance(user, int) else user.id
+        cached = self._player_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < self.PLAYER_CACHE_TTL:
+            self.cache_stats["hits"] += 1
+            return cached[1].copy()
+
+        self.cache_stats["misses"] += 1
+        state = self._load_player_state(user_id)
+        if state is None:
             return
-        
-        #Retrieve Variables from Dictionaries
-        profile_class, profile_gender, profile_alignment, profile_race, profile_name, profile_bio, ability_scores_str = profile_data
-        health, health_max, defense, defense_boost, attack, level, activity, coins, job1, job2, job3, available_jobs = stats_data
-        
-        # Handle case where user has no equipped items
-        if equipped_armor:
-            _, head, upper, lower, feet, hand_left, hand_right = equipped_armor
-        else:
-            head, upper, lower, feet, hand_left, hand_right = None, None, None, None, None, None
+        self._player_cache[user_id] = (time.monotonic(), state)
+        return state.copy()
+
+    def _load_player_state(self, user_id):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''
+            SELECT s.user_id, p.user_id,
+                   s.health, s.health_max, s.defense, s.defense_boost, s.attack, s.level,
+                   s.activity, s.coins, s.job1, s.job2, s.job3, s.found_jobs,
+                   p.class, p.gender, p.alignment, p.race, p.name, p.bio, p.ability_scores,
+                   e.head, e.upper, e.lower, e.feet, e.hand_left, e.hand_right,
+                   pr.author,
+                   (SELECT json_group_array(json_array(json(attributes), quantity))
+                    FROM (SELECT attributes, quantity FROM inventory_items WHERE user_id = u.user_id ORDER BY id))
+            FROM (SELECT ? AS user_id) u
+            LEFT JOIN stats s ON s.user_id = u.user_id
+            LEFT JOIN profiles p ON p.user_id = u.user_id
+            LEFT JOIN equipped_items e ON e.user_id = u.user_id
+            LEFT JOIN proficiencies pr ON pr.user_id = u.user_id
+        ''', (user_id,))
+        row = c.fetchone()
+        conn.close()
+
+        stats_id, profile_id = row[0], row[1]
+        if stats_id is None or profile_id is None:
+            return None
+
+        (health, health_max, defense, defense_boost, attack, level,
+         activity, coins, job1, job2, job3, available_jobs) = row[2:14]
+        profile_class, profile_gender, profile_alignment, profile_race, profile_name, profile_bio, ability_scores_str = row[14:21]
+        head, upper, lower, feet, hand_left, hand_right = row[21:27]
+        proficiencies = row[27]
+
+        #Process Inventory Data
+        inventory = []
+        for item_data, quantity in json.loads(row[28] or '[]'):
+            inventory.extend(dict(item_data) for _ in range(quantity))
 
         #Process Bio
         if profile_bio is None:
@@ -64,59 +392,55 @@ class StatsManager(commands.Cog):
         #Process Gender
         pronoun, pronoun_possessive = ("he", "his") if profile_gender == "M" else ("she", "her")
 
-        #Convert Ability Scores
-        ability_scores = eval(ability_scores_str)
+        #Convert Ability Scores (stored as a Python dict literal)
+        ability_scores = ast.literal_eval(ability_scores_str) if ability_scores_str else {}
         scores_display = "\n".join(f"{stat}: {score}" for stat, score in ability_scores.items())
 
-        # Merge base values with boosts
-        health_display = f"{health}/{health_max}"
-        defense_display = f"{defense}"
-        attack_display = f"{attack}"
-
         # Ensure users can Still fight without weapons
         if not hand_right:
             hand_right = "{\"name\": \"Right Fist\", \"type\": \"equipment\"}"
         if not hand_left:
             hand_left = "{\"name\": \"Left Fist\", \"type\": \"equipment\"}"
 
-        return {
-            'profile_name': profile_name,
-            'class': profile_class,
-            'alignment': profile_alignment,
-            'race': profile_race,
-            'bio': profile_bio,
-            'gender_letter': profile_gender,
-            'pronoun': pronoun,
-            'pronoun_possessive': pronoun_possessive,
-            'ability_scores': ability_scores,
-            'scores_display': scores_display,
-            "job1": job1,
-            "job2": job2,
-            "job3": job3,
-            'available_jobs': available_jobs,
-            'proficiencies': proficiencies,
-            'health': health,
-            'health_max': health_max,
-            'health_display': health_display,
-            'defense': defense,
-            'defense_boost': defense_boost,
-            'defense_display': defense_display,
-            'attack': attack,
-            'attack_display': attack_display,
-            'level': level,
-            'activity': activity,
-            'coins': coins,
-            'inventory': inventory,
-            'head': head,
-            'upper': upper,
-            'lower': lower,
-            'feet': feet,
-            'hand_left': hand_left,
-            'hand_right': hand_right
-        }
+        return PlayerState(
+            user_id=user_id,
+            profile_name=profile_name,
+            profile_class=profile_class,
+            alignment=profile_alignment,
+            race=profile_race,
+            bio=profile_bio,
+            gender_letter=profile_gender,
+            pronoun=pronoun,
+            pronoun_possessive=pronoun_possessive,
+            ability_scores=ability_scores,
+            scores_display=scores_display,
+            job1=job1,
+            job2=job2,
+            job3=job3,
+            available_jobs=available_jobs,
+            proficiencies=proficiencies,
+            health=health,
+            health_max=health_max,
+            health_display=f"{health}/{health_max}",
+            defense=defense,
+            defense_boost=defense_boost,
+            defense_display=f"{defense}",
+            attack=attack,
+            attack_display=f"{attack}",
+            level=level,
+            activity=activity,
+            coins=coins,
+            inventory=inventory,
+            head=head,
+            upper=upper,
+            lower=lower,
+            feet=feet,
+            hand_left=hand_left,
+            hand_right=hand_right,
+        )
 
     async def modify_user_stat(self, user, stat, amount):
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         
         if isinstance(user, int):
@@ -141,7 +465,22 @@ class StatsManager(commands.Cog):
         c.execute(f'UPDATE stats SET {stat} = ? WHERE user_id = ?', (new_value, user_id))
         conn.commit()
         conn.close()
+        self.invalidate_player(user_id)
         
+    def apply_stat_changes(self, changes):
+        """Apply ``{user_id: {stat: delta}}`` in one transaction, clamped like modify_user_stat."""
+        with self.inventory_transaction() as c:
+            for user_id, deltas in changes.items():
+                for stat, amount in deltas.items():
+                    if not amount:
+                        continue
+                    if stat == 'health':
+                        c.execute('''UPDATE stats SET health = MAX(0, MIN(health + ?, CASE WHEN ? < 0 THEN health ELSE health_max END))
+                                     WHERE user_id = ?''', (amount, amount, user_id))
+                    else:
+                        c.execute(f'UPDATE stats SET {stat} = MAX(0, {stat} + ?) WHERE user_id = ?', (amount, user_id))
+                self.invalidate_player(user_id)
+
     async def modify_ability_score(self, user, stat, amount, action='modify'):
         """
         Modify a user's ability score by adding, subtracting, or retrieving the value.
@@ -151,7 +490,7 @@ class StatsManager(commands.Cog):
         :param amount: The amount to add or subtract (use positive values for addition, negative for subtraction).
         :param action: The action to perform ('modify' to modify or 'retrieve' to just fetch the value).
         """
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
 
         # Fetch current ability scores
@@ -162,7 +501,7 @@ class StatsManager(commands.Cog):
             return None
 
         ability_scores_str = profile_data[0]
-        ability_scores = eval(ability_scores_str)
+        ability_scores = ast.literal_eval(ability_scores_str)
 
         # Retrieve ability score if action is 'retrieve'
         if action == 'retrieve':
@@ -178,14 +517,16 @@ class StatsManager(commands.Cog):
         c.execute('UPDATE profiles SET ability_scores = ? WHERE user_id = ?', (str(ability_scores), user.id))
         conn.commit()
         conn.close()
+        self.invalidate_player(user.id)
 
     async def set_user_armor(self, user, slot, item):
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
 
         c.execute(f'UPDATE equipment SET {slot} = ? WHERE user_id = ?', (item, user.id))
         conn.commit()
         conn.close()
+        self.invalidate_player(user.id)
     
     async def equip_from_inventory(self, ctx, user_id, user_data, slot: str, item_data: dict):
         inventory = user_data['inventory']
@@ -205,57 +546,39 @@ class StatsManager(commands.Cog):
 
         current_equipped = user_data.get(slot)
 
-        conn = sqlite3.connect('discord.db')
-        c = conn.cursor()
-
-        # Remove item from inventory
-        inventory.remove(item_data)
+        try:
+            with self.inventory_transaction() as c:
+                # Remove item from inventory
+                self.take_items(c, user_id, [item_data])
 
-        # Equip new item
-        c.execute(f'UPDATE equipped_items SET {slot} = ? WHERE user_id = ?', (json.dumps(item_data), user_id))
+                # Equip new item
+                c.execute(f'UPDATE equipped_items SET {slot} = ? WHERE user_id = ?', (json.dumps(item_data), user_id))
 
-        # Return old item to inventory if applicable
-        if current_equipped and 'Fist' not in current_equipped:
-            inventory.append(json.loads(current_equipped))
+                # Return old item to inventory if applicable
+                if current_equipped and 'Fist' not in current_equipped:
+                    self.stack_items(c, user_id, [json.loads(current_equipped)])
 
-        c.execute("UPDATE inventory SET inventory = ? WHERE user_id = ?", (json.dumps(inventory), user_id))
-        
-        ## Update item defense
-        if item_data.get('defense'):
-            c.execute("UPDATE stats SET defense_boost = defense_boost + ? WHERE user_id = ?", (item_data['defense'], user_id))
-
-        conn.commit()
-        conn.close()
+                ## Update item defense
+                if item_data.get('defense'):
+                    c.execute("UPDATE stats SET defense_boost = defense_boost + ? WHERE user_id = ?", (item_data['defense'], user_id))
+        except ValueError:
+            await ctx.send("Item not in inventory.")
+            return
+        finally:
+            self.invalidate_player(user_id)
 
         print(f"Equipped {item_data['name']} in {slot}.")
 
     def remove_from_user_inventory(self, user_id, item_data):
         ic(item_data['name'], user_id)
 
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-
-        #Check if inventotry is empty, then skip if empty.
-        cursor.execute("SELECT inventory FROM inventory WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-
-        if len(result) < 1:
+        try:
+            with self.inventory_transaction() as c:
+                self.take_items(c, user_id, [item_data])
+            return True
+        except ValueError:
             print("Nothing to remove from user's inventory!")
-            return
-        
-        user_inventory = json.loads(result[0])
-
-        ic(item_data)
-
-        #Remove item from inventory
-        user_inventory.remove(item_data)
-
-        ic(user_inventory)
-
-        #Plant back into database
-        cursor.execute("INSERT OR REPLACE INTO inventory (user_id, inventory) VALUES (?, ?)", (user_id, json.dumps(user_inventory)))
-        conn.commit()
-        conn.close()
+            return False
 
     async def unequip_from_inventory(self, ctx, user, slot: str):
         user_data = await self.fetch_user_stats(user)
@@ -287,78 +610,42 @@ class StatsManager(commands.Cog):
             await ctx.send(f"No item equipped in {slot}.")
             return
 
-        # Ensure inventory is properly loaded from JSON
-        raw_inventory = user_data['inventory']
-        
-        if isinstance(raw_inventory, str):  
-            try:
-                inventory = json.loads(raw_inventory)  # Convert string to list
-            except json.JSONDecodeError:
-                inventory = []  # If JSON is corrupted, reset to an empty list
-        else:
-            inventory = raw_inventory if isinstance(raw_inventory, list) else []
-
-        # Add unequipped item back to inventory
-        inventory.append(json.loads(equipped_item))
-
-        conn = sqlite3.connect('discord.db')
-        c = conn.cursor()
+        equipped_item_data = json.loads(equipped_item)
 
-        # Unequip item
-        c.execute(f'UPDATE equipped_items SET {slot} = NULL WHERE user_id = ?', (user.id,))
+        with self.inventory_transaction() as c:
+            # Unequip item
+            c.execute(f'UPDATE equipped_items SET {slot} = NULL WHERE user_id = ?', (user.id,))
 
-        # Update inventory (store it back as JSON string)
-        await ctx.send(json.dumps(inventory))
-        c.execute("UPDATE inventory SET inventory = ? WHERE user_id = ?", (json.dumps(inventory), user.id))
-        
-        # Parse equipped item data and update defense if it exists
-        equipped_item_data = json.loads(equipped_item)
-        if equipped_item_data.get('defense'):
-            c.execute("UPDATE stats SET defense_boost = defense_boost - ? WHERE user_id = ?", (equipped_item_data['defense'], user.id))
+            # Add unequipped item back to inventory
+            if 'Fist' not in equipped_item_data.get('name', ''):
+                self.stack_items(c, user.id, [equipped_item_data])
 
-        conn.commit()
-        conn.close()
+            # Update defense if the item had any
+            if equipped_item_data.get('defense'):
+                c.execute("UPDATE stats SET defense_boost = defense_boost - ? WHERE user_id = ?", (equipped_item_data['defense'], user.id))
+        self.invalidate_player(user.id)
 
         print(f"Unequipped {equipped_item} from {slot.title()}.")
 
     def add_to_user_inventory(self, user_id, item_data):
         ic(item_data['name'], user_id)
 
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-
-        # Try to get the inventory for this user
-        cursor.execute("SELECT inventory FROM inventory WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-        ic(result)
-
-        if result is None or result[0] is None:
-            user_inventory = []
-        else:
-            user_inventory = json.loads(result[0])
-
-        # Append the new item
-        user_inventory.append(item_data)
-
-        # Save it back
-        cursor.execute(
-            "INSERT OR REPLACE INTO inventory (user_id, inventory) VALUES (?, ?)",
-            (user_id, json.dumps(user_inventory))
-        )
-
-        conn.commit()
-        conn.close()
+        with self.inventory_transaction() as c:
+            self.stack_items(c, user_id, [item_data])
 
     def get_item_in_inventory(self, user_id, index):
-        conn = sqlite3.connect('discord.db')
+        """Return the item at a position of the flat inventory list, or None."""
+        conn = self._connect()
         cursor = conn.cursor()
 
-        #Check if inventory is empty, then skip if empty.
-        cursor.execute("SELECT inventory FROM inventory WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-        ic(result)
-
-        item = json.loads(result[0])[index]
+        # Walk stacks in order so only the row containing ``index`` is decoded
+        cursor.execute("SELECT attributes, quantity FROM inventory_items WHERE user_id = ? ORDER BY id", (user_id,))
+        item = None
+        for attributes, quantity in cursor:
+            if index < quantity:
+                item = json.loads(attributes)
+                break
+            index -= quantity
 
         conn.close()
         return item
@@ -395,18 +682,125 @@ class StatsManager(commands.Cog):
         activity['item_results'] = item_results
         return activity
     
-    async def activity_dm(self, interaction, user_stats, hours):
-        await asyncio.sleep(hours*60*60)
-        
+    ## ----- Activity completions -----
+    # Finished activities are delivered by the Scheduler cog as one-shot
+    # "activity_complete" jobs, so they survive restarts and reloads. Results
+    # are rolled when the activity ends, not when it starts.
+
+    def _activity_job_id(self, user_id):
+        return f"activity:{user_id}"
+
+    def _schedule_activity_completion(self, user_id, end_time, guild_name=None):
+        scheduler = self.bot.get_cog("Scheduler")
+        if scheduler is None:
+            print(f"Scheduler not loaded; activity for {user_id} will only resolve when viewed")
+            return
+        scheduler.schedule(self._activity_job_id(user_id), "activity_complete", {"kind": "once"},
+                           run_at=end_time.timestamp(),
+                           payload={"user_id": user_id, "guild_name": guild_name})
+
+    async def complete_activities(self, user_ids):
+        """Roll results for every finished, unresolved activity of ``user_ids`` in one transaction.
+
+        Safe to call more than once; returns {user_id: activity} for all users
+        that have an activity, resolved or not.
+        """
+        if not user_ids:
+            return {}
+        user_ids = list(user_ids)
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        placeholders = ", ".join("?" * len(user_ids))
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT user_id, activity FROM stats WHERE user_id IN ({placeholders}) AND activity IS NOT NULL",
+                       user_ids)
+        rows = cursor.fetchall()
+        conn.close()
+
+        activities = {}
+        updates = []
+        for user_id, stored in rows:
+            activity = json.loads(stored) if stored else {}
+            activities[user_id] = activity
+            # Activities stored before results were deferred have no 'completed' flag
+            if activity.get('completed', True) or activity.get('end_time', now) > now:
+                continue
+            activity = await self.calculate_activity_results(None, activity)
+            activity['completed'] = True
+            activities[user_id] = activity
+            updates.append((json.dumps(activity), user_id, stored))
+
+        if updates:
+            # Only overwrite rows that are unchanged since they were read, so a
+            # concurrent !me view and the scheduler can't roll results twice
+            with self.inventory_transaction() as cursor:
+                for activity, user_id, stored in updates:
+                    cursor.execute("UPDATE stats SET activity = ? WHERE user_id = ? AND activity = ?", (activity, user_id, stored))
+                    if cursor.rowcount == 0:
+                        cursor.execute("SELECT activity FROM stats WHERE user_id = ?", (user_id,))
+                        row = cursor.fetchone()
+                        if row and row[0]:
+                            activities[user_id] = json.loads(row[0])
+                        else:
+                            activities.pop(user_id, None)
+            for _, user_id, _ in updates:
+                self.invalidate_player(user_id)
+        return activities
+
+    @commands.Cog.listener()
+    async def on_scheduled_job(self, job):
+        if job['handler'] != "activity_complete":
+            return
+        # A burst of due jobs is dispatched back to back; gather them into one batch
+        self._due_activities[job['payload']['user_id']] = job['payload'].get('guild_name')
+        if self._activity_flush is None or self._activity_flush.done():
+            self._activity_flush = asyncio.create_task(self._flush_due_activities())
+
+    async def _flush_due_activities(self):
+        await asyncio.sleep(0)  # Let the rest of the burst's listeners run first
+        due, self._due_activities = self._due_activities, {}
+        try:
+            activities = await self.complete_activities(due)
+        except Exception as e:
+            print(f"Error completing activities {list(due)}: {e}")
+            return
+
+        for user_id, guild_name in due.items():
+            if user_id not in activities:
+                continue
+            await self.activity_dm(user_id, guild_name)
+
+    @commands.Cog.listener()
+    async def on_scheduler_ready(self, scheduler):
+        """Schedule completions for unresolved activities that have no job (e.g. started before a crash)."""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id, activity FROM stats WHERE activity IS NOT NULL")
+        rows = cursor.fetchall()
+        conn.close()
+
+        for user_id, activity in rows:
+            activity = json.loads(activity) if activity else {}
+            if activity.get('completed', True) or scheduler.get_job(self._activity_job_id(user_id)):
+                continue
+            end_time = datetime.strptime(activity['end_time'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            self._schedule_activity_completion(user_id, end_time, activity.get('guild_name'))
+
+    async def activity_dm(self, user_id, guild_name=None):
+        user_stats = await self.fetch_user_stats(user_id)
+        user = self.bot.get_user(user_id)
+        if not user_stats or user is None:
+            return
+
         embed = discord.Embed(title=f"{user_stats['profile_name']} has completed an activity!",
-                              description=f"Go into {interaction.guild.name} to see your results!")
-        
-        await interaction.user.send(embed=embed)
-        
-        return
-    
+                              description=f"Go into {guild_name or 'the server'} to see your results!")
+        try:
+            await user.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"Could not DM {user_id} about their activity: {e}")
+
     async def update_activity(self, interaction, activity, duration_hours, cost: int = 0):
-        # The reward pool will consist of high, medium, and low luck results. This  will predetermine the results, and then store them
         user_stats = await self.fetch_user_stats(interaction.user)
 
         # Check if the user already has an activity
@@ -414,28 +808,28 @@ class StatsManager(commands.Cog):
             await interaction.response.send_message(f"{user_stats['profile_name']} is already busy doing something else!")
             return
 
-        resulting_activity = await self.calculate_activity_results(interaction, activity)
-
         # Calculate the end time based on the expedition's duration
         end_time = datetime.now(timezone.utc)  # Use timezone-aware datetime
         end_time += timedelta(hours=duration_hours)
         end_time_str = end_time.strftime('%Y-%m-%d %H:%M:%S')
         activity['end_time'] = end_time_str
+        activity['guild_name'] = interaction.guild.name if interaction.guild else None
+        activity['completed'] = False  # Results are rolled by complete_activities once it ends
 
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         cursor = conn.cursor()
-        cursor.execute('UPDATE stats SET activity = ? WHERE user_id = ?', (json.dumps(resulting_activity), interaction.user.id))
+        cursor.execute('UPDATE stats SET activity = ? WHERE user_id = ?', (json.dumps(activity), interaction.user.id))
         conn.commit()
         conn.close()       
-        
-        asyncio.create_task(self.activity_dm(interaction, user_stats, hours=duration_hours))
-    
-        # Save the updated activity to the user
+        self.invalidate_player(interaction.user.id)
+
+        self._schedule_activity_completion(interaction.user.id, end_time, activity['guild_name'])
+
         return end_time_str
     
     async def get_users_proficiency_by_id(self, user_id, proficiency):
         query = f"SELECT {proficiency} FROM proficiencies WHERE user_id = ?"
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         result = c.execute(query, (user_id,)).fetchone()[0]
         conn.close()
@@ -443,7 +837,7 @@ class StatsManager(commands.Cog):
     
     async def get_proficiency(self, user, proficiency):
         query = f"SELECT {proficiency} FROM proficiencies WHERE user_id = ?"
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         result = c.execute(query, (user.id,)).fetchone()[0]
         conn.close()
@@ -462,7 +856,7 @@ class StatsManager(commands.Cog):
     async def proficency_increase(self, user, proficiency, amount: int, ctx = None):
         query = f"SELECT {proficiency} FROM proficiencies WHERE user_id = ?"
         execute = f"UPDATE proficiencies SET {proficiency} = ? WHERE user_id = ?"
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute(query, (user.id,))
 
@@ -472,6 +866,7 @@ class StatsManager(commands.Cog):
         c.execute(execute, (proficiency_value, user.id,))
         conn.commit()
         conn.close()
+        self.invalidate_player(user.id)
         
         if ctx:
             await self.check_recipe_unlocks(ctx, proficiency, proficiency_value-amount, proficiency_value)
@@ -479,7 +874,7 @@ class StatsManager(commands.Cog):
     def init_users_job_progress(self, user_id, job_data):
         insertion = {job_data['name']: {"name": job_data['name'],"progress": 0}}
         
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute('''
             REPLACE INTO job_progress (user_id, progress)
@@ -490,7 +885,7 @@ class StatsManager(commands.Cog):
         conn.close()
     
     def job_progress_add_job(self, user_id, job_data):
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute("SELECT progress FROM job_progress WHERE user_id = ?", (user_id,))
         result = c.fetchone()
@@ -517,7 +912,7 @@ class StatsManager(commands.Cog):
         progress_int = await self.get_job_progress(user_id, job_data)
         job_name = job_data['name']
         
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute("SELECT progress FROM job_progress WHERE user_id = ?", (user_id,))
         data = json.loads(c.fetchone()[0])
@@ -537,7 +932,7 @@ class StatsManager(commands.Cog):
     async def get_job_progress(self, user_id, job_data):
         job_name = job_data['name']
         
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute("SELECT progress FROM job_progress WHERE user_id = ?", (user_id,))
         result = c.fetchone()
@@ -558,7 +953,7 @@ class StatsManager(commands.Cog):
         return progress
 
     async def get_available_jobs(self, user):
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute("SELECT found_jobs FROM stats WHERE user_id = ?", (user.id,))
         result = c.fetchone()
@@ -574,7 +969,7 @@ class StatsManager(commands.Cog):
         return found_jobs
             
     async def add_available_job(self, ctx, user, activity_name):
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute("SELECT found_jobs FROM stats WHERE user_id = ?", (user.id,))
         result = c.fetchone()
@@ -589,23 +984,42 @@ class StatsManager(commands.Cog):
         c.execute("UPDATE stats SET found_jobs = ? WHERE user_id = ?", (json.dumps(found_jobs), user.id,))
         conn.commit()
         conn.close()
+        self.invalidate_player(user.id)
 
     def apply_job(self, slot, user, job_name):
         query = f"SELECT job{slot} FROM stats WHERE user_id = ?"
         execute = f"UPDATE stats SET job{slot} = ? WHERE user_id = ?"
         
-        conn = sqlite3.connect('discord.db')
+        conn = self._connect()
         c = conn.cursor()
         c.execute(query, (user.id,))
             
         c.execute(execute, (job_name, user.id,))
         conn.commit()
-        conn.close()        
+        conn.close()
+        self.invalidate_player(user.id)
 
     @commands.command()
     @commands.is_owner()
     async def prof_inc(self, ctx, proficiency, amount):
         await self.proficency_increase(ctx.author, proficiency, amount)
+
+    @commands.command()
+    @commands.is_owner()
+    async def query_stats(self, ctx):
+        """Show average database queries per command and the player state cache hit rate."""
+        embed = discord.Embed(title="Player Data Queries", color=discord.Color.blue())
+        ranked = sorted(self.query_stats.items(), key=lambda kv: kv[1]["queries"], reverse=True)
+        for command, stats in ranked[:20]:
+            if stats["invocations"]:
+                value = f"{stats['queries'] / stats['invocations']:.1f} queries/run over {stats['invocations']} runs"
+            else:
+                value = f"{stats['queries']} queries outside commands"
+            embed.add_field(name=command, value=value, inline=False)
+        lookups = self.cache_stats["hits"] + self.cache_stats["misses"]
+        hit_rate = self.cache_stats["hits"] / lookups if lookups else 0.0
+        embed.set_footer(text=f"Player cache hit rate {hit_rate:.1%} | {self.cache_stats['invalidations']} invalidations")
+        await ctx.send(embed=embed)
         
 async def setup(bot):
     await bot.add_cog(StatsManager(bot))
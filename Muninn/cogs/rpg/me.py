@@ -51,12 +51,15 @@ class Status(commands.Cog):
             await ctx.send(embed=error_embed)
             return
 
-        embed_color, avatar_image, has_custom_image = await self.utils.get_avatar_color_and_image(user)
-        file = discord.File(f"/usr/src/bot/profile_images/{user.id}.png", filename="image.png") if has_custom_image else None
+        # Colour and thumbnail are cached per picture, so nothing is decoded or read from disk here
+        assets = await self.utils.get_profile_assets(user)
+        embed_color = assets.color
+        file = self.utils.profile_file(assets)
+        thumbnail_url = self.utils.profile_thumbnail_url(user, assets)
 
         # Main page embed
         main_embed = discord.Embed(title=f"{user_stats['profile_name']} - Level {user_stats['level']}", color=embed_color)
-        main_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+        main_embed.set_thumbnail(url=thumbnail_url)
         main_embed.add_field(name="Health", value=user_stats['health_display'], inline=True)
         main_embed.add_field(name="Coins", value=f"{user_stats['coins']} coins", inline=True)  # Added coins field
         main_embed.add_field(name="Expedition", value="Active" if user_stats['activity'] else "Idle", inline=True)
@@ -98,17 +101,20 @@ class Status(commands.Cog):
                 )
                 expedition_embed.add_field(name="Status", value="**Complete!**", inline=True)
             
-            expedition_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+            expedition_embed.set_thumbnail(url=thumbnail_url)
 
             if end_time <= current_time:
                 expedition_completed = True
+                if activity_data.get('completed') is False:
+                    # Finished but the scheduler hasn't delivered it yet
+                    activity_data = (await self.stats_manager.complete_activities([user.id])).get(user.id, activity_data)
         else:
             expedition_embed.add_field(name="Activity", value="The world awaits your next actions...", inline=False)
-            expedition_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+            expedition_embed.set_thumbnail(url=thumbnail_url)
 
         # Info page embed
         info_embed = discord.Embed(title="Character Info", color=embed_color)
-        info_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+        info_embed.set_thumbnail(url=thumbnail_url)
         info_embed.add_field(name="Class", value=user_stats['class'], inline=True)
         info_embed.add_field(name="Race", value=user_stats['race'], inline=True)
         info_embed.add_field(name="Alignment", value=user_stats['alignment'], inline=True)
@@ -146,7 +152,7 @@ class Status(commands.Cog):
             professions_str += f"{profession_name}: `{result[index+1]}`\n"
             
         professions_embed = discord.Embed(title="Character Professions", color=embed_color, description=professions_str)
-        professions_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+        professions_embed.set_thumbnail(url=thumbnail_url)
         # Helper function to format equipped items
         def format_item(item):
             """Format an item with its prefix, name, and actions."""
@@ -168,7 +174,7 @@ class Status(commands.Cog):
 
         # Equipped Items page embed
         equipped_embed = discord.Embed(title="Equipped Items", color=embed_color)
-        equipped_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+        equipped_embed.set_thumbnail(url=thumbnail_url)
         equipped_embed.add_field(name="Head", value=format_item(user_stats['head']), inline=True)
         equipped_embed.add_field(name="Upper Body", value=format_item(user_stats['upper']), inline=True)
         equipped_embed.add_field(name="Lower Body", value=format_item(user_stats['lower']), inline=True)
@@ -176,51 +182,27 @@ class Status(commands.Cog):
         equipped_embed.add_field(name="Left Hand", value=format_item(user_stats['hand_left']), inline=True)
         equipped_embed.add_field(name="Right Hand", value=format_item(user_stats['hand_right']), inline=True)
 
-        # Inventory page embed
-        user_inventory = user_stats['inventory']
-        if not user_inventory:  # Handle empty or None inventory
-            user_inventory = []
-        elif isinstance(user_inventory, str):
-            try:
-                user_inventory = json.loads(user_inventory)  # Deserialize if it's a JSON string
-            except json.JSONDecodeError:
-                user_inventory = []  # Default to an empty list if JSON parsing fails
-        elif not isinstance(user_inventory, list):
-            user_inventory = []  # Default to an empty list if it's neither a string nor a list
-
-        # Ensure each item in the inventory is a dictionary
-        parsed_inventory = []
-        for item in user_inventory:
-            ic(item)
-            if item['type'] == 'crafting':
-                continue
-            if isinstance(item, str):
-                try:
-                    parsed_inventory.append(json.loads(item))  # Parse string items as JSON
-                except json.JSONDecodeError:
-                    continue  # Skip invalid items
-            elif isinstance(item, dict):
-                parsed_inventory.append(item)
-
-        # Pagination setup
+        # Inventory page embed; stacks are paged in SQL and crafting items live in the home chest
         items_per_page = 5
-        total_pages = max(1, (len(parsed_inventory) + items_per_page - 1) // items_per_page)
+        _, total_stacks = self.stats_manager.get_inventory_page(user.id, 1, items_per_page, exclude_types=('crafting',))
+        total_pages = max(1, (total_stacks + items_per_page - 1) // items_per_page)
 
         async def get_inventory_page(page):
             start_index = (page - 1) * items_per_page
-            end_index = start_index + items_per_page
-            page_items = parsed_inventory[start_index:end_index]
+            stacks, _ = self.stats_manager.get_inventory_page(user.id, page, items_per_page, exclude_types=('crafting',))
+            page_items = [item for item, _ in stacks]
 
             inventory_embed = discord.Embed(title=f"Inventory (Page {page}/{total_pages})", color=embed_color)
-            inventory_embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+            inventory_embed.set_thumbnail(url=thumbnail_url)
             if page_items:
                 inventory_list = []
-                for index, item in enumerate(page_items, start=1):
+                for index, (item, quantity) in enumerate(stacks, start=1):
                     item_data = await self.data_manager.find_data(item['type'], item['name'])
                     description = item_data['description']
                     prefix = item.get('prefix', '')  # Get the prefix if available
                     heal_info = f" (Heals: {item.get('base_heal')} HP)" if item.get('base_heal') else ""
-                    inventory_list.append(f"**{index + start_index}. *{prefix}* {item['name']}** - {description}{heal_info}".strip())
+                    count = f" x{quantity}" if quantity > 1 else ""
+                    inventory_list.append(f"**{index + start_index}. *{prefix}* {item['name']}{count}** - {description}{heal_info}".strip())
                 inventory_embed.description = "\n".join(inventory_list)
                 inventory_embed.set_footer(text="Use !equip to outfit your character")
             else:
@@ -366,24 +348,9 @@ class Status(commands.Cog):
                     )
                     await interaction.response.send_message(embed=heal_embed, ephemeral=True)
 
-                    # Remove the used item from the inventory
-                    self.current_items.remove(item)
-                    updated_inventory = json.dumps(self.current_items)  # Serialize the updated inventory
-
-                    # Update the inventory in the database
-                    await self.navigation_view.parent_cog.update_inventory_in_database(self.profile_user.id, updated_inventory)
-
-                    # Reload the inventory data
-                    user_inventory = updated_stats['inventory']
-                    if isinstance(user_inventory, str):
-                        try:
-                            self.current_items = json.loads(user_inventory)  # Deserialize if it's a JSON string
-                        except json.JSONDecodeError:
-                            self.current_items = []  # Default to an empty list if JSON parsing fails
-                    elif isinstance(user_inventory, list):
-                        self.current_items = user_inventory
-                    else:
-                        self.current_items = []
+                    # Remove the used item from the inventory and reload the page
+                    self.navigation_view.parent_cog.stats_manager.remove_from_user_inventory(self.profile_user.id, item)
+                    self.current_embed, self.current_items = await get_inventory_page(self.current_page)
 
                 if item.get("type") == "equipment":
                     if item.get("slot") == "hand":
@@ -521,7 +488,7 @@ class Status(commands.Cog):
                         embed = discord.Embed(title=f"{user_stats['profile_name']} got {activity_data['coins_change']} coins for {activity_data['hours']} hours of work!", 
                                               description=description, 
                                               color=discord.Color.green())
-                        embed.set_thumbnail(url="attachment://image.png" if has_custom_image else user.avatar.url)
+                        embed.set_thumbnail(url=thumbnail_url)
                         
                         class SeeExpeditionResults(View):
                             def __init__(self):
@@ -565,20 +532,6 @@ class Status(commands.Cog):
         navigation_view = NavigationView(user, expedition_completed, activity_data, parent_cog=self, main_embed=main_embed)
         await ctx.send(file=file, embed=main_embed, view=navigation_view)
 
-    async def update_inventory_in_database(self, user_id, updated_inventory):
-        """Update the user's inventory in the inventory table."""
-        conn = sqlite3.connect('discord.db')
-        cursor = conn.cursor()
-        try:
-            # Update the inventory in the inventory table
-            cursor.execute("UPDATE inventory SET inventory = ? WHERE user_id = ?", (updated_inventory, user_id))
-            conn.commit()
-            print(f"[DEBUG] Updated inventory for user {user_id}: {updated_inventory}")
-        except sqlite3.Error as e:
-            print(f"[ERROR] Failed to update inventory in database: {e}")
-        finally:
-            conn.close()
-
     async def delete_expedition_from_database(self, user_id):
         """Delete the user's expedition from the database."""
         conn = sqlite3.connect('discord.db')
@@ -591,6 +544,7 @@ class Status(commands.Cog):
             print(f"[ERROR] Failed to delete expedition from database: {e}")
         finally:
             conn.close()
+        self.stats_manager.invalidate_player(user_id)
         
     async def process_activity(self, ctx, user, activity_data):
         conn = sqlite3.connect('discord.db')
@@ -600,9 +554,9 @@ class Status(commands.Cog):
             await self.stats_manager.proficency_increase(user, activity_data.get('proficiency'), activity_data.get('xp_change'))
 
         if activity_data.get('item_results'):
-            for item in activity_data['item_results']:
-                ic(item)
-                self.stats_manager.add_to_user_inventory(user.id, item)
+            # All rewards land in one transaction, stacked by identical rolls
+            with self.stats_manager.inventory_transaction() as c:
+                self.stats_manager.stack_items(c, user.id, activity_data['item_results'])
         
         if activity_data.get('coins_change'):
             await self.stats_manager.modify_user_stat(user, "coins", activity_data['coins_change'])
@@ -41,10 +41,13 @@ class ModTools(commands.Cog):
                 return
             
         item = self.user_manager.get_item_in_inventory(user.id, index)
+        if item is None:
+            await ctx.send("No item at that position.")
+            return
 
         self.user_manager.remove_from_user_inventory(user.id, item)
 
-        await ctx.send(f"Removed {item[0]['name']} from inventory.")
+        await ctx.send(f"Removed {item['name']} from inventory.")
     
     @commands.command()
     async def find_data(self, ctx, type: str, item: str):
@@ -156,6 +159,7 @@ class ModTools(commands.Cog):
             print(f"[ERROR] Failed to delete expedition from database: {e}")
         finally:
             conn.close()
+        self.user_manager.invalidate_player(user.id)
 
 
 async def setup(bot):
@@ -4,13 +4,28 @@ from discord.ui import Button, View
 import sqlite3
 import random
 import os
-import requests
 from PIL import Image
 from io import BytesIO
 import time
 import asyncio
 import datetime
 
+async def save_profile_image(bot, image_url, user_id):
+    """Download an approved profile image and store it resized to 512x512."""
+    image_bytes = await bot.get_cog("Fetcher").fetch_bytes(image_url)
+    if image_bytes is None:
+        raise ValueError("Could not download image")
+
+    def resize_and_save():
+        avatar_image = Image.open(BytesIO(image_bytes)).convert("RGB")
+        avatar_image = avatar_image.resize((512, 512), Image.Resampling.LANCZOS)
+        avatar_image.save(f"profile_images/{user_id}.png")
+
+    await asyncio.to_thread(resize_and_save)
+    utils = bot.get_cog("Utils")
+    if utils:
+        utils.invalidate_profile_assets(user_id)
+
 class ProfileImageApprovalView(View):
     def __init__(self, submission_id, bot_owner_id):
         super().__init__(timeout=None)
@@ -35,11 +50,7 @@ class ProfileImageApprovalView(View):
                 
                 # Download and save the approved image
                 try:
-                    image_response = requests.get(image_url)
-                    avatar_image = Image.open(BytesIO(image_response.content)).convert("RGB")
-                    avatar_image = avatar_image.resize((512, 512), Image.Resampling.LANCZOS)
-                    image_path = f"profile_images/{user_id}.png"
-                    avatar_image.save(image_path)
+                    await save_profile_image(interaction.client, image_url, user_id)
                     
                     # Mark as approved
                     c.execute("UPDATE profile_image_submissions SET approved = 1, approved_at = ? WHERE id = ?", 
@@ -440,6 +451,7 @@ class Setup(commands.Cog):
             await thread.send(f"An error occurred while updating the database: {e}")
         finally:
             conn.close()
+            self.bot.get_cog("StatsManager").invalidate_player(ctx.author.id)
 
         await thread.send(f"Your {step} has been set to {response}. You can proceed with the next step.")
         await asyncio.sleep(5)
@@ -464,7 +476,9 @@ class Setup(commands.Cog):
                         c.execute('DELETE FROM stats WHERE user_id = ?', (ctx.author.id,))
                         c.execute('DELETE FROM equipped_items WHERE user_id = ?', (ctx.author.id,))
                         c.execute('DELETE FROM inventory WHERE user_id = ?', (ctx.author.id,))
+                        c.execute('DELETE FROM inventory_items WHERE user_id = ?', (ctx.author.id,))
                         conn.commit()
+                        self.bot.get_cog("StatsManager").invalidate_player(ctx.author.id)
                         await ctx.send("Your profile has been reset. Starting the setup process...")
                     except sqlite3.Error as e:
                         await ctx.send(f"An error occurred while resetting your profile: {e}")
@@ -635,6 +649,7 @@ class Setup(commands.Cog):
             await thread.send(f"An error occurred while updating the database: {e}")
         finally:
             conn.close()
+            self.bot.get_cog("StatsManager").invalidate_player(ctx.author.id)
 
         await thread.send(f"Your ability scores have been set. You can proceed to the next step.")
         await asyncio.sleep(10)  # Wait for 5 seconds before deleting the thread
@@ -814,6 +829,7 @@ class Setup(commands.Cog):
             await thread.send(f"An error occurred while updating the database: {e}")
         finally:
             conn.close()
+            self.bot.get_cog("StatsManager").invalidate_player(ctx.author.id)
 
         await thread.send(f"Your ability scores have been set. You can proceed with the next steps using `!profile_setup_image`.")
         await asyncio.sleep(10)  # Wait for 5 seconds before deleting the thread
@@ -912,11 +928,7 @@ class Setup(commands.Cog):
         
         try:
             # Download and save the approved image
-            image_response = requests.get(image_url)
-            avatar_image = Image.open(BytesIO(image_response.content)).convert("RGB")
-            avatar_image = avatar_image.resize((512, 512), Image.Resampling.LANCZOS)
-            image_path = f"profile_images/{user_id}.png"
-            avatar_image.save(image_path)
+            await save_profile_image(self.bot, image_url, user_id)
             
             # Mark as approved and award star
             cursor.execute("UPDATE profile_image_submissions SET approved = 1, approved_at = ? WHERE id = ?", 
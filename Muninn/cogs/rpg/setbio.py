@@ -34,6 +34,7 @@ class BioManager(commands.Cog):
 
         conn.commit()
         conn.close()
+        self.bot.get_cog("StatsManager").invalidate_player(user.id)
 
         await ctx.send(f"Your bio has been updated to: {bio}")
 
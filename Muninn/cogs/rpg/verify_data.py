@@ -1,189 +1,332 @@
 import discord
 from discord.ext import commands
+import asyncio
+import hashlib
 import json
 import yaml
 from icecream import ic
 import os
 import time
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+## ----- Schemas -----
+# One schema per data folder. ``ref`` marks a field holding an item name that
+# must exist in another folder: either a data type, or "@key" to read the type
+# from a sibling key. ``prose`` fields get the "no 'you' outside speech" check.
+
+@dataclass(frozen=True)
+class Field:
+    type: Any
+    required: bool = False
+    values: Optional[tuple] = None
+    items: Optional[dict] = None  # Schema for each element of a list field
+    ref: Optional[str] = None
+    prose: bool = False
+    non_empty: Optional[str] = None  # Message if a list field is empty
+
+ACTION_TYPES = ('Physical Offense', 'Magic Offense', 'Physical Defense', 'Magic Defense')
+
+SCHEMAS = {
+    'recipes': {
+        'name': Field(str, required=True, ref='@type'),
+        'type': Field(str, required=True),
+        'skill': Field(str),
+        'required_skill': Field(str),
+        'skill_level': Field(int),
+        'recipe': Field(list, required=True, items={
+            'name': Field(str, required=True, ref='crafting'),
+            'amount': Field(int, required=True),
+        }),
+    },
+    'items/crafting': {
+        'name': Field(str, required=True),
+        'base_price': Field(int, required=True),
+    },
+    'items/equipment': {
+        'name': Field(str, required=True),
+        'description': Field(str, required=True),
+        'type': Field(str, required=True),
+        'slot': Field(str, required=True, values=('hand', 'feet', 'lower', 'upper', 'head')),
+        'base_price': Field(int, required=True),
+        'base_defense': Field(int),
+        'actions': Field(list, items={
+            'name': Field(str, required=True),
+            'description': Field(str, required=True),
+            'type': Field(str, required=True, values=ACTION_TYPES),
+            'strength': Field(int, required=True),
+            'lines': Field(list, required=True),
+        }),
+    },
+    'items/single_use': {
+        'name': Field(str, required=True),
+        'description': Field(str, required=True),
+        'type': Field(str, required=True, values=('consumable',)),
+        'base_heal': Field(int, required=True),
+        'base_price': Field(int, required=True),
+    },
+    'locations/item_gathering': {
+        'name': Field(str, required=True),
+        'type': Field(str, required=True, values=('gathering',)),
+        'description': Field(str, required=True),
+        'base_hrs': Field(float, required=True),
+        'visit_cost': Field(int),
+        'skill_test': Field(int, required=True),
+        'item_pool': Field(list, required=True, non_empty="This gathering location has no result items!", items={
+            'name': Field(str, required=True, ref='@type'),
+            'type': Field(str, required=True),
+            'chance_to_appear': Field(float, required=True),
+            'std_amount': Field(int, required=True),
+            'std_deviation': Field(int, required=True),
+        }),
+    },
+    'locations/jobs': {
+        'name': Field(str, required=True),
+        'introduction': Field(str, required=True, prose=True),
+        'proficiency': Field(str, required=True),
+        'results': Field(list, required=True, non_empty="This work location has no work results!", items={
+            'text': Field(str, required=True, prose=True),
+            'coins_change': Field(int, required=True),
+            'xp_change': Field(int, required=True),
+            'hours': Field(int, required=True),
+        }),
+    },
+}
+
+# Folder whose file names other files may reference, by the data type used in references
+REFERENCE_FOLDERS = {
+    'crafting': 'items/crafting',
+    'equipment': 'items/equipment',
+    'single_use': 'items/single_use',
+}
+
+DISALLOWED_WORDS = [re.compile(rf'\b{word}\b', re.IGNORECASE) for word in ("you", "your", "yourself")]
+
+def you_check(text):
+    """Return the first disallowed word used outside of quoted speech, or None."""
+    # Split the text by quotation marks, straight or curly; odd indices will be quoted text
+    parts = re.split(r'["“”]', text)
+    for i in range(0, len(parts), 2):
+        for pattern in DISALLOWED_WORDS:
+            match = pattern.search(parts[i])
+            if match:
+                return match.group(0).lower()
+    return None
+
+def _type_name(expected):
+    return expected.__name__ if isinstance(expected, type) else str(expected)
+
+def compile_schema(schema):
+    """Turn a schema into one function ``check(data, errors, refs, label)``.
+
+    Work that doesn't depend on the data (type tuples, value sets, nested
+    schemas) is done here once instead of for every file.
+    """
+    checks = []
+    for key, spec in schema.items():
+        # YAML writes 1.0 as 1, so floats accept ints too (but never bools)
+        accepted = (int, float) if spec.type is float else (spec.type,)
+        values = frozenset(spec.values) if spec.values else None
+        nested = compile_schema(spec.items) if spec.items else None
+        checks.append((key, spec, accepted, values, nested))
+
+    def check(data, errors, refs, label=""):
+        if not isinstance(data, dict):
+            errors.append(f"{label}is not a mapping!")
+            return
+        for key, spec, accepted, values, nested in checks:
+            value = data.get(key)
+            name = f"{label}{key}"
+            if value is None:
+                if spec.required:
+                    errors.append(f"Required key `{name}` does not exist!")
+                continue
+            if not isinstance(value, accepted) or isinstance(value, bool) and bool not in accepted:
+                errors.append(f"Key `{name}` is not type `{_type_name(spec.type)}`!")
+                continue
+            if values is not None and value not in values:
+                errors.append(f"Key `{name}` is not a valid value: `{value}`!")
+            if spec.prose:
+                word = you_check(value)
+                if word:
+                    errors.append(f"Key `{name}` contains `{word}` outside of direct speech!")
+            if spec.ref:
+                ref_type = data.get(spec.ref[1:]) if spec.ref.startswith("@") else spec.ref
+                refs.append((ref_type, value))
+            if nested is not None:
+                if not value and spec.non_empty:
+                    errors.append(spec.non_empty)
+                for index, element in enumerate(value):
+                    nested(element, errors, refs, f"{name}[{index}].")
+
+    return check
+
+_COMPILED = {}
+
+def compiled_schema(folder):
+    """Compile a folder's schema once per process."""
+    if folder not in _COMPILED:
+        _COMPILED[folder] = compile_schema(SCHEMAS[folder]) if folder in SCHEMAS else None
+    return _COMPILED[folder]
+
+## ----- Validation -----
+
+def validate_file(job):
+    """Parse and check one file. Runs in worker processes, so it only takes and returns plain data."""
+    file_path, folder, digest, content = job
+    start = time.perf_counter()
+    errors, refs, name = [], [], None
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        errors.append(f"Could not be parsed: {e}")
+    else:
+        check = compiled_schema(folder)
+        if check is not None:
+            check(data, errors, refs)
+        if isinstance(data, dict) and data.get('name') is not None:
+            name = str(data['name'])
+    return {
+        'path': file_path,
+        'folder': folder,
+        'hash': digest,
+        'name': name,
+        'errors': errors,
+        'refs': refs,
+        'ms': (time.perf_counter() - start) * 1000,
+    }
+
+# Cached results are only reused while the schemas they were checked against are unchanged
+SCHEMA_VERSION = hashlib.sha256(repr((SCHEMAS, REFERENCE_FOLDERS)).encode()).hexdigest()
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache.get('files', {}) if cache.get('schema') == SCHEMA_VERSION else {}
+
+def run_verification(data_root="./data", cache_path="./.verify_cache.json", workers=None, parallel_threshold=64):
+    """Validate every data file and return a JSON-serialisable report.
+
+    Files whose content hash matches the cache are not re-parsed; their cached
+    results are reused. Changed files are checked in a process pool when there
+    are enough of them to be worth it. Item references from every file are
+    then resolved against one index of names built from all files.
+    """
+    started = time.perf_counter()
+    cache = _load_cache(cache_path) if cache_path else {}
+
+    jobs, results = [], []
+    for dirpath, _, filenames in os.walk(data_root):
+        folder = os.path.relpath(dirpath, data_root).replace(os.sep, "/")
+        for file in sorted(filenames):
+            if not (file.endswith(".json") or file.endswith(".yaml")):
+                continue
+            file_path = os.path.join(dirpath, file)
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            cached = cache.get(file_path)
+            if cached and cached['hash'] == digest:
+                results.append(dict(cached, cached=True))
+            else:
+                jobs.append((file_path, folder, digest, content.decode('utf-8')))
+    scanned = time.perf_counter()
+
+    if len(jobs) >= parallel_threshold:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(validate_file, jobs, chunksize=8))
+    else:
+        fresh = [validate_file(job) for job in jobs]
+    results.extend(dict(result, cached=False) for result in fresh)
+    validated = time.perf_counter()
+
+    # One name index for every cross-file reference
+    names = {}
+    for result in results:
+        if result['name'] is not None:
+            names.setdefault(result['folder'], set()).add(result['name'].lower())
+    for result in results:
+        result['reference_errors'] = [
+            f"`{ref_type}` item `{ref_name}` is not a valid item!"
+            for ref_type, ref_name in result['refs']
+            if str(ref_name).lower() not in names.get(REFERENCE_FOLDERS.get(ref_type), ())
+        ]
+    resolved = time.perf_counter()
+
+    if cache_path:
+        new_cache = {result['path']: {key: result[key] for key in ('path', 'folder', 'hash', 'name', 'errors', 'refs', 'ms')}
+                     for result in results}
+        with open(cache_path, 'w') as f:
+            json.dump({'schema': SCHEMA_VERSION, 'files': new_cache}, f)
+
+    results.sort(key=lambda result: result['path'])
+    files = [
+        {
+            'path': result['path'],
+            'errors': result['errors'] + result['reference_errors'],
+            'cached': result['cached'],
+            'ms': round(result['ms'], 3),
+        }
+        for result in results
+    ]
+    return {
+        'ok': not any(file['errors'] for file in files),
+        'files': files,
+        'summary': {
+            'files': len(files),
+            'checked': len(jobs),
+            'cached': len(files) - len(jobs),
+            'with_errors': sum(1 for file in files if file['errors']),
+            'errors': sum(len(file['errors']) for file in files),
+            'parallel': len(jobs) >= parallel_threshold,
+        },
+        'timings_ms': {
+            'scan': round((scanned - started) * 1000, 3),
+            'validate': round((validated - scanned) * 1000, 3),
+            'references': round((resolved - validated) * 1000, 3),
+            'total': round((time.perf_counter() - started) * 1000, 3),
+        },
+    }
 
 class Verify(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = self.bot.get_cog("DataManager")  
+        self.data_manager = self.bot.get_cog("DataManager")
 
-    async def type_test(self, ctx, file, data, key_name, type, required_field: bool = False):
-        object = data.get(key_name)
-        
-        if required_field and object is None:
-            await ctx.send(F"`{file}`: Required key `{key_name}` does not exist!")
-            return
-        if not isinstance(object, type) and object is not None:
-            await ctx.send(F"`{file}`: Key `{key_name}` is not type `{str(type)}`!")
-                        
-    async def value_test(self, ctx, file, data, key_name, values: list, required_field: bool = False):
-        object = data.get(key_name)
-        
-        if required_field and object is None:
-            await ctx.send(F"`{file}`: Required key `{key_name}` does not exist!")
-            return
-        if object not in values and object is not None:
-            await ctx.send(F"`{file}`: Key `{key_name}` is not a valid value: `{object}`!")
-            
-    async def you_check(self, ctx, file, text, key_name):
-        disallowed_words = ["you", "your", "yourself"]
-        
-        # Split the text by quotation marks, odd indices will be quoted text
-        parts = text.split('"')
-        
-        # Check only the non-quoted parts (even indices)
-        for i in range(0, len(parts), 2):
-            for word in disallowed_words:
-                if re.search(rf'\b{word}\b', parts[i], re.IGNORECASE):
-                    await ctx.send(f"`{file}`: Key `{key_name}` contains `{word}` outside of direct speech!")
-                    return False
-        return True
-            
-    async def item_test(self, ctx, file, item_name, type):
-        if not await self.data_manager.find_data(type, item_name):
-            await ctx.send(F"`{file}`: `{type}` item `{item_name}` is not a valid item!")
-        
     @commands.command()
     @commands.is_owner()
-    async def verify(self, ctx):    
-        unifieddata = {}
-
-        for dirpath, _, filenames in os.walk("./data"):
-            folder_key = os.path.relpath(dirpath, "./data")
-            folder_data = []
-            
-            for file in filenames:
-                if file.endswith(".json") or file.endswith(".yaml"):
-                    file_path = os.path.join(dirpath, file)
-                    with open(file_path, 'r') as f:
-                        try:
-                            data = yaml.safe_load(f)
-                            data['file_name'] = file_path
-                            folder_data.append(data)
-                        except json.JSONDecodeError:
-                            await ctx.send(f"Skipping invalid JSON: {file_path}")
-            if folder_data:
-                unifieddata[folder_key] = folder_data
-
-        ## Verify Recipes
-        for recipe in unifieddata['recipes']:
-            file_name = recipe.get('file_name')
-            
-            await self.item_test(ctx, file_name, item_name=recipe['name'], type=recipe['type'])
-            
-            await self.type_test(ctx, file_name, data=recipe, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=recipe, key_name='type', type=str, required_field=True)
-            
-            if await self.type_test(ctx, file_name, data=recipe, key_name='required_skill', type=str, required_field=False):
-                await self.type_test(ctx, file_name, data=recipe, key_name='skill_level', type=str, required_field=True)
-                
-            for component in recipe['recipe']:
-                await self.item_test(ctx, file_name, item_name=component['name'], type='crafting')
-                
-                await self.type_test(ctx, file_name, data=component, key_name='name', type=str, required_field=True)
-                await self.type_test(ctx, file_name, data=component, key_name='amount', type=int, required_field=True)
-
-        ## Verify Crafting Items
-        for crafting_item in unifieddata['items/crafting']:
-            file_name = crafting_item.get('file_name')
-            
-            await self.type_test(ctx, file_name, data=crafting_item, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=crafting_item, key_name='base_price', type=int, required_field=True)
-        
-        ## Verify Equipment Items
-        for equipment_item in unifieddata['items/equipment']:
-            file_name = equipment_item.get('file_name')
-            
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='description', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='type', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='slot', type=str, required_field=True)
-            await self.value_test(ctx, file_name, data=equipment_item, key_name='slot', values=['hand', 'feet', 'lower', 'upper', 'head'], required_field=True)
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='base_price', type=int, required_field=True)
-            await self.type_test(ctx, file_name, data=equipment_item, key_name='base_defense', type=int, required_field=False)
-            if await self.type_test(ctx, file_name, data=equipment_item, key_name='actions', type=list, required_field=False):
-                for action in equipment_item['actions']:
-                    await self.type_test(ctx, file_name, data=action, key_name='name', type=str, required_field=True)
-                    await self.type_test(ctx, file_name, data=action, key_name='description', type=str, required_field=True)
-                    await self.type_test(ctx, file_name, data=action, key_name='damage', type=int, required_field=True)
-                    await self.type_test(ctx, file_name, data=action, key_name='defense', type=int, required_field=True)
-            
-        ## Verify Single Use Items
-        for single_use_item in unifieddata['items/single_use']:
-            file_name = single_use_item.get('file_name')
-            
-            await self.type_test(ctx, file_name, data=single_use_item, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=single_use_item, key_name='description', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=single_use_item, key_name='type', type=str, required_field=True)
-            await self.value_test(ctx, file_name, data=single_use_item, key_name='type', values=['consumable'], required_field=True)
-            await self.type_test(ctx, file_name, data=single_use_item, key_name='base_heal', type=int, required_field=True)
-            await self.type_test(ctx, file_name, data=single_use_item, key_name='base_price', type=int, required_field=True)
-            
-        
-        ## Verify Item Gathering Locations
-        for gathering_location in unifieddata['locations/item_gathering']:
-            file_name = gathering_location.get('file_name')
-            
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='type', type=str, required_field=True)
-            await self.value_test(ctx, file_name, data=gathering_location, key_name='type', values=['gathering'], required_field=True)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='description', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='base_hrs', type=float, required_field=True)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='visit_cost', type=int, required_field=False)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='skill_test', type=int, required_field=True)
-            await self.type_test(ctx, file_name, data=gathering_location, key_name='item_pool', type=list, required_field=True)
-            
-            for item in gathering_location['item_pool']:
-                await self.type_test(ctx, file_name, data=item, key_name='name', type=str, required_field=True)
-                await self.type_test(ctx, file_name, data=item, key_name='type', type=str, required_field=True)
-                await self.type_test(ctx, file_name, data=item, key_name='chance_to_appear', type=float, required_field=True)
-                await self.type_test(ctx, file_name, data=item, key_name='std_amount', type=int, required_field=True)
-                await self.type_test(ctx, file_name, data=item, key_name='std_deviation', type=int, required_field=True)
-                
-            if len(gathering_location['item_pool']) == 0:
-                await ctx.send(F"`{file_name}`: This gathering location has no result items!")
-        
-        ## Verify Jobs
-        for job in unifieddata['locations/jobs']:
-            file_name = job.get('file_name')
-            
-            await self.type_test(ctx, file_name, data=job, key_name='name', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=job, key_name='introduction', type=str, required_field=True)
-            await self.you_check(ctx, file_name, text=job['introduction'], key_name='introduction')
-            await self.type_test(ctx, file_name, data=job, key_name='proficiency', type=str, required_field=True)
-            await self.type_test(ctx, file_name, data=job, key_name='results', type=list, required_field=True)
-            
-            for index, result in enumerate(job['results']):
-                await self.type_test(ctx, file_name, data=result, key_name='text', type=str, required_field=True)
-                await self.you_check(ctx, file_name, text=result['text'], key_name=f'text (result {index})')
-                await self.type_test(ctx, file_name, data=result, key_name='coins_change', type=int, required_field=True)
-                await self.type_test(ctx, file_name, data=result, key_name='xp_change', type=int, required_field=True)
-                await self.type_test(ctx, file_name, data=result, key_name='hours', type=int, required_field=True)
-            
-            if len(job['results']) == 0:
-                await ctx.send(F"`{file_name}`: This work location has no work results!")
-        
-        await ctx.send("Verification Complete!")
+    async def verify(self, ctx, full: str = None):
+        """Validate ./data. Pass `full` to ignore the cache and recheck every file."""
+        report = await asyncio.to_thread(run_verification, "./data", None if full == "full" else "./.verify_cache.json")
+
+        for file in report['files']:
+            for error in file['errors']:
+                await ctx.send(f"`{file['path']}`: {error}")
+
+        summary = report['summary']
+        await ctx.send(f"Verification Complete! {summary['errors']} problem(s) in {summary['with_errors']} file(s); "
+                       f"checked {summary['checked']}, {summary['cached']} unchanged, "
+                       f"in {report['timings_ms']['total']:.0f} ms.")
 
 async def setup(bot):
     await bot.add_cog(Verify(bot))
 
 if __name__ == "__main__":
-    import asyncio
-
-    class DummyCtx:
-        async def send(self, msg):
-            print(msg)
-
-    class DummyBot:
-        pass
+    import sys
 
-    dummy_ctx = DummyCtx()
-    dummy_bot = DummyBot()
-    cog = Verify(dummy_bot)
-    asyncio.run(cog.verify(dummy_ctx))
\ No newline at end of file
+    # python verify_data.py [data folder] [report.json]
+    data_root = sys.argv[1] if len(sys.argv) > 1 else "./data"
+    report = run_verification(data_root, cache_path=None)
+    for file in report['files']:
+        for error in file['errors']:
+            print(f"`{file['path']}`: {error}")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report['summary']), json.dumps(report['timings_ms']))
+    sys.exit(0 if report['ok'] else 1)
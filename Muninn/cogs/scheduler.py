@@ -0,0 +1,290 @@
+import discord
+from discord.ext import commands
+import sqlite3
+import asyncio
+import heapq
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+import pytz
+
+class Scheduler(commands.Cog):
+    """Persistent job scheduler that sleeps until the next job is due.
+
+    Jobs live in the ``scheduled_jobs`` table and are mirrored in a heap of
+    next-fire times. When a job fires its next fire time is written to the
+    database *before* the job is dispatched, so a restart never sends the
+    same occurrence twice.
+
+    Due jobs are delivered as a ``scheduled_job`` event; cogs handle them with
+    ``@commands.Cog.listener() async def on_scheduled_job(self, job)`` and
+    check ``job['handler']``.
+
+    Rules are dicts:
+        {"kind": "daily", "hour": 18, "minute": 0}
+        {"kind": "weekly", "weekday": 0, "hour": 9, "minute": 0}  # Monday
+        {"kind": "once"}  # fires at ``run_at`` and is then removed
+    """
+
+    DEFAULT_TIMEZONE = "US/Pacific"
+    MISFIRE_GRACE = 60 * 60  # Occurrences missed by more than this while offline are skipped
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db_path = "discord.db"
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._heap = []  # (next_fire_at, job_id); stale entries are skipped lazily
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._initialize_database()
+        self._load_jobs()
+
+    async def cog_load(self):
+        self._runner = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self._runner:
+            self._runner.cancel()
+
+    def _initialize_database(self):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    handler TEXT NOT NULL,
+                    guild_id INTEGER,
+                    rule TEXT NOT NULL,
+                    timezone TEXT NOT NULL,
+                    payload TEXT,
+                    next_fire_at REAL NOT NULL,
+                    last_fired_at REAL,
+                    last_lag REAL,
+                    run_count INTEGER DEFAULT 0
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_next ON scheduled_jobs(next_fire_at)")
+            conn.commit()
+
+    def _load_jobs(self):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT job_id, handler, guild_id, rule, timezone, payload,
+                       next_fire_at, last_fired_at, last_lag, run_count
+                FROM scheduled_jobs
+            """)
+            for row in cursor.fetchall():
+                job = {
+                    'job_id': row[0],
+                    'handler': row[1],
+                    'guild_id': row[2],
+                    'rule': json.loads(row[3]),
+                    'timezone': row[4],
+                    'payload': json.loads(row[5]) if row[5] else {},
+                    'next_fire_at': row[6],
+                    'last_fired_at': row[7],
+                    'last_lag': row[8],
+                    'run_count': row[9] or 0,
+                }
+                self._jobs[job['job_id']] = job
+                heapq.heappush(self._heap, (job['next_fire_at'], job['job_id']))
+
+    # ----- Rules -----
+
+    @staticmethod
+    def next_fire_time(rule: Dict[str, Any], timezone: str, after: float) -> Optional[float]:
+        """Return the first fire time (epoch seconds) of a recurring rule strictly after ``after``."""
+        kind = rule.get('kind')
+        if kind == 'once':
+            return None
+
+        tz = pytz.timezone(timezone)
+        local_after = datetime.fromtimestamp(after, tz)
+        day = local_after.date()
+        for offset in range(8):
+            candidate_day = day + timedelta(days=offset)
+            if kind == 'weekly' and candidate_day.weekday() != rule['weekday']:
+                continue
+            # Localize each day separately so DST changes keep the wall-clock time
+            candidate = tz.localize(datetime(
+                candidate_day.year, candidate_day.month, candidate_day.day,
+                rule.get('hour', 0), rule.get('minute', 0)
+            ))
+            if candidate.timestamp() > after:
+                return candidate.timestamp()
+        raise ValueError(f"Unsupported schedule rule: {rule}")
+
+    # ----- Public API -----
+
+    def schedule(self, job_id: str, handler: str, rule: Dict[str, Any], *,
+                 timezone: str = None, guild_id: int = None,
+                 payload: Dict[str, Any] = None, run_at: float = None) -> float:
+        """Create or update a job and return its next fire time.
+
+        Re-scheduling a job with an unchanged rule and timezone keeps its
+        pending fire time, so cogs can call this freely on startup.
+        """
+        timezone = timezone or self.DEFAULT_TIMEZONE
+        payload = payload or {}
+        existing = self._jobs.get(job_id)
+
+        if rule.get('kind') == 'once':
+            if run_at is None:
+                raise ValueError("One-shot jobs need run_at")
+            next_fire_at = run_at
+        elif existing and existing['rule'] == rule and existing['timezone'] == timezone:
+            next_fire_at = existing['next_fire_at']
+        else:
+            next_fire_at = self.next_fire_time(rule, timezone, time.time())
+
+        job = {
+            'job_id': job_id,
+            'handler': handler,
+            'guild_id': guild_id,
+            'rule': rule,
+            'timezone': timezone,
+            'payload': payload,
+            'next_fire_at': next_fire_at,
+            'last_fired_at': existing['last_fired_at'] if existing else None,
+            'last_lag': existing['last_lag'] if existing else None,
+            'run_count': existing['run_count'] if existing else 0,
+        }
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO scheduled_jobs
+                (job_id, handler, guild_id, rule, timezone, payload, next_fire_at, last_fired_at, last_lag, run_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (job_id, handler, guild_id, json.dumps(rule), timezone, json.dumps(payload),
+                  next_fire_at, job['last_fired_at'], job['last_lag'], job['run_count']))
+            conn.commit()
+
+        self._jobs[job_id] = job
+        heapq.heappush(self._heap, (next_fire_at, job_id))
+        self._wakeup.set()
+        return next_fire_at
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a job. Its heap entry is discarded when it surfaces."""
+        if job_id not in self._jobs:
+            return False
+        del self._jobs[job_id]
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM scheduled_jobs WHERE job_id = ?", (job_id,))
+            conn.commit()
+        self._wakeup.set()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    # ----- Dispatch loop -----
+
+    def _seconds_until_next(self) -> Optional[float]:
+        # Drop cancelled or rescheduled entries from the top of the heap
+        while self._heap:
+            fire_at, job_id = self._heap[0]
+            job = self._jobs.get(job_id)
+            if job and job['next_fire_at'] == fire_at:
+                return fire_at - time.time()
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        self.bot.dispatch("scheduler_ready", self)
+        while True:
+            try:
+                self._wakeup.clear()
+                delay = self._seconds_until_next()
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                self._fire_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in scheduler loop: {e}")
+                await asyncio.sleep(5)
+
+    def _fire_due(self):
+        now = time.time()
+        while self._seconds_until_next() is not None and self._heap[0][0] <= now:
+            fire_at, job_id = heapq.heappop(self._heap)
+            job = self._jobs[job_id]
+            lag = now - fire_at
+            # One-shot jobs (deadlines) still run late; stale recurring occurrences are skipped
+            missed = lag > self.MISFIRE_GRACE and job['rule'].get('kind') != 'once'
+            next_fire_at = self.next_fire_time(job['rule'], job['timezone'], max(now, fire_at))
+
+            # Persist progress before dispatching so a crash can't cause a resend
+            with sqlite3.connect(self.db_path) as conn:
+                if next_fire_at is None:
+                    conn.execute("DELETE FROM scheduled_jobs WHERE job_id = ?", (job_id,))
+                else:
+                    conn.execute("""
+                        UPDATE scheduled_jobs
+                        SET next_fire_at = ?, last_fired_at = ?, last_lag = ?, run_count = run_count + ?
+                        WHERE job_id = ?
+                    """, (next_fire_at, now if not missed else job['last_fired_at'], lag,
+                          0 if missed else 1, job_id))
+                conn.commit()
+
+            if next_fire_at is None:
+                del self._jobs[job_id]
+            else:
+                job['next_fire_at'] = next_fire_at
+                job['last_lag'] = lag
+                if not missed:
+                    job['last_fired_at'] = now
+                    job['run_count'] += 1
+                heapq.heappush(self._heap, (next_fire_at, job_id))
+
+            if missed:
+                print(f"Skipping missed run of job {job_id} ({lag:.0f}s late)")
+                continue
+
+            self.bot.dispatch("scheduled_job", dict(job, scheduled_for=fire_at, lag=lag))
+
+    # ----- Commands -----
+
+    @commands.command(name="jobs")
+    @commands.has_permissions(administrator=True)
+    async def list_jobs(self, ctx):
+        """List scheduled jobs for this server with their timing lag."""
+        jobs = sorted(
+            (job for job in self._jobs.values() if job['guild_id'] in (None, ctx.guild.id)),
+            key=lambda job: job['next_fire_at']
+        )
+
+        embed = discord.Embed(title="⏰ Scheduled Jobs", color=discord.Color.blue())
+        if not jobs:
+            embed.description = "No jobs are scheduled for this server."
+            await ctx.send(embed=embed)
+            return
+
+        lags = [job['last_lag'] for job in jobs if job['last_lag'] is not None]
+        for job in jobs[:25]:
+            lag = f"{job['last_lag'] * 1000:.0f} ms" if job['last_lag'] is not None else "—"
+            embed.add_field(
+                name=f"`{job['job_id']}`",
+                value=(
+                    f"**Next:** <t:{int(job['next_fire_at'])}:f> (<t:{int(job['next_fire_at'])}:R>)\n"
+                    f"**Rule:** {job['rule'].get('kind')} ({job['timezone']})\n"
+                    f"**Runs:** {job['run_count']} | **Last lag:** {lag}"
+                ),
+                inline=False
+            )
+        if lags:
+            embed.set_footer(text=f"Average lag {sum(lags) / len(lags) * 1000:.0f} ms | Max lag {max(lags) * 1000:.0f} ms")
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Scheduler(bot))
@@ -41,6 +41,10 @@ class ServerConfig(commands.Cog):
         self.db_path = "discord.db"
         self._initialize_database()
         self.global_config = load_global_config()
+
+        # Per-guild cache of converted config rows, filled one guild per query
+        self._config_cache: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self.cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
         
     def _initialize_database(self):
         """Initialize the server configuration database table."""
@@ -105,6 +109,8 @@ class ServerConfig(commands.Cog):
                     VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 """, (guild_id, key, str_value, config_type, description))
                 conn.commit()
+                self.invalidate_cache(guild_id)
+                self.bot.dispatch("server_config_changed", guild_id, key)
                 
                 # Sync to Huginn if this is a relevant config
                 asyncio.create_task(self._sync_config_to_huginn(guild_id, key, value, config_type))
@@ -135,41 +141,77 @@ class ServerConfig(commands.Cog):
         except Exception as e:
             print(f"Error syncing config to Huginn: {e}")
     
+    @staticmethod
+    def _convert_value(value: Optional[str], config_type: str) -> Any:
+        """Convert a stored string back to its configured type (None if invalid)."""
+        if value is None:
+            return None
+        if config_type in ('channel', 'integer'):
+            try:
+                return int(value) if value else None
+            except ValueError:
+                return None
+        if config_type == 'boolean':
+            return value.lower() == 'true'
+        return value
+
+    def _get_guild_configs(self, guild_id: int) -> Dict[str, Dict[str, Any]]:
+        """Return the cached, converted config rows for a guild, loading them in one query if needed."""
+        configs = self._config_cache.get(guild_id)
+        if configs is not None:
+            self.cache_stats['hits'] += 1
+            return configs
+
+        self.cache_stats['misses'] += 1
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT config_key, config_value, config_type, description 
+                FROM server_config WHERE guild_id = ?
+                ORDER BY config_key
+            """, (guild_id,))
+
+            configs = {
+                key: {'value': self._convert_value(value, config_type), 'type': config_type, 'description': description}
+                for key, value, config_type, description in cursor.fetchall()
+            }
+
+        self._config_cache[guild_id] = configs
+        return configs
+
+    def invalidate_cache(self, guild_id: Optional[int] = None) -> None:
+        """Drop cached config for one guild, or for every guild if none is given."""
+        if guild_id is None:
+            self._config_cache.clear()
+        else:
+            self._config_cache.pop(guild_id, None)
+        self.cache_stats['invalidations'] += 1
+
     def get_config(self, guild_id: int, key: str, default: Any = None) -> Any:
         """Get a configuration value for a server."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT config_value, config_type FROM server_config 
-                    WHERE guild_id = ? AND config_key = ?
-                """, (guild_id, key))
-                
-                result = cursor.fetchone()
-                if not result or result[0] is None:
-                    return default
-                
-                value, config_type = result
-                
-                # Convert back to appropriate type
-                if config_type == 'channel':
-                    try:
-                        return int(value) if value else default
-                    except ValueError:
-                        return default
-                elif config_type == 'boolean':
-                    return value.lower() == 'true'
-                elif config_type == 'integer':
-                    try:
-                        return int(value)
-                    except ValueError:
-                        return default
-                else:
-                    return value
-                    
+            entry = self._get_guild_configs(guild_id).get(key)
+            if not entry or entry['value'] is None:
+                return default
+            return entry['value']
         except Exception as e:
             print(f"Error getting config {key} for guild {guild_id}: {e}")
             return default
+
+    def get_many(self, guild_id: int, keys: List[str], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get several configuration values for a server with a single cache lookup."""
+        defaults = defaults or {}
+        try:
+            configs = self._get_guild_configs(guild_id)
+        except Exception as e:
+            print(f"Error getting configs {keys} for guild {guild_id}: {e}")
+            configs = {}
+
+        values = {}
+        for key in keys:
+            entry = configs.get(key)
+            values[key] = entry['value'] if entry and entry['value'] is not None else defaults.get(key)
+        return values
     
     def delete_config(self, guild_id: int, key: str) -> bool:
         """Delete a configuration value for a server."""
@@ -181,6 +223,8 @@ class ServerConfig(commands.Cog):
                     WHERE guild_id = ? AND config_key = ?
                 """, (guild_id, key))
                 conn.commit()
+                self.invalidate_cache(guild_id)
+                self.bot.dispatch("server_config_changed", guild_id, key)
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"Error deleting config {key} for guild {guild_id}: {e}")
@@ -189,53 +233,16 @@ class ServerConfig(commands.Cog):
     def get_all_config(self, guild_id: int) -> Dict[str, Any]:
         """Get all configuration values for a server."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT config_key, config_value, config_type, description 
-                    FROM server_config WHERE guild_id = ?
-                    ORDER BY config_key
-                """, (guild_id,))
-                
-                configs = {}
-                for key, value, config_type, description in cursor.fetchall():
-                    if value is None:
-                        configs[key] = {'value': None, 'type': config_type, 'description': description}
-                        continue
-                        
-                    # Convert to appropriate type
-                    if config_type == 'channel':
-                        try:
-                            configs[key] = {
-                                'value': int(value), 
-                                'type': config_type, 
-                                'description': description
-                            }
-                        except ValueError:
-                            configs[key] = {'value': None, 'type': config_type, 'description': description}
-                    elif config_type == 'boolean':
-                        configs[key] = {
-                            'value': value.lower() == 'true', 
-                            'type': config_type, 
-                            'description': description
-                        }
-                    elif config_type == 'integer':
-                        try:
-                            configs[key] = {
-                                'value': int(value), 
-                                'type': config_type, 
-                                'description': description
-                            }
-                        except ValueError:
-                            configs[key] = {'value': None, 'type': config_type, 'description': description}
-                    else:
-                        configs[key] = {'value': value, 'type': config_type, 'description': description}
-                
-                return configs
+            # Copy so callers can't mutate the cache
+            return {key: dict(entry) for key, entry in self._get_guild_configs(guild_id).items()}
         except Exception as e:
             print(f"Error getting all configs for guild {guild_id}: {e}")
             return {}
 
+    def cache_hit_rate(self) -> float:
+        total = self.cache_stats['hits'] + self.cache_stats['misses']
+        return self.cache_stats['hits'] / total if total else 0.0
+
     @commands.group(name="config", invoke_without_command=True)
     @commands.has_permissions(administrator=True)
     async def config_group(self, ctx):
@@ -908,6 +915,17 @@ class ServerConfig(commands.Cog):
             inline=False
         )
         
+        embed.add_field(
+            name="Cache Stats",
+            value=(
+                f"**Hit Rate:** {self.cache_hit_rate():.1%}\n"
+                f"**Hits:** {self.cache_stats['hits']} | **Misses:** {self.cache_stats['misses']}\n"
+                f"**Invalidations:** {self.cache_stats['invalidations']}\n"
+                f"**Cached Guilds:** {len(self._config_cache)}"
+            ),
+            inline=False
+        )
+        
         embed.set_footer(text="Test configurations have been cleaned up")
         await ctx.send(embed=embed)
 
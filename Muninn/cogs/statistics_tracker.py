@@ -67,6 +67,14 @@ class StatsTracker(commands.Cog):
                 mentioned_roles TEXT
             )
         """)
+        # Channels whose full history has been imported, so their stored ids cover the whole channel
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS imported_channels (
+                channel_id INTEGER PRIMARY KEY,
+                imported_at TIMESTAMP
+            )
+        """)
+        self.conn.commit()
 
     def close(self):
         """Close the database connection."""
@@ -175,6 +183,12 @@ class StatsTracker(commands.Cog):
                         ))
                     self.conn.commit()
 
+                self.cursor.execute(
+                    "INSERT OR REPLACE INTO imported_channels (channel_id, imported_at) VALUES (?, ?)",
+                    (channel.id, convert_to_california_time(datetime.utcnow()))
+                )
+                self.conn.commit()
+
                 await self.send_status_report(ctx, channel.name, total_messages_in_channel, missing_data_messages)
 
                 channel_progress[channel.name] = {
@@ -229,51 +243,23 @@ class StatsTracker(commands.Cog):
         """Command to start the import process."""
         await self.import_messages(ctx)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Track messages sent by users."""
-        conn = sqlite3.connect("discord.db")
-        cursor = conn.cursor()
-
-        if message.author.bot:
+    async def on_message_features(self, features):
+        """Track messages sent by users (called by MessagePipeline)."""
+        if features.is_bot or features.guild_id is None:
             return
-        
-        message_content = re.sub(r'https?://\S+', '', message.content)
-
-        user_id = message.author.id
-        message_id = message.id
-        channel_id = message.channel.id
-        timestamp = message.created_at
 
+        message = features.message
         # Convert timestamp to UTC and then to California time
-        timestamp = convert_to_california_time(timestamp)
+        timestamp = convert_to_california_time(message.created_at)
 
-        message_length = len(message_content) if message_content else 0
-
-        # Updated emoji count using regex
-        unicode_emoji_pattern = re.compile(r"[\U0001F300-\U0001F6FF\U0001F900-\U0001F9FF\U0001F1E0-\U0001F1FF]+", flags=re.UNICODE)
-        custom_emoji_pattern = re.compile(r"<a?:\w+:\d+>")
-        
-        unicode_emojis = unicode_emoji_pattern.findall(message_content)
-        custom_emojis = custom_emoji_pattern.findall(message_content)
-        
-        emoji_count = len(unicode_emojis) + len(custom_emojis)
-        
-        word_count = len(message_content.split()) if message_content else 0
-        has_media = bool(message.attachments)
-        attachment_count = len(message.attachments)
-        mentioned_users = ', '.join(str(user.id) for user in message.mentions) if message.mentions else ''
-        mentioned_roles = ', '.join(str(role.id) for role in message.role_mentions) if message.role_mentions else ''
-
-        cursor.execute("""
+        self.cursor.execute("""
             INSERT INTO user_activity (guild_id, user_id, message_id, channel_id, timestamp, message_length, emoji_count, 
             word_count, has_media, attachment_count, mentioned_users, mentioned_roles)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (message.guild.id, user_id, message_id, channel_id, timestamp, message_length, emoji_count, word_count, 
-              has_media, attachment_count, mentioned_users, mentioned_roles))
-
-        conn.commit()
-        conn.close()
+        """, (features.guild_id, features.author_id, message.id, message.channel.id, timestamp, features.message_length,
+              features.emoji_count, features.word_count, features.attachment_count > 0, features.attachment_count,
+              ', '.join(map(str, features.mentioned_user_ids)), ', '.join(map(str, features.mentioned_role_ids))))
+        self.conn.commit()
 
 async def setup(bot):
     await bot.add_cog(StatsTracker(bot))
@@ -1,48 +1,168 @@
 import discord # type: ignore
 from discord.ext import commands # type: ignore
+import asyncio
 import os
-import requests
-from PIL import Image
-from io import BytesIO
 import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class ProfileAssets:
+    """Everything an embed needs from a user's picture, computed once per picture."""
+    key: str  # Avatar hash or custom image mtime; a different key means the picture changed
+    color: discord.Color
+    has_custom_image: bool
+    thumbnail: Optional[bytes] = None  # Small PNG of the custom image, ready to attach
+
+def atomic_write(path, text):
+    """Replace ``path`` with ``text`` via a temp file and rename, so readers never see a partial file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+class RateWindow:
+    """Sliding-window event counter with a fixed amount of memory per key.
+
+    Only the newest ``capacity`` timestamps are kept for each key, so ``hit``
+    and ``count`` are O(capacity) no matter how much a key is used. Counts
+    are capped at ``capacity``; pick it one above the limit you enforce.
+    Keys that have gone quiet are dropped every ``prune_every`` hits.
+    """
+
+    def __init__(self, window: float, capacity: int, prune_every: int = 1000):
+        self.window = window
+        self.capacity = capacity
+        self.prune_every = prune_every
+        self._events = {}
+        self._hits = 0
+
+    def _trim(self, events, now):
+        while events and now - events[0] >= self.window:
+            events.popleft()
+
+    def hit(self, key, now: Optional[float] = None) -> int:
+        """Record an event for ``key`` and return how many it has in the window."""
+        now = time.time() if now is None else now
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.capacity)
+        self._trim(events, now)
+        events.append(now)
+
+        self._hits += 1
+        if self._hits >= self.prune_every:
+            self._hits = 0
+            self.prune(now)
+        return len(events)
+
+    def count(self, key, now: Optional[float] = None) -> int:
+        events = self._events.get(key)
+        if not events:
+            return 0
+        self._trim(events, time.time() if now is None else now)
+        return len(events)
+
+    def reset(self, key=None):
+        """Forget one key, or every key when ``key`` is None."""
+        if key is None:
+            self._events.clear()
+        else:
+            self._events.pop(key, None)
+
+    def prune(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        for key in [key for key, events in self._events.items() if not events or now - events[-1] >= self.window]:
+            del self._events[key]
+
 class Utils(commands.Cog):
+    PROFILE_IMAGE_DIR = "/usr/src/bot/profile_images"
+    THUMBNAIL_SIZE = 256
+    ASSET_CACHE_SIZE = 512
+
     def __init__(self, bot):
         self.bot = bot
+        self._assets: "OrderedDict[int, ProfileAssets]" = OrderedDict()
+
+    def _custom_image_key(self, user_id):
+        try:
+            return f"file:{os.path.getmtime(f'{self.PROFILE_IMAGE_DIR}/{user_id}.png')}"
+        except OSError:
+            return None
+
+    def invalidate_profile_assets(self, user_id):
+        """Forget a user's cached assets, e.g. after a new custom image is approved."""
+        self._assets.pop(user_id, None)
+
+    async def get_profile_assets(self, user) -> ProfileAssets:
+        """Return the user's cached colour and thumbnail, rebuilding them only if the picture changed."""
+        key = self._custom_image_key(user.id) or f"avatar:{user.display_avatar.key}"
+        assets = self._assets.get(user.id)
+        if assets is not None and assets.key == key:
+            self._assets.move_to_end(user.id)
+            return assets
+
+        embed_color, avatar_image, has_custom_image = await self.get_avatar_color_and_image(user)
+        thumbnail = None
+        if has_custom_image and avatar_image is not None:
+            def encode():
+                image = avatar_image.copy()
+                image.thumbnail((self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE))
+                buffer = BytesIO()
+                image.save(buffer, format="PNG")
+                return buffer.getvalue()
+            thumbnail = await asyncio.to_thread(encode)
+
+        assets = ProfileAssets(key, embed_color, has_custom_image and thumbnail is not None, thumbnail)
+        if avatar_image is None:
+            # Fetch failed and this is the fallback; don't let it stick until the picture changes
+            return assets
+        self._assets[user.id] = assets
+        while len(self._assets) > self.ASSET_CACHE_SIZE:
+            self._assets.popitem(last=False)
+        return assets
+
+    def profile_file(self, assets: ProfileAssets):
+        """A fresh attachment for the cached thumbnail (discord.File can only be sent once)."""
+        if not assets.has_custom_image:
+            return None
+        return discord.File(BytesIO(assets.thumbnail), filename="image.png")
+
+    def profile_thumbnail_url(self, user, assets: ProfileAssets):
+        return "attachment://image.png" if assets.has_custom_image else user.display_avatar.url
 
     async def get_avatar_color_and_image(self, user):
-        """Fetch the user's avatar and calculate the average color."""
+        """Fetch the user's avatar and its average color through the shared image cache."""
         try:
-            # Check if custom profile image exists on the server
-            if os.path.exists(f"/usr/src/bot/profile_images/{user.id}.png"):
-                # Read the custom avatar image from the server
-                with open(f"/usr/src/bot/profile_images/{user.id}.png", "rb") as image_file:
-                    response = image_file.read()
+            fetcher = self.bot.get_cog("Fetcher")
+            custom_image_path = f"{self.PROFILE_IMAGE_DIR}/{user.id}.png"
 
-                avatar_image = Image.open(BytesIO(response)).convert("RGB")
+            # Prefer an approved custom profile image stored on the server
+            if os.path.exists(custom_image_path):
+                entry = await fetcher.get_file_image(custom_image_path)
                 has_custom_image = True
             else:
-                # Fetch avatar from Discord if custom profile doesn't exist
-                avatar_url = user.avatar.url
-                response = requests.get(avatar_url)
-                avatar_image = Image.open(BytesIO(response.content)).convert("RGB")
+                entry = await fetcher.get_avatar(user)
                 has_custom_image = False
 
-            # Calculate the average color of the avatar image
-            pixels = list(avatar_image.getdata())
-            avg_color = tuple(sum(c) // len(c) for c in zip(*pixels))
+            if entry is None:
+                return discord.Color.blue(), None, has_custom_image
+
+            avatar_image, avg_color = entry
             embed_color = discord.Color.from_rgb(*avg_color)
-            logger.info(f"Calculated average avatar color: {avg_color}")
 
-            # Return the calculated color and the image
+            # Return the cached color and the image
             return embed_color, avatar_image, has_custom_image
 
         except Exception as e:
             logger.error(f"Error fetching or processing avatar image: {e}")
-            return discord.Color.blue(), None  # Fallback to blue if there's an error
+            return discord.Color.blue(), None, False  # Fallback to blue if there's an error
 
 async def setup(bot):
     await bot.add_cog(Utils(bot))
@@ -1,15 +1,15 @@
 import discord # type: ignore
 import sqlite3
 import time
-from collections import defaultdict
 from discord.ext import commands # type: ignore
 import os
 import subprocess
 import yaml
 import random
-import re
 import asyncio
 from discord.utils import get # type: ignore
+from cogs.utils import RateWindow
+from cogs.message_pipeline import extract_features
 import configparser  # Add this import for reading the token from a config file
 
 # Load message rewards from YAML file
@@ -25,6 +25,30 @@ def load_yaml():
     return data["message_rewards"], data["thank_you_responses"]
 
 message_rewards, thank_you_data = load_yaml()
+# Milestones keyed by message count, so the per-message lookup is a plain int lookup
+message_rewards = {int(count): reward for count, reward in message_rewards.items()}
+rewards_mtime = os.path.getmtime("responses.yaml") if os.path.exists("responses.yaml") else None
+rewards_checked = time.monotonic()
+
+def get_message_rewards():
+    """Return the reward table, reloading it if responses.yaml changed (checked at most every 30s).
+
+    The same dict is shared as ``bot.message_rewards``, which Contribution adds approved rewards to.
+    """
+    global rewards_mtime, rewards_checked
+    if time.monotonic() - rewards_checked < 30:
+        return message_rewards
+    rewards_checked = time.monotonic()
+    try:
+        mtime = os.path.getmtime("responses.yaml")
+        if mtime != rewards_mtime:
+            rewards, _ = load_yaml()
+            message_rewards.clear()
+            message_rewards.update((int(count), reward) for count, reward in rewards.items())
+            rewards_mtime = mtime
+    except Exception as e:
+        print(f"Could not reload message rewards: {e}")
+    return message_rewards
 normal_thank_you_responses = thank_you_data["normal"]
 excessive_thank_you_responses = thank_you_data["excessive"]
 
@@ -40,14 +64,16 @@ MAX_MESSAGES_WITHIN_COOLDOWN = 4
 GIF_COOLDOWN = 86400  # 24 hours in seconds
 MAX_GIFS_IN_PERIOD = 3  # Max GIFs per user in 24 hours
 
-recent_messages = defaultdict(list)
-user_gif_timestamps = defaultdict(list)
-thank_timestamps = defaultdict(list)
+# Bounded per-user sliding windows; each keeps one more timestamp than the limit it enforces
+recent_messages = RateWindow(MESSAGE_COOLDOWN, MAX_MESSAGES_WITHIN_COOLDOWN + 1)
+user_gif_timestamps = RateWindow(GIF_COOLDOWN, MAX_GIFS_IN_PERIOD + 1)
+thank_timestamps = RateWindow(GIF_COOLDOWN, 4)
 
 intents = discord.Intents.all()
 
 bot = commands.Bot(command_prefix='!', intents=intents)
 bot.owner_id = 867261583871836161
+bot.message_rewards = message_rewards
 
 # Load bot token from config file
 config = configparser.ConfigParser()
@@ -85,12 +111,14 @@ async def on_message(message):
     if message.author == bot.user:
         return
 
-    user_id = message.author.id
+    pipeline = bot.get_cog("MessagePipeline")
+    features = pipeline.features_for(message) if pipeline else extract_features(message, bot.user, bot.command_prefix)
+    user_id = features.author_id
     guild_id = message.guild.id
     nick = message.author.nick if message.author.nick else message.author.name
 
     current_time = time.time()
-    recent_messages[user_id].append(current_time)
+    recent_count = recent_messages.hit(user_id, current_time)
 
     # Create unique table for each guild if not exists
     table_name = f"discord_{guild_id}"
@@ -100,10 +128,7 @@ async def on_message(message):
                     message_count INTEGER
                 )''')
 
-    # Remove messages older than the cooldown window
-    recent_messages[user_id] = [t for t in recent_messages[user_id] if current_time - t < MESSAGE_COOLDOWN]
-
-    if len(recent_messages[user_id]) > MAX_MESSAGES_WITHIN_COOLDOWN:
+    if recent_count > MAX_MESSAGES_WITHIN_COOLDOWN:
         try:
             cur.execute(f'SELECT message_count FROM {table_name} WHERE id = ?', (user_id,))
             result = cur.fetchone()
@@ -117,18 +142,15 @@ async def on_message(message):
         return
 
     # Message Counter
-    if not message.content.startswith("!"):
+    if not features.is_command:
         try:
             member = message.guild.get_member(user_id) or next((m for m in message.guild.members if m.id == user_id), None)
             current_nick = member.nick if member and member.nick else message.author.name
 
-            # Store message length, excluding emojis and punctuation
-            message_length = len(re.sub(r"[^\w\s]", "", message.content))  # Remove punctuation
-            message_length = len(re.sub(r"[^\x00-\x7F]+", "", message.content))  # Remove emojis
-
             cur.execute(f'SELECT friendly_name, message_count FROM {table_name} WHERE id = ?', (user_id,))
             result = cur.fetchone()
 
+            reward = None
             if result is None:
                 cur.execute(f'INSERT INTO {table_name} (id, friendly_name, message_count) VALUES (?, ?, ?)', (user_id, current_nick, 1))
             else:
@@ -137,13 +159,14 @@ async def on_message(message):
                     cur.execute(f'UPDATE {table_name} SET friendly_name = ? WHERE id = ?', (current_nick, user_id))
                 message_count += 1
                 cur.execute(f'UPDATE {table_name} SET message_count = ? WHERE id = ?', (message_count, user_id))
+                reward = get_message_rewards().get(message_count)
 
-                if str(message_count) in message_rewards:
-                    reward = message_rewards[str(message_count)].format(nick=nick, message=message.content)
-                    time.sleep(2)
-                    await message.channel.send(reward)
-
+            # Commit before awaiting anything so the write lock isn't held across the pause
             con.commit()
+
+            if reward is not None:
+                await asyncio.sleep(2)
+                await message.channel.send(reward.format(nick=nick, message=message.content))
         except Exception as e:
             print(f"Message Counter Error: {e}")
 
@@ -152,10 +175,7 @@ async def on_message(message):
         if 'tenor' in attachment.url.lower():
             await message.channel.send("That's a gif!")
 
-            user_gif_timestamps[user_id].append(current_time)
-            user_gif_timestamps[user_id] = [t for t in user_gif_timestamps[user_id] if current_time - t < GIF_COOLDOWN]
-
-            if len(user_gif_timestamps[user_id]) > MAX_GIFS_IN_PERIOD:
+            if user_gif_timestamps.hit(user_id, current_time) > MAX_GIFS_IN_PERIOD:
                 try:
                     nick = message.author.display_name
                     await message.channel.send(f"{nick}, you've sent too many GIFs in the last 24 hours. Please slow down!")
@@ -163,13 +183,11 @@ async def on_message(message):
                     print(f"Error sending warning: {e}")
 
     # Track thank you messages
-    if "thank" in message.content.lower() and bot.user in message.mentions:
-        thank_timestamps[user_id].append(current_time)
-        thank_timestamps[user_id] = [t for t in thank_timestamps[user_id] if current_time - t < GIF_COOLDOWN]
-
-        if len(thank_timestamps[user_id]) == 3:
+    if features.mentions_bot and "thank" in features.content.lower():
+        thank_count = thank_timestamps.hit(user_id, current_time)
+        if thank_count == 3:
             response = random.choice(excessive_thank_you_responses)
-        elif len(thank_timestamps[user_id]) > 3:
+        elif thank_count > 3:
             response = random.choice(excessive_thank_you_responses)
         else:
             response = random.choice(normal_thank_you_responses)